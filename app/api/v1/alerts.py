@@ -1,25 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+import asyncio
+import json
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from app.db.session import get_db
+from app.core.config import settings
+from app.db.session import get_db, get_read_db
 
 from app.enums.alert_status import AlertStatus
+from app.enums.alert_type import AlertType
+from app.enums.event_type import EventType
 from app.models.alert import Alert, BaseAlert
-from app.models.device import Device
+from app.models.types import datetime_to_millis, millis_to_datetime
+from app.service.alert_service import publish_alert, save_alerts
+from app.service.conditional import etag_matches, make_etag, not_modified, set_validators
+from app.service.data_versions import data_versions
+from app.service.device_cache import device_cache
+from app.service.event_bus import BusEvent, SlowConsumer, event_bus, field_filter
+from app.service.pagination import CursorError, after_cursor, decode_cursor, encode_cursor
+from app.service.query_cache import query_cache
 
 router = APIRouter(prefix="/alerts", tags=["alerts"])
 
+
 @router.post("/", status_code=201)
 async def create_alert(
     create_alert: BaseAlert,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Создать новое оповещение для устройства.
     """
-    device = db.query(Device).filter(Device.id == create_alert.device_id).first()
+    device = await device_cache.get(db, create_alert.device_id)
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
     
@@ -30,62 +45,161 @@ async def create_alert(
         severity=create_alert.severity,
         status=AlertStatus.NEW.value
     )
-    db.add(alert)
-    db.commit()
-    db.refresh(alert)  # обновить объект с данными из БД (id, created_at)
+    await save_alerts(db, [alert])
+    await db.refresh(alert)  # обновить объект с данными из БД (id, created_at)
     
     return alert
 
 
+def _format_sse(event: BusEvent) -> str:
+    """Сформировать SSE сообщение из события шины."""
+    return f"id: {event.id}\nevent: {event.type}\ndata: {event.to_json()}\n\n"
+
+
+@router.get("/stream")
+async def stream_alerts(
+    severity: Optional[List[str]] = Query(None, description="Фильтр по уровню важности"),
+    alert_type: Optional[List[AlertType]] = Query(None, description="Фильтр по типу оповещения"),
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Лента оповещений всех устройств (Server-Sent Events).
+    
+    Передает созданные оповещения и изменения их статуса по всему парку
+    одним долгоживущим соединением. Каждое событие имеет id; при
+    переподключении браузер передает Last-Event-ID, и сервер повторяет
+    пропущенные события из буфера последних ALERT_STREAM_REPLAY_SIZE событий.
+    Если пропущенные события уже вытеснены из буфера, сначала отправляется
+    событие reset: клиент должен перечитать оповещения через REST.
+    
+    Примеры:
+    GET /api/v1/alerts/stream
+    GET /api/v1/alerts/stream?severity=high&severity=critical&alert_type=temperature
+    """
+    accept = field_filter(severity=severity, alert_type=alert_type)
+
+    async def events():
+        # Повтор и подписка без await между ними: события не теряются и не дублируются
+        backlog, complete = event_bus.replay(last_event_id, accept) if last_event_id is not None else ([], True)
+        subscription = event_bus.subscribe(None, accept, event_types=[EventType.ALERT])
+        try:
+            yield "retry: 3000\n\n"
+            if not complete:
+                yield "event: reset\ndata: {}\n\n"
+            for event in backlog:
+                yield _format_sse(event)
+            while True:
+                try:
+                    batch, dropped = await asyncio.wait_for(subscription.get(), settings.ALERT_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if dropped:
+                    yield f"event: dropped\ndata: {json.dumps({'count': dropped})}\n\n"
+                for event in batch:
+                    yield _format_sse(event)
+        except SlowConsumer:
+            # Клиент переподключится и получит пропущенное из буфера повтора
+            return
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/{device_id}/alerts")
 async def get_device_alerts(
     device_id: str,
+    response: Response,
     status: Optional[AlertStatus] = Query(None, description="Фильтр по статусу"),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor)"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получить список оповещений для устройства с фильтрацией.
     
+    Оповещения отдаются страницами от новых к старым. Если страница
+    заполнена, ответ содержит next_cursor для запроса следующей
+    страницы (cursor=next_cursor, с теми же фильтрами).
+    
+    Ответ содержит ETag (версия данных устройства и параметры запроса)
+    и Last-Modified (время самого нового оповещения устройства). Запрос
+    с If-None-Match, совпадающим с ETag, получает 304 без тела и без
+    запроса оповещений.
+    
     Примеры:
     GET /api/v1/alerts/abc123
     GET /api/v1/alerts/abc123?status=new&limit=5
+    GET /api/v1/alerts/abc123?status=new&limit=5&cursor=WyIyMDI1LTEwLTA0VDEyOjAwOjAwIiwgIjEyMyJd
     """
-    device = db.query(Device).filter(Device.id == device_id).first()
+    device = await device_cache.get(db, device_id)
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
     
-    query = db.query(Alert).filter(Alert.device_id == device_id)
+    position = None
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+        except CursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     
-    # Фильтрация
-    if status:
-        query = query.filter(Alert.status == status)
+    async def load_alerts():
+        query = select(Alert).where(Alert.device_id == device_id)
+        
+        # Фильтрация
+        if status:
+            query = query.where(Alert.status == status)
+        if position:
+            query = query.where(after_cursor(Alert.timestamp, Alert.id, position))
+        
+        alerts = (await db.scalars(query.order_by(Alert.timestamp.desc(), Alert.id.desc()).limit(limit))).all()
+        page = {
+            "device_id": device_id,
+            "device_name": device.name,
+            "total": len(alerts),
+            "next_cursor": encode_cursor(alerts[-1].timestamp, alerts[-1].id) if len(alerts) == limit else None,
+            "alerts": [
+                {
+                    "id": a.id,
+                    "alert_type": a.alert_type,
+                    "message": a.message,
+                    "severity": a.severity,
+                    "status": a.status,
+                    "timestamp": a.timestamp
+                }
+                for a in alerts
+            ]
+        }
+        
+        # Время самого нового оповещения устройства (Last-Modified) кэшируется
+        # вместе со страницей, чтобы попадание в кэш не обращалось к БД
+        last_modified = await db.scalar(select(func.max(Alert.timestamp)).where(Alert.device_id == device_id))
+        return {"last_modified": datetime_to_millis(last_modified) if last_modified else None, "page": page}
     
-    alerts = query.order_by(Alert.timestamp.desc()).limit(limit).all()
+    params = {"status": status, "limit": limit, "cursor": cursor}
+    version = await data_versions.version(device_id)
+    etag = make_etag("alerts", version, params)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
     
-    return {
-        "device_id": device_id,
-        "device_name": device.name,
-        "total": len(alerts),
-        "alerts": [
-            {
-                "id": a.id,
-                "alert_type": a.alert_type,
-                "message": a.message,
-                "severity": a.severity,
-                "status": a.status,
-                "timestamp": a.timestamp
-            }
-            for a in alerts
-        ]
-    }
+    # Результат кэшируется до следующего изменения оповещений устройства
+    result = await query_cache.get_or_compute("alerts", device_id, params, load_alerts, version=version)
+    last_modified = result["last_modified"]
+    set_validators(response, etag, millis_to_datetime(last_modified) if last_modified is not None else None)
+    return result["page"]
     
 
 @router.put("/{alert_id}/status")
 async def update_alert_status(
     alert_id: str,
     status: AlertStatus,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Обновить статус оповещения.
@@ -93,12 +207,14 @@ async def update_alert_status(
     Пример запроса:
     PUT /api/v1/alerts/alert123/status?status=resolved
     """
-    alert = db.query(Alert).filter(Alert.id == alert_id).first()
+    alert = await db.get(Alert, alert_id)
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     
     alert.status = status.value
-    db.commit()
-    db.refresh(alert)
+    await db.commit()
+    await db.refresh(alert)
+    await data_versions.bump([alert.device_id])
+    publish_alert(alert, "status_changed")
     
     return alert
\ No newline at end of file
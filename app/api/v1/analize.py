@@ -1,15 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from app.db.session import get_db
+from app.db.session import get_read_db
 
 from app.enums.alert_status import AlertStatus
 from app.enums.sensor_type import SensorType
 from app.models.alert import Alert, BaseAlert
-from app.models.device import Device
-from app.models.sensor_reading import SensorReading
+from app.service.reading_query import latest_readings
+from app.service.device_cache import device_cache
 from app.service.gpt_service import GptService
 
 router = APIRouter(prefix="/analyze", tags=["analyze"])
@@ -17,16 +17,14 @@ router = APIRouter(prefix="/analyze", tags=["analyze"])
 @router.post("/gpt/{device_id}", status_code=201)
 async def analyze_data(
     device_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Анализировать данные с помощью моделей GPT.
     """
 
-    device = db.query(Device).filter(Device.id == device_id).first()
-    sensor_readings = db.query(SensorReading).filter(
-        SensorReading.device_id == device_id
-    ).order_by(SensorReading.timestamp.desc()).limit(100).all()
+    device = await device_cache.get(db, device_id)
+    sensor_readings = await latest_readings(db, device_id, 100)
 
     def serialize_reading(sr):
         return {
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
@@ -15,13 +16,13 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 @router.post("/login")
 async def login(
     login_user: BaseUser,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Аутентификация пользователя.
 
     """
-    user = db.query(User).filter(User.username == login_user.username).first()
+    user = await db.scalar(select(User).where(User.username == login_user.username))
     if not user or not PasswordService.verify_password(login_user.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
@@ -29,15 +30,15 @@ async def login(
     return {"message": "Login successful", "status": "authenticated"}
 
 @router.post("/register", status_code=201)
-def register(
+async def register(
     create_user: CreateUser,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Регистрация нового пользователя.
 
     """
-    existing_user = db.query(User).filter(User.username == create_user.username).first()
+    existing_user = await db.scalar(select(User).where(User.username == create_user.username))
     if existing_user:
         raise HTTPException(status_code=400, detail="Username already exists")
     
@@ -47,7 +48,7 @@ def register(
         password_hash=PasswordService.hash_password(create_user.password)   
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)  # обновить объект с данными из БД (id, created_at)
+    await db.commit()
+    await db.refresh(user)  # обновить объект с данными из БД (id, created_at)
     
     return user
\ No newline at end of file
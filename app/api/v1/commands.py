@@ -1,14 +1,19 @@
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
 from app.enums.action_type import ActionType
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.enums.command_status import CommandStatus
 from app.models.command import Command, CreateCommand, UpdateCommandStatus
-from app.models.device import Device
+from app.models.device_stats import DeviceStats
+from app.service.data_versions import data_versions
+from app.service.device_cache import device_cache
+from app.service.device_stats import add_device_counts
+from app.service.pagination import CursorError, after_cursor, decode_cursor, encode_cursor
 
 
 router = APIRouter(prefix="/device/commands", tags=["commands"])
@@ -16,12 +21,12 @@ router = APIRouter(prefix="/device/commands", tags=["commands"])
 @router.post("/", status_code=201)
 async def create_command(
     create_command: CreateCommand,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Создать новую команду для устройства.
     """
-    device = db.query(Device).filter(Device.id == create_command.device_id).first()
+    device = await device_cache.get(db, create_command.device_id)
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
     
@@ -32,42 +37,70 @@ async def create_command(
         status=CommandStatus.PENDING
     )
     db.add(command)
-    db.commit()
-    db.refresh(command) 
+    await add_device_counts(db, DeviceStats.commands_count, {command.device_id: 1})
+    await db.commit()
+    await db.refresh(command) 
+    await data_versions.bump([command.device_id])
     
     return command
 
 @router.get('/{device_id}/{command_status}', status_code=200)
-async def get_device_commands_list(device_id: str, command_status: CommandStatus = CommandStatus.PENDING,  db: Session = Depends(get_db)):
+async def get_device_commands_list(
+    device_id: str,
+    response: Response,
+    command_status: CommandStatus = CommandStatus.PENDING,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (X-Next-Cursor)"),
+    db: AsyncSession = Depends(get_read_db)
+):
     """
     Получить список команд, которые отсносятся к устройству
+    
+    Команды отдаются в порядке создания, не больше limit за запрос.
+    Тело ответа - список команд; если страница заполнена, заголовок
+    X-Next-Cursor содержит курсор следующей страницы (cursor=...).
+    
+    Пример:
+    GET /api/v1/device/commands/abc123/pending?limit=50
     """
-    device = db.query(Device).filter(Device.id == device_id).first()
+    device = await device_cache.get(db, device_id)
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
 
-    commands = db.query(Command).filter((Command.device_id == device_id) & (Command.status == command_status)).all()
+    query = select(Command).where((Command.device_id == device_id) & (Command.status == command_status))
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+        except CursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.where(after_cursor(Command.created_at, Command.id, position, descending=False))
+
+    commands = (await db.scalars(
+        query.order_by(Command.created_at, Command.id).limit(limit)
+    )).all()
 
+    if len(commands) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(commands[-1].created_at, commands[-1].id)
     return commands
 
 @router.put('/status', status_code=200)
-async def update_command_status(update_command_status: UpdateCommandStatus, db: Session = Depends(get_db)):
+async def update_command_status(update_command_status: UpdateCommandStatus, db: AsyncSession = Depends(get_db)):
     """
     Обновить статус комманды девайса 
     """
-    device = db.query(Device).filter(Device.id == update_command_status.device_id).first()
+    device = await device_cache.get(db, update_command_status.device_id)
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
     
-    command = db.query(Command).filter(Command.id == update_command_status.command_id).first()
+    command = await db.get(Command, update_command_status.command_id)
     if not command:
         raise HTTPException(status_code=404, detail="Command not found")
     
     command.status = update_command_status.new_status
     
     db.add(command)
-    db.commit()
-    db.refresh(command)
+    await db.commit()
+    await db.refresh(command)
 
     return command
 
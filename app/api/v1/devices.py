@@ -1,31 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import Response
-from sqlalchemy import case
-from sqlalchemy.orm import Session
+import asyncio
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import case, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime, timedelta
+from math import ceil
 
+from app.enums.aggregate_function import AggregateFunction
+from app.enums.bucket_size import BucketSize
 from app.enums.device_status import DeviceStatus
+from app.enums.downsample_method import DownsampleMethod
+from app.enums.event_type import EventType
+from app.enums.rollup_resolution import RollupResolution
 from app.enums.sensor_type import SensorType
 from app.enums.timeframe import TimeFrame
-from app.db.session import get_db
+from app.core.config import settings
+from app.db.session import ReadSessionLocal, get_db, get_read_db
 from app.db.redis_client import RedisClient, get_redis
 from app.models.device import Device
 from app.models.device_limits import DeviceValues
-from app.models.sensor_reading import ReadingBase, SensorReading
-from app.models.alert import Alert
-from app.models.command import Command
+from app.models.sensor_reading import ReadingBase, ReadingBatch
+from app.service.anomaly_detector import anomaly_detector
+from app.service.conditional import etag_matches, make_etag, not_modified, set_validators, window_slot
 from app.service.csv_service import export_sensor_readings_to_csv
+from app.service.data_versions import data_versions
+from app.service.device_cache import device_cache
+from app.service.device_stats import delete_device_stats, get_device_counts
+from app.service.downsampling import downsample_readings
+from app.service.event_bus import SlowConsumer, event_bus, field_filter
+from app.service.frame_codec import FRAME_CONTENT_TYPE, FrameDecodeError, FrameTimeError, decode_frames
+from app.service.hot_window import hot_window
+from app.service.ingest_service import IngestQueueFull, ingest_queue, submit_readings
+from app.service.last_seen_tracker import last_seen_tracker
+from app.service.latest_values import latest_values
+from app.service.pagination import CursorError, decode_cursor, encode_cursor
+from app.service.query_cache import query_cache
+from app.service.reading_aggregates import aggregate_readings
+from app.service.reading_query import (
+    choose_resolution,
+    count_readings,
+    delete_device_readings,
+    latest_readings,
+    rollup_series,
+    stream_device_readings,
+)
+from app.service.reading_service import build_reading_rows, write_reading_rows
+from app.service.threshold_engine import threshold_engine
 
 
 router = APIRouter(prefix="/devices", tags=["devices"])
 
+# Количество показаний, читаемых и сериализуемых за один шаг экспорта CSV
+CSV_EXPORT_CHUNK_SIZE = 1000
+
 
 @router.post("/", status_code=201)
 async def create_device(
     name: str,
     location: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Создать новое устройство.
@@ -39,8 +73,9 @@ async def create_device(
         status="active"
     )
     db.add(device)
-    db.commit()
-    db.refresh(device)  # обновить объект с данными из БД (id, created_at)
+    await db.commit()
+    await db.refresh(device)  # обновить объект с данными из БД (id, created_at)
+    device_cache.put(device)
     
     return device
 
@@ -49,7 +84,7 @@ async def create_device(
 async def get_all_devices(
     status: Optional[DeviceStatus] = Query(None, description="Фильтр по статусу"),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получить список всех устройств с фильтрацией.
@@ -58,58 +93,127 @@ async def get_all_devices(
     GET /api/v1/devices
     GET /api/v1/devices?status=online&limit=5
     """
-    query = db.query(Device)
+    query = select(Device)
     
     # Фильтрация
     if status:
-        query = query.filter(Device.status == status)
+        query = query.where(Device.status == status)
     
-    devices = query.limit(limit).all()
+    devices = (await db.scalars(query.limit(limit))).all()
 
-    count_readings = db.query(SensorReading).filter(SensorReading.device_id.in_([d.id for d in devices])).count()
-    count_alerts = db.query(Alert).filter(Alert.device_id.in_([d.id for d in devices])).count()
+    # Счетчики из device_stats: один запрос по первичному ключу вместо COUNT(*)
+    counts = await get_device_counts(db, [d.id for d in devices])
     
     return {
         "total": len(devices),
-        "count_total_readings": count_readings,
-        "count_total_alerts": count_alerts,
+        "count_total_readings": sum(c["readings_count"] for c in counts.values()),
+        "count_total_alerts": sum(c["alerts_count"] for c in counts.values()),
         "devices": [
             {
                 "id": d.id,
                 "name": d.name,
                 "location": d.location,
                 "status": d.status,
-                "last_seen": d.last_seen
+                "last_seen": last_seen_tracker.merge(d.id, d.last_seen)
             }
             for d in devices
         ]
     }
 
 
+@router.get("/latest")
+async def get_latest_values(
+    device_id: Optional[List[str]] = Query(None, description="Только эти устройства"),
+    sensor_type: Optional[List[SensorType]] = Query(None, description="Только эти типы датчиков"),
+    status: Optional[DeviceStatus] = Query(None, description="Фильтр по статусу устройства"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Последние значения датчиков всех (или выбранных) устройств одним запросом.
+    
+    Значения берутся из снимка последних значений, который обновляется
+    при каждой записи показаний, без запросов к показаниям устройств.
+    Устройство без показаний возвращается с пустым values.
+    
+    Пример:
+    GET /api/v1/devices/latest
+    GET /api/v1/devices/latest?sensor_type=temperature&sensor_type=fire&status=online
+    
+    Response:
+    {
+        "count": 1,
+        "devices": [{
+            "device_id": "abc123",
+            "device_name": "Датчик 1",
+            "status": "online",
+            "last_seen": "2025-10-04T12:00:05",
+            "values": {"temperature": {"id": 1042, "value": 23.5, "unit": "°C",
+                                       "timestamp": "2025-10-04T12:00:05"}}
+        }]
+    }
+    """
+    query = select(Device.id, Device.name, Device.status, Device.last_seen).order_by(Device.name)
+    if device_id:
+        query = query.where(Device.id.in_(device_id))
+    if status:
+        query = query.where(Device.status == status)
+    devices = (await db.execute(query)).all()
+    values = await latest_values.get(
+        [device.id for device in devices],
+        sensor_types=[sensor.value for sensor in sensor_type] if sensor_type else None
+    )
+    return {
+        "count": len(devices),
+        "devices": [
+            {
+                "device_id": device.id,
+                "device_name": device.name,
+                "status": device.status,
+                "last_seen": last_seen_tracker.merge(device.id, device.last_seen),
+                "values": values[device.id]
+            }
+            for device in devices
+        ]
+    }
+
+
 @router.get("/{device_id}")
-async def get_device(device_id: str, db: Session = Depends(get_db)):
+async def get_device(
+    device_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
+):
     """
     Получить устройство по ID со связанными данными.
     
+    Ответ содержит ETag (версия данных устройства) и Last-Modified
+    (время последней активности). Запрос с If-None-Match, совпадающим
+    с ETag, получает 304 без тела и без обращения к БД.
+    
     Пример:
     GET /api/v1/devices/550e8400-e29b-41d4-a716-446655440000
     """
-    device = db.query(Device).filter(Device.id == device_id).first()
+    version = await data_versions.version(device_id)
+    etag = make_etag("device", version, {})
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    device = await db.get(Device, device_id)
     
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
     
-    # Используем SQL запросы для подсчета вместо загрузки всех данных
-    readings_count = db.query(SensorReading).filter(SensorReading.device_id == device_id).count()
-    alerts_count = db.query(Alert).filter(Alert.device_id == device_id).count()
-    commands_count = db.query(Command).filter(Command.device_id == device_id).count()
+    # Счетчики из device_stats вместо COUNT(*) по всей истории устройства
+    counts = (await get_device_counts(db, [device_id]))[device_id]
+    last_seen_tracker.merge_into(device)
+    set_validators(response, etag, device.last_seen)
     
     return {
         'device': device,
-        # Связанные данные через relationships
-        "readings_count": readings_count,
-        "alerts_count": alerts_count,
-        "commands_count": commands_count
+        "readings_count": counts["readings_count"],
+        "alerts_count": counts["alerts_count"],
+        "commands_count": counts["commands_count"]
     }
 
 
@@ -121,7 +225,7 @@ async def update_device(
     device_id: str,
     status: Optional[DeviceStatus] = None,
     location: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Обновить данные устройства.
@@ -129,7 +233,7 @@ async def update_device(
     Пример:
     PATCH /api/v1/devices/{id}?status=maintenance&location=Lab
     """
-    device = db.query(Device).filter(Device.id == device_id).first()
+    device = await db.get(Device, device_id)
     
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
@@ -143,8 +247,10 @@ async def update_device(
     device.last_seen = datetime.now()
     
     
-    db.commit()
-    db.refresh(device)
+    await db.commit()
+    await db.refresh(device)
+    device_cache.put(device)
+    await data_versions.bump([device_id])
     
     return device
 
@@ -152,151 +258,503 @@ async def update_device(
 # ============= DELETE (удаление) =============
 
 @router.delete("/{device_id}")
-async def delete_device(device_id: str, db: Session = Depends(get_db)):
+async def delete_device(device_id: str, db: AsyncSession = Depends(get_db)):
     """
-    Удалить устройство (и все связанные записи благодаря cascade).
+    Удалить устройство вместе с показаниями (из всех партиций)
+    и остальными связанными записями (cascade).
     
     Пример:
     DELETE /api/v1/devices/{id}
     """
-    device = db.query(Device).filter(Device.id == device_id).first()
+    device = await db.get(Device, device_id)
     
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
     
     device_name = device.name
-    db.delete(device)
-    db.commit()
+    await delete_device_readings(db, device_id)
+    await delete_device_stats(db, device_id)
+    await db.delete(device)
+    await db.commit()
+    device_cache.invalidate(device_id)
+    await data_versions.bump([device_id])
+    await latest_values.delete(device_id)
+    if hot_window is not None:
+        hot_window.delete(device_id)
+    if threshold_engine is not None:
+        threshold_engine.forget(device_id)
+    if anomaly_detector is not None:
+        anomaly_detector.forget(device_id)
     
     return {"deleted": True, "name": device_name}
 
 
 # ============= СВЯЗАННЫЕ ДАННЫЕ (relationships) =============
 
+async def _submit_readings_or_429(db: AsyncSession, readings: List):
+    """Принять показания, преобразуя переполнение очереди в HTTP 429."""
+    try:
+        return await submit_readings(db, readings)
+    except IngestQueueFull:
+        raise HTTPException(
+            status_code=429,
+            detail="Ingest queue is full, retry later",
+            headers={"Retry-After": str(max(1, ceil(settings.INGEST_FLUSH_INTERVAL)))}
+        )
+
+
 @router.post("/{device_id}/readings")
 async def add_reading(
     create_reading: ReadingBase,
-    db: Session = Depends(get_db)
+    response: Response,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Добавить показание датчика для устройства.
     
+    В режиме отложенной записи (INGEST_MODE=memory|redis) показание
+    ставится в очередь и подтверждается ответом 202 с ID показания.
+    
     Пример:
     POST /api/v1/devices/{id}/readings?sensor_type=temperature&value=23.5&unit=°C
     """
+    if ingest_queue is not None:
+        results, _ = await _submit_readings_or_429(db, [create_reading])
+        if results[0]["status"] == "rejected":
+            raise HTTPException(status_code=404, detail="Device not found")
+        response.status_code = 202
+        return results[0]
+
     # Проверить существование устройства
-    device = db.query(Device).filter(Device.id == create_reading.device_id).first()
-    print(create_reading)
+    device = await device_cache.get(db, create_reading.device_id)
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
     
-    reading = SensorReading(
-        device_id=create_reading.device_id,
-        sensor_type=create_reading.sensor_type,
-        value=create_reading.value,
-        unit=create_reading.unit
-    )
-    db.add(reading)
+    rows, _ = await build_reading_rows(db, [create_reading], {device.id})
+    await write_reading_rows(db, rows)
+
+    return rows[0]
+
+
+@router.post("/readings/batch")
+async def add_readings_batch(
+    batch: ReadingBatch,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Пакетно добавить показания датчиков одного или нескольких устройств.
     
-    # Обновить last_seen устройства
-    device.last_seen = datetime.now()
+    Все показания сохраняются одним INSERT в одной транзакции.
+    Показания неизвестных устройств отклоняются, остальные сохраняются.
+    В режиме отложенной записи показания ставятся в очередь, ответ 202,
+    статус элементов "accepted". При заполненной очереди - 429.
+    
+    Пример:
+    POST /api/v1/devices/readings/batch
+    {
+        "readings": [
+            {"device_id": "abc1", "sensor_type": "temperature", "value": 23.5, "unit": "°C",
+             "timestamp": "2025-10-04T12:00:00"},
+            {"device_id": "abc1", "sensor_type": "humidity", "value": 41.0, "unit": "%"}
+        ]
+    }
+    
+    Response:
+    {
+        "accepted": 2,
+        "rejected": 0,
+        "results": [
+            {"index": 0, "status": "created", "id": "..."},
+            {"index": 1, "status": "created", "id": "..."}
+        ]
+    }
+    """
+    results, queued = await _submit_readings_or_429(db, batch.readings)
+    if queued:
+        response.status_code = 202
+    accepted = sum(1 for r in results if r["status"] != "rejected")
     
-    db.commit()
-    db.refresh(reading)
+    return {
+        "accepted": accepted,
+        "rejected": len(results) - accepted,
+        "results": results
+    }
+
+
+@router.post(
+    "/readings/binary",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {FRAME_CONTENT_TYPE: {"schema": {"type": "string", "format": "binary"}}}
+        }
+    }
+)
+async def add_readings_binary(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Пакетно добавить показания в компактном бинарном формате.
+    
+    Предназначен для микроконтроллеров: тело запроса - один или несколько
+    кадров с заголовком (ID устройства, время отправки) и 9-байтовыми
+    записями (код датчика, возраст показания в мс, float32 значение).
+    Формат описан в app/service/frame_codec.py. Кадры разбираются без
+    Pydantic валидации и передаются в тот же путь пакетной записи,
+    что и POST /readings/batch.
+    
+    Пример:
+    POST /api/v1/devices/readings/binary
+    Content-Type: application/x-sensor-frame
     
-    return reading
+    Response:
+    {"accepted": 24, "rejected": 0, "rejected_devices": []}
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type != FRAME_CONTENT_TYPE:
+        raise HTTPException(status_code=415, detail=f"Content-Type must be {FRAME_CONTENT_TYPE}")
+    
+    try:
+        readings = decode_frames(await request.body(), max_readings=settings.READINGS_BATCH_MAX_SIZE)
+    except FrameTimeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except FrameDecodeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    results, queued = await _submit_readings_or_429(db, readings)
+    if queued:
+        response.status_code = 202
+    rejected_devices = {readings[r["index"]].device_id for r in results if r["status"] == "rejected"}
+    
+    # Ответ без результатов по элементам: устройству важен только итог
+    return {
+        "accepted": len(results) - sum(1 for r in results if r["status"] == "rejected"),
+        "rejected": sum(1 for r in results if r["status"] == "rejected"),
+        "rejected_devices": sorted(rejected_devices)
+    }
 
 
 @router.get("/{device_id}/readings")
 async def get_device_readings(
     device_id: str,
+    response: Response,
     limit: int = Query(10, ge=1, le=1000),
     sensor_type: Optional[SensorType] = Query(None, description="Фильтр по типу датчика"),
     timeframe: Optional[TimeFrame] = Query(None, description="Временной интервал"),
-    db: Session = Depends(get_db)
+    resolution: Optional[RollupResolution] = Query(
+        None, description="Разрешение агрегатов (по умолчанию выбирается по timeframe)"
+    ),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor)"),
+    include_total: bool = Query(True, description="Считать total на первой странице"),
+    max_points: Optional[int] = Query(
+        None, ge=3, le=5000, description="Прореживание: максимальное количество точек на тип датчика"
+    ),
+    downsample: DownsampleMethod = Query(DownsampleMethod.MINMAX, description="Метод прореживания"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получить последние показания датчиков устройства.
     
+    Показания отдаются страницами от новых к старым. Если страница
+    заполнена (limit показаний), ответ содержит next_cursor: следующая страница
+    запрашивается с cursor=next_cursor и читается по индексу с позиции
+    последнего показания, поэтому глубокие страницы не дороже первой.
+    Точное количество (total) считается только для первой страницы
+    и требует просмотра всех показаний интервала; include_total=false
+    отключает его (total = null). На страницах с cursor total = null.
+    
+    Интервалы timeframe от ROLLUP_MIN_WINDOW_HOURS (7d, 30d) отдаются
+    из агрегатов: самое подробное разрешение (1m, 1h, 1d), при котором
+    весь интервал помещается в limit точек на тип датчика. Точка агрегата
+    содержит среднее (value), min, max, count и последнее значение (last),
+    timestamp - начало интервала агрегата, total - количество показаний
+    в агрегатах. Параметр resolution задает разрешение явно. Ответ
+    агрегатами не разбивается на страницы (next_cursor = null).
+    
+    Короткие интервалы (не длиннее HOT_WINDOW_HOURS) отдаются из горячего
+    окна показаний в памяти без обращения к БД.
+    
+    max_points (вместе с timeframe) возвращает весь интервал сырых показаний,
+    прореженный до max_points точек на тип датчика, для графиков: выбираются
+    реальные показания, а не средние. downsample=minmax (по умолчанию)
+    берет минимум и максимум каждого интервала времени, поэтому выбросы
+    и пересечения порогов не пропадают; downsample=lttb лучше передает
+    форму кривой. total - количество показаний в интервале. Прореживание
+    не сочетается с resolution и cursor.
+    
+    Ответ содержит ETag (версия данных устройства и параметры запроса;
+    для timeframe меняется и раз в QUERY_CACHE_TTL секунд вместе со сдвигом
+    окна) и Last-Modified (время последнего показания устройства). Запрос
+    с If-None-Match, совпадающим с ETag, получает 304 без тела и без
+    обращения к показаниям.
+    
     Пример:
     GET /api/v1/devices/{id}/readings?limit=20
+    GET /api/v1/devices/{id}/readings?limit=100&cursor=WyIyMDI1LTEwLTA0VDEyOjAwOjAwIiwgMTA0Ml0
+    GET /api/v1/devices/{id}/readings?limit=1000&timeframe=30d
+    GET /api/v1/devices/{id}/readings?timeframe=24h&max_points=800&downsample=lttb
     """
-    device = db.query(Device).filter(Device.id == device_id).first()
+    device = await device_cache.get(db, device_id)
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
+    try:
+        position = decode_cursor(cursor, int) if cursor else None
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # Строим SQL запрос вместо загрузки всех данных в память
-    query = db.query(SensorReading).filter(SensorReading.device_id == device_id)
-    
-    # Фильтр по типу датчика
-    if sensor_type:
-        query = query.filter(SensorReading.sensor_type == sensor_type)
-
-    # Фильтр по времени
+    # Фильтр по времени: читаются только партиции, пересекающиеся с интервалом
+    cutoff_time = None
     if timeframe:
-        time_delta = None
-        match timeframe:
-            case TimeFrame.ONE_HOUR:
-                time_delta = timedelta(hours=1)
-            case TimeFrame.THREE_HOURS:
-                time_delta = timedelta(hours=3)
-            case TimeFrame.SIX_HOURS:
-                time_delta = timedelta(hours=6)
-            case TimeFrame.EIGHT_HOURS:
-                time_delta = timedelta(hours=8)
-            case TimeFrame.TWELVE_HOURS:
-                time_delta = timedelta(hours=12)
-            case TimeFrame.ONE_DAY:
-                time_delta = timedelta(days=1)
-            case TimeFrame.SEVEN_DAYS:
-                time_delta = timedelta(days=7)
-            case TimeFrame.THIRTY_DAYS:
-                time_delta = timedelta(days=30)
-            case _:
-                raise HTTPException(status_code=400, detail="Invalid timeframe")
-        
-        if time_delta:
-            cutoff_time = datetime.now() - time_delta
-            query = query.filter(SensorReading.timestamp >= cutoff_time)
+        time_delta = timeframe.delta
+        cutoff_time = datetime.now() - time_delta
+
+    if resolution and not timeframe:
+        raise HTTPException(status_code=400, detail="resolution requires timeframe")
+    if resolution and cursor:
+        raise HTTPException(status_code=400, detail="cursor is not supported with resolution")
+    if max_points:
+        if not timeframe:
+            raise HTTPException(status_code=400, detail="max_points requires timeframe")
+        if resolution or cursor:
+            raise HTTPException(status_code=400, detail="max_points is not supported with resolution or cursor")
+    # Курсор выдается только для сырых показаний: его страницы не переключаются на агрегаты
+    elif timeframe and not resolution and not cursor and time_delta >= timedelta(hours=settings.ROLLUP_MIN_WINDOW_HOURS):
+        resolution = choose_resolution(time_delta, limit)
+
+    async def load_readings():
+        if max_points:
+            total_count, readings = await downsample_readings(
+                db, device_id, cutoff_time, max_points, downsample, sensor_type=sensor_type
+            )
+            return {
+                "device_id": device_id,
+                "device_name": device.name,
+                "resolution": "raw",
+                "downsample": downsample.value,
+                "total": total_count,
+                "returned": len(readings),
+                "next_cursor": None,
+                "readings": [
+                    {
+                        "id": r.id,
+                        "sensor_type": r.sensor_type,
+                        "value": r.value,
+                        "unit": r.unit,
+                        "timestamp": r.timestamp
+                    }
+                    for r in readings
+                ]
+            }
+        if resolution:
+            readings = await rollup_series(
+                db, device_id, resolution, cutoff_time, sensor_type=sensor_type, limit=limit
+            )
+            return {
+                "device_id": device_id,
+                "device_name": device.name,
+                "resolution": resolution.value,
+                "total": sum(point["count"] for point in readings),
+                "returned": len(readings),
+                "next_cursor": None,
+                "readings": readings
+            }
+
+        # Короткий интервал целиком в горячем окне: показания и total без обращения к БД
+        hot = None
+        if hot_window is not None:
+            hot = hot_window.latest(device_id, limit, sensor_type=sensor_type, since=cutoff_time, before=position)
+        if hot is not None:
+            total_count, readings = hot
+            if not include_total or cursor:
+                total_count = None
+        else:
+            # Общее количество записей (без limit) - только для первой страницы
+            total_count = None
+            if include_total and not cursor:
+                total_count = await count_readings(db, [device_id], sensor_type=sensor_type, since=cutoff_time)
+
+            # Последние первыми, с ограничением limit
+            readings = await latest_readings(
+                db, device_id, limit, sensor_type=sensor_type, since=cutoff_time, before=position
+            )
+
+        return {
+            "device_id": device_id,
+            "device_name": device.name,
+            "resolution": "raw",
+            "total": total_count,
+            "returned": len(readings),
+            "next_cursor": encode_cursor(readings[-1].timestamp, readings[-1].id) if len(readings) == limit else None,
+            "readings": [
+                {
+                    "id": r.id,
+                    "sensor_type": r.sensor_type,
+                    "value": r.value,
+                    "unit": r.unit,
+                    "timestamp": r.timestamp
+                }
+                for r in readings
+            ]
+        }
+
+    params = {
+        "limit": limit,
+        "sensor_type": sensor_type,
+        "timeframe": timeframe,
+        "resolution": resolution,
+        "cursor": cursor,
+        "include_total": include_total,
+        "max_points": max_points,
+        "downsample": downsample if max_points else None,
+        # Окно от текущего момента сдвигается без изменения данных
+        "window": window_slot() if timeframe else None,
+    }
+    version = await data_versions.version(device_id)
+    etag = make_etag("readings", version, params)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    # Результат кэшируется до следующего изменения данных устройства (не дольше QUERY_CACHE_TTL)
+    result = await query_cache.get_or_compute("readings", device_id, params, load_readings, version=version)
+    latest = (await latest_values.get([device_id], [sensor_type.value] if sensor_type else None))[device_id]
+    set_validators(response, etag, max((value["timestamp"] for value in latest.values()), default=None))
+    return result
 
-    # Получаем общее количество записей (без limit)
-    total_count = query.count()
+
+@router.get("/{device_id}/readings/aggregate")
+async def get_device_readings_aggregate(
+    device_id: str,
+    timeframe: TimeFrame = Query(TimeFrame.ONE_DAY, description="Временной интервал"),
+    bucket: BucketSize = Query(BucketSize.ONE_HOUR, description="Размер интервала агрегации"),
+    aggregates: List[AggregateFunction] = Query(
+        [AggregateFunction.MIN, AggregateFunction.MAX, AggregateFunction.MEAN, AggregateFunction.COUNT],
+        description="Статистики (min, max, mean, p50, p95, count, stddev)"
+    ),
+    sensor_type: Optional[SensorType] = Query(None, description="Фильтр по типу датчика"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Статистики показаний устройства по интервалам времени для графиков.
+    
+    Показания за timeframe группируются в бакеты размера bucket отдельно
+    для каждого типа датчика; для каждого бакета возвращаются запрошенные
+    статистики. Размер ответа зависит от количества бакетов, а не от
+    количества показаний (не больше AGGREGATE_MAX_BUCKETS бакетов).
+    
+    min, max, mean и count считаются по агрегатам reading_rollups
+    (source - разрешение агрегатов) и доступны за весь срок их хранения.
+    p50, p95 и stddev считаются по сырым показаниям (source = "raw"),
+    которые хранятся RETENTION_RAW_DAYS дней.
     
-    # Сортируем по времени (последние первыми) и применяем limit
-    readings = query.order_by(SensorReading.timestamp.desc()).limit(limit).all()
+    Пример:
+    GET /api/v1/devices/{id}/readings/aggregate?timeframe=24h&bucket=15m&aggregates=mean&aggregates=p95
+    
+    Response:
+    {
+        "device_id": "abc123",
+        "timeframe": "24h",
+        "bucket": "15m",
+        "source": "raw",
+        "series": {
+            "temperature": [{"timestamp": "2025-10-04T12:00:00", "mean": 23.4, "p95": 24.8}, ...]
+        }
+    }
+    """
+    device = await device_cache.get(db, device_id)
+    if not device:
+        raise HTTPException(status_code=404, detail="Device not found")
+    if timeframe.delta // timedelta(milliseconds=bucket.millis) > settings.AGGREGATE_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many buckets: use a larger bucket (max {settings.AGGREGATE_MAX_BUCKETS} per sensor type)"
+        )
+
+    functions = list(dict.fromkeys(aggregates))
+
+    async def load_aggregates():
+        source, series = await aggregate_readings(
+            db, device_id, datetime.now() - timeframe.delta, bucket, functions, sensor_type=sensor_type
+        )
+        return {
+            "device_id": device_id,
+            "device_name": device.name,
+            "timeframe": timeframe.value,
+            "bucket": bucket.value,
+            "source": source,
+            "aggregates": [function.value for function in functions],
+            "series": series
+        }
+
+    params = {
+        "timeframe": timeframe,
+        "bucket": bucket,
+        "aggregates": functions,
+        "sensor_type": sensor_type,
+        # Окно от текущего момента сдвигается без изменения данных
+        "window": window_slot(),
+    }
+    version = await data_versions.version(device_id)
+    # Результат кэшируется до следующего изменения данных устройства (не дольше QUERY_CACHE_TTL)
+    return await query_cache.get_or_compute("aggregate", device_id, params, load_aggregates, version=version)
+
 
+@router.get("/{device_id}/anomalies")
+async def get_device_anomalies(device_id: str, db: AsyncSession = Depends(get_read_db)):
+    """
+    Текущие оценки детектора аномалий по датчикам устройства.
+    
+    Для каждого типа датчика: EWMA среднее (mean) и стандартное отклонение
+    (std), z-score последнего показания (score), скорость изменения (rate,
+    единиц в секунду), признак аномалии и количество учтенных показаний.
+    Оценки обновляются при каждой записи показаний без обращения к БД.
+    
+    Пример:
+    GET /api/v1/devices/{id}/anomalies
+    
+    Response:
+    {
+        "device_id": "abc123",
+        "z_threshold": 4.0,
+        "sensors": {
+            "temperature": {"mean": 23.1, "std": 0.4, "score": 0.8, "rate": 0.01,
+                            "anomalous": false, "count": 86400, "last_value": 23.4,
+                            "timestamp": "2025-10-04T12:00:05"}
+        }
+    }
+    """
+    if anomaly_detector is None:
+        raise HTTPException(status_code=503, detail="Anomaly detection is disabled")
+    device = await device_cache.get(db, device_id)
+    if not device:
+        raise HTTPException(status_code=404, detail="Device not found")
     return {
         "device_id": device_id,
         "device_name": device.name,
-        "total": total_count,
-        "returned": len(readings),
-        "readings": [
-            {
-                "id": r.id,
-                "sensor_type": r.sensor_type,
-                "value": r.value,
-                "unit": r.unit,
-                "timestamp": r.timestamp
-            }
-            for r in readings
-        ]
+        "z_threshold": anomaly_detector.z_threshold,
+        "sensors": anomaly_detector.scores(device_id)
     }
 
 
 @router.post("/{device_id}/values", status_code=200)
 async def set_device_values(
     values: DeviceValues,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     redis: RedisClient = Depends(get_redis)
 ):
     """
     Установить значения устройства в Redis.
     
     Значения сохраняются в Redis для быстрого доступа и используются
-    устройствами для получения текущих настроек.
+    устройствами для получения текущих настроек. Лимиты temperature_limit,
+    humidity_limit и fire_limit сразу применяются к проверке принимаемых
+    показаний: превышение создает оповещение.
     """
     # Проверяем существование устройства в БД
-    device = db.query(Device).filter(Device.id == values.device_id).first()
+    device = await device_cache.get(db, values.device_id)
   
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
@@ -317,6 +775,11 @@ async def set_device_values(
     
     if not success:
         raise HTTPException(status_code=500, detail="Failed to save device values to Redis")
+    # Новые пороги применяются к следующему показанию без обращения к Redis
+    if threshold_engine is not None:
+        threshold_engine.set_limits(values.device_id, device_values)
+    await data_versions.bump([values.device_id])
+    event_bus.publish(EventType.VALUES, values.device_id, {"values": device_values})
     
     return {
         "success": True,
@@ -329,13 +792,17 @@ async def set_device_values(
 @router.get("/{device_id}/values", status_code=200)
 async def get_device_values(
     device_id: str,
-    db: Session = Depends(get_db),
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
     redis: RedisClient = Depends(get_redis)
 ):
     """
     Получить текущие значения устройства из Redis.
     
     Возвращает все сохраненные настройки устройства (лимиты и позиции).
+    Ответ содержит ETag (версия данных устройства); запрос с совпадающим
+    If-None-Match получает 304 без тела и без обращения к Redis за значениями.
     
     Example:
         GET /api/v1/devices/550e8400-e29b-41d4-a716-446655440000/values
@@ -353,11 +820,17 @@ async def get_device_values(
         }
     """
     # Проверяем существование устройства в БД
-    device = db.query(Device).filter(Device.id == device_id).first()
+    device = await device_cache.get(db, device_id)
     
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
     
+    version = await data_versions.version(device_id)
+    etag = make_etag("values", version, {})
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_validators(response, etag)
+    
     # Получаем значения из Redis
     device_values = redis.get_device_values(device_id)
     
@@ -372,10 +845,80 @@ async def get_device_values(
     }
 
 
+@router.websocket("/{device_id}/live")
+async def live_device_stream(
+    websocket: WebSocket,
+    device_id: str,
+    sensor_type: Optional[List[SensorType]] = Query(None, description="Фильтр показаний по типу датчика"),
+    event: Optional[List[EventType]] = Query(None, description="Фильтр по типу события")
+):
+    """
+    Поток событий устройства в реальном времени.
+    
+    После подключения сервер отправляет JSON сообщение на каждое событие,
+    записанное в БД: новое показание, оповещение, изменение значений:
+    {"id": 17, "event": "reading", "device_id": "...", "data": {...}}
+    
+    Фильтры можно изменить без переподключения, отправив сообщение
+    {"sensor_type": ["temperature"], "event": ["reading", "alert"]}.
+    
+    Если клиент не успевает читать события, старые события отбрасываются,
+    а клиент получает {"event": "dropped", "count": N} и должен перечитать
+    историю через REST. При слишком большом отставании соединение
+    закрывается с кодом 1013.
+    
+    Пример:
+    ws://localhost:8000/api/v1/devices/{id}/live?sensor_type=temperature
+    """
+    # Сессия открывается только на проверку устройства: соединение
+    # живет долго и не должно удерживать соединение пула БД
+    async with ReadSessionLocal() as db:
+        device = await device_cache.get(db, device_id)
+    await websocket.accept()
+    if not device:
+        await websocket.close(code=4404, reason="Device not found")
+        return
+
+    subscription = event_bus.subscribe(device_id, field_filter(event, sensor_type=sensor_type))
+
+    async def send_events():
+        while True:
+            events, dropped = await subscription.get()
+            if dropped:
+                await websocket.send_json({"event": "dropped", "count": dropped})
+            for bus_event in events:
+                await websocket.send_text(bus_event.to_json())
+
+    async def receive_filters():
+        while True:
+            try:
+                message = await websocket.receive_json()
+                subscription.accept = field_filter(
+                    [EventType(e) for e in message.get("event") or []],
+                    sensor_type=[SensorType(t) for t in message.get("sensor_type") or []]
+                )
+            except (AttributeError, TypeError, ValueError):
+                await websocket.send_json({"event": "error", "detail": "Invalid filter"})
+
+    tasks = [asyncio.create_task(send_events()), asyncio.create_task(receive_filters())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        error = next(iter(done)).exception()
+        if isinstance(error, SlowConsumer):
+            await websocket.close(code=1013, reason="Slow consumer")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        event_bus.unsubscribe(subscription)
+
+
 @router.get("/{device_id}/sensor-readings/export/csv")
 async def export_device_sensor_readings_csv(
     device_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Экспортировать все показания датчиков устройства в CSV формате.
@@ -388,7 +931,7 @@ async def export_device_sensor_readings_csv(
         db: Сессия базы данных
     
     Returns:
-        Response: CSV файл с MIME типом text/csv
+        StreamingResponse: CSV файл с MIME типом text/csv, передаваемый порциями
         
     Raises:
         HTTPException 404: Если устройство не найдено
@@ -401,22 +944,27 @@ async def export_device_sensor_readings_csv(
         Content-Disposition: attachment; filename="device_{device_id}_sensor_readings.csv"
     """
     # Проверяем существование устройства
-    device = db.query(Device).filter(Device.id == device_id).first()
+    device = await device_cache.get(db, device_id)
     
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
     
-    # Получаем все показания датчиков для данного устройства
-    readings = db.query(SensorReading).filter(
-        SensorReading.device_id == device_id
-    ).order_by(SensorReading.timestamp.desc()).all()
-    
-    # Экспортируем в CSV
-    csv_content = export_sensor_readings_to_csv(readings)
+    async def generate_csv():
+        # Отдельная сессия живет, пока ответ передается клиенту.
+        # Показания читаются порциями, а форматирование CSV выполняется
+        # в пуле потоков, поэтому большой экспорт не держит все строки
+        # в памяти и не блокирует event loop для остальных запросов.
+        async with ReadSessionLocal() as session:
+            include_header = True
+            async for readings in stream_device_readings(session, device_id, CSV_EXPORT_CHUNK_SIZE):
+                yield await asyncio.to_thread(export_sensor_readings_to_csv, readings, include_header)
+                include_header = False
+            if include_header:
+                yield export_sensor_readings_to_csv([])
     
     # Возвращаем как файл для скачивания
-    return Response(
-        content=csv_content,
+    return StreamingResponse(
+        generate_csv(),
         media_type="text/csv; charset=utf-8",
         headers={
             "Content-Disposition": f'attachment; filename="device_{device_id}_sensor_readings.csv"'
@@ -0,0 +1,163 @@
+from fastapi import APIRouter
+
+from app.core.config import settings
+from app.service.anomaly_detector import anomaly_detector
+from app.service.device_cache import device_cache
+from app.service.device_stats import device_stats_reconciler
+from app.service.event_bus import event_bus
+from app.service.hot_window import hot_window
+from app.service.ingest_service import ingest_queue
+from app.service.last_seen_tracker import last_seen_tracker
+from app.service.latest_values import latest_values
+from app.service.query_cache import query_cache
+from app.service.retention_service import retention_job
+from app.service.rollup_engine import rollup_engine
+from app.service.threshold_engine import threshold_engine
+from app.service.udp_gateway import udp_gateway
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/ingest")
+async def get_ingest_metrics():
+    """
+    Метрики приема показаний: глубина очереди, задержка фоновой записи,
+    отложенная запись last_seen устройств и агрегатов показаний.
+    
+    Пример:
+    GET /api/v1/metrics/ingest
+    """
+    if ingest_queue is None:
+        metrics = {"mode": settings.INGEST_MODE, "queue_depth": 0}
+    else:
+        metrics = await ingest_queue.stats()
+    metrics["last_seen"] = last_seen_tracker.stats()
+    metrics["rollups"] = rollup_engine.stats()
+    return metrics
+
+
+@router.get("/udp")
+async def get_udp_metrics():
+    """
+    Счетчики UDP шлюза: принятые, отброшенные и некорректные датаграммы.
+    
+    Пример:
+    GET /api/v1/metrics/udp
+    """
+    if udp_gateway is None:
+        return {"enabled": False}
+    return udp_gateway.stats()
+
+
+@router.get("/retention")
+async def get_retention_metrics():
+    """
+    Политики хранения и итог последнего запуска задачи хранения:
+    удаленные партиции, показания и агрегаты, освобожденные страницы.
+    
+    Пример:
+    GET /api/v1/metrics/retention
+    """
+    if retention_job is None:
+        return {"enabled": False}
+    return retention_job.stats()
+
+
+@router.get("/live")
+async def get_live_metrics():
+    """
+    Счетчики шины событий: подписчики, опубликованные и отброшенные события.
+    
+    Пример:
+    GET /api/v1/metrics/live
+    """
+    return event_bus.stats()
+
+
+@router.get("/device-cache")
+async def get_device_cache_metrics():
+    """
+    Метрики кэша устройств: размер, попадания и промахи.
+    
+    Пример:
+    GET /api/v1/metrics/device-cache
+    """
+    return device_cache.stats()
+
+
+@router.get("/device-stats")
+async def get_device_stats_metrics():
+    """
+    Сверка счетчиков устройств (device_stats): проверенные устройства
+    и исправленные расхождения.
+    
+    Пример:
+    GET /api/v1/metrics/device-stats
+    """
+    return device_stats_reconciler.stats()
+
+
+@router.get("/latest-values")
+async def get_latest_values_metrics():
+    """
+    Снимок последних значений датчиков: размер, доступность Redis
+    и чтения из копии в памяти.
+    
+    Пример:
+    GET /api/v1/metrics/latest-values
+    """
+    return latest_values.stats()
+
+
+@router.get("/hot-window")
+async def get_hot_window_metrics():
+    """
+    Горячее окно показаний: потоки и объем буферов в памяти,
+    вытеснения и доля запросов, отвеченных без БД.
+    
+    Пример:
+    GET /api/v1/metrics/hot-window
+    """
+    if hot_window is None:
+        return {"enabled": False}
+    return hot_window.stats()
+
+
+@router.get("/thresholds")
+async def get_threshold_metrics():
+    """
+    Проверка показаний по порогам устройств: проверенные показания,
+    созданные оповещения и потоки с превышенным порогом.
+    
+    Пример:
+    GET /api/v1/metrics/thresholds
+    """
+    if threshold_engine is None:
+        return {"enabled": False}
+    return threshold_engine.stats()
+
+
+@router.get("/anomalies")
+async def get_anomaly_metrics():
+    """
+    Детектор аномалий: количество потоков, объем состояния,
+    аномальные потоки и созданные оповещения.
+    
+    Пример:
+    GET /api/v1/metrics/anomalies
+    """
+    if anomaly_detector is None:
+        return {"enabled": False}
+    return anomaly_detector.stats()
+
+
+@router.get("/query-cache")
+async def get_query_cache_metrics():
+    """
+    Кэш результатов запросов: размер, попадания (в памяти процесса
+    и в Redis), доля попаданий и увеличения версий данных устройств.
+    
+    Пример:
+    GET /api/v1/metrics/query-cache
+    """
+    return query_cache.stats()
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
@@ -8,9 +9,9 @@ from app.models import User
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-async def get_user(db: Session, user_id: str):
+async def get_user(db: AsyncSession, user_id: str):
     """Получить пользователя по ID"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
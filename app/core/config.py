@@ -24,6 +24,114 @@ class Settings(BaseSettings):
         DEBUG (bool): Режим отладки (по умолчанию True)
         DATABASE_URL (str): URL подключения к базе данных
                            (по умолчанию "sqlite:///./test.db")
+        SQLITE_PROFILE (str): Профиль хранения SQLite: "default" или "production"
+                              (WAL, одно соединение на запись, пул чтения)
+        SQLITE_READ_POOL_SIZE (int): Размер пула соединений только для чтения
+        SQLITE_WRITE_TIMEOUT (float): Сколько секунд запрос ждет соединение на запись
+        SQLITE_CACHE_SIZE_KB (int): Размер кэша страниц на соединение, КБ
+        SQLITE_MMAP_SIZE (int): Размер memory-mapped I/O, байты
+        SQLITE_BUSY_TIMEOUT_MS (int): Ожидание блокировки файла БД, мс
+        READINGS_BATCH_MAX_SIZE (int): Максимальное количество показаний
+                                       в одном пакете (по умолчанию 5000)
+        READING_MAX_FUTURE_SKEW (float): На сколько секунд время показания может
+                                         опережать часы сервера
+        READING_MAX_AGE_DAYS (int): Показания старше стольких дней отклоняются
+                                    (при включенном удалении - не старше
+                                    RETENTION_RAW_DAYS)
+        INGEST_MODE (str): Режим записи показаний: "sync" - в рамках запроса,
+                           "memory"/"redis" - отложенная запись через очередь
+        INGEST_QUEUE_MAX_SIZE (int): Глубина очереди, после которой прием
+                                     отвечает 429
+        INGEST_FLUSH_BATCH_SIZE (int): Размер пакета фоновой записи в БД
+        INGEST_FLUSH_INTERVAL (float): Максимальная задержка записи пакета, секунды
+        INGEST_REDIS_STREAM (str): Имя Redis stream для режима "redis"
+        INGEST_REDIS_CLAIM_IDLE (float): Через сколько секунд без подтверждения
+                                         записи stream другого потребителя (например,
+                                         завершившегося процесса) перечитываются
+        INGEST_STOP_RETRIES (int): Сколько раз подряд flusher повторяет неудачную
+                                   запись при остановке приложения, прежде чем
+                                   завершиться с незаписанными показаниями
+        LAST_SEEN_FLUSH_INTERVAL (float): Период пакетной записи last_seen
+                                          устройств в БД, секунды
+        READING_ID_BLOCK_SIZE (int): Сколько ID показаний процесс резервирует
+                                     в БД за одно обращение
+        ROLLUP_FLUSH_INTERVAL (float): Период записи накопленных агрегатов
+                                       показаний в БД, секунды
+        ROLLUP_MIN_WINDOW_HOURS (float): Интервал timeframe, начиная с которого
+                                         показания отдаются из агрегатов, часы
+        AGGREGATE_MAX_BUCKETS (int): Максимальное количество бакетов в ответе агрегации
+        RETENTION_ENABLED (bool): Запускать периодическое удаление устаревших данных
+                                  (по умолчанию выключено: данные удаляются
+                                  только после явного включения)
+        RETENTION_RAW_DAYS (int): Сколько дней хранятся сырые показания (0 - всегда)
+        RETENTION_ROLLUP_1M_DAYS (int): Сколько дней хранятся минутные агрегаты (0 - всегда)
+        RETENTION_ROLLUP_1H_DAYS (int): Сколько дней хранятся часовые агрегаты (0 - всегда)
+        RETENTION_ROLLUP_1D_DAYS (int): Сколько дней хранятся суточные агрегаты (0 - всегда)
+        RETENTION_INTERVAL (float): Период запуска удаления устаревших данных, секунды
+        RETENTION_BATCH_SIZE (int): Строк в одной транзакции удаления
+        RETENTION_BATCH_PAUSE (float): Пауза между транзакциями удаления, секунды
+        RETENTION_VACUUM_PAGES (int): Страниц, освобождаемых одним incremental_vacuum
+        DEVICE_STATS_RECONCILE_INTERVAL (float): Период сверки счетчиков устройств, секунды
+        DEVICE_STATS_RECONCILE_PAUSE (float): Пауза между устройствами при сверке, секунды
+        LATEST_VALUES_REDIS (bool): Хранить снимок последних значений датчиков в Redis
+                                    (иначе только в памяти процесса)
+        LATEST_VALUES_REDIS_RETRY (float): Пауза перед повторным обращением
+                                           к Redis после ошибки, секунды
+        LATEST_VALUES_WARM_DAYS (int): За сколько дней показания загружаются
+                                       в снимок при запуске
+        HOT_WINDOW_ENABLED (bool): Хранить последние показания в памяти процесса
+                                   и отвечать на короткие интервалы без БД
+                                   (по умолчанию выключено; только при одном
+                                   процессе, который сам принимает все показания)
+        HOT_WINDOW_HOURS (float): Длительность горячего окна, часы
+        HOT_WINDOW_CAPACITY (int): Максимум показаний в буфере одного потока
+                                   (устройство, тип датчика)
+        HOT_WINDOW_MAX_BYTES (int): Максимальный объем буферов горячего окна, байты
+        THRESHOLD_ALERTS_ENABLED (bool): Создавать оповещения при превышении порогов
+                                         устройства (temperature_limit, humidity_limit, fire_limit),
+                                         по умолчанию выключено
+        THRESHOLD_HYSTERESIS (float): Доля порога, на которую значение должно
+                                      опуститься ниже порога до следующего оповещения
+        THRESHOLD_LIMITS_TTL (float): Время жизни порогов устройств в кэше, секунды
+        ANOMALY_ENABLED (bool): Оценивать показания детектором аномалий (EWMA / z-score),
+                                по умолчанию выключено
+        ANOMALY_ALPHA (float): Коэффициент сглаживания EWMA
+        ANOMALY_Z_THRESHOLD (float): |z|, начиная с которого показание аномально
+        ANOMALY_MIN_STD (float): Нижняя граница стандартного отклонения для z-score
+        ANOMALY_WARMUP (int): Показаний потока до начала оценки
+        ANOMALY_BACKFILL_HOURS (float): За сколько часов показания восстанавливают
+                                        состояние детектора при запуске
+        DATA_VERSIONS_REDIS (bool): Хранить версии данных устройств в Redis
+                                    (общие для всех процессов приложения; пока
+                                    Redis недоступен, кэш результатов и ETag
+                                    не используются). False - версии в памяти,
+                                    только при одном процессе приложения
+        DATA_VERSIONS_REDIS_RETRY (float): Пауза перед повторным обращением к Redis
+                                           за версиями после ошибки, секунды
+        QUERY_CACHE_ENABLED (bool): Кэшировать результаты запросов показаний и оповещений
+        QUERY_CACHE_SIZE (int): Максимальное количество результатов в кэше процесса
+        QUERY_CACHE_TTL (float): Время жизни результата в кэше, секунды
+                                 (ограничивает сдвиг окон timeframe относительно now)
+        QUERY_CACHE_REDIS (bool): Дополнительно хранить результаты в Redis
+                                  (общий кэш для всех процессов приложения)
+        DEVICE_CACHE_SIZE (int): Максимальное количество устройств в кэше
+        DEVICE_CACHE_TTL (float): Время жизни записи устройства в кэше, секунды
+        DEVICE_CACHE_NEGATIVE_TTL (float): Время жизни записи о несуществующем
+                                           устройстве, секунды
+        UDP_ENABLED (bool): Запускать UDP шлюз приема показаний
+        UDP_HOST (str): Адрес UDP шлюза
+        UDP_PORT (int): Порт UDP шлюза
+        UDP_QUEUE_MAX_SIZE (int): Датаграмм в очереди шлюза, после которой
+                                  новые датаграммы отбрасываются
+        UDP_DEVICE_REFRESH_INTERVAL (float): Период обновления списка
+                                             известных устройств, секунды
+        LIVE_SUBSCRIBER_QUEUE_SIZE (int): Очередь событий одного подписчика
+                                          потока реального времени
+        LIVE_MAX_DROPPED (int): Сколько событий подряд может пропустить
+                                подписчик до отключения как медленного
+        ALERT_STREAM_REPLAY_SIZE (int): Сколько последних событий оповещений
+                                        хранится для повтора по Last-Event-ID
+        ALERT_STREAM_KEEPALIVE (float): Период keep-alive комментариев SSE, секунды
         
     Config:
         env_file (str): Путь к .env файлу с настройками
@@ -60,6 +168,98 @@ class Settings(BaseSettings):
     REDIS_PASSWORD: str | None = None
     REDIS_DECODE_RESPONSES: bool = True
 
+    # SQLite storage profile
+    SQLITE_PROFILE: str = "default"  # default | production
+    SQLITE_READ_POOL_SIZE: int = 8
+    SQLITE_WRITE_TIMEOUT: float = 30.0
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+
+    # Ingestion settings
+    READINGS_BATCH_MAX_SIZE: int = 5000
+    READING_MAX_FUTURE_SKEW: float = 300.0
+    READING_MAX_AGE_DAYS: int = 31
+    INGEST_MODE: str = "sync"  # sync | memory | redis
+    INGEST_QUEUE_MAX_SIZE: int = 100000
+    INGEST_FLUSH_BATCH_SIZE: int = 1000
+    INGEST_FLUSH_INTERVAL: float = 0.5
+    INGEST_REDIS_STREAM: str = "readings:ingest"
+    INGEST_REDIS_CLAIM_IDLE: float = 60.0
+    INGEST_STOP_RETRIES: int = 3
+    LAST_SEEN_FLUSH_INTERVAL: float = 5.0
+    READING_ID_BLOCK_SIZE: int = 10000
+
+    # Rollup settings
+    ROLLUP_FLUSH_INTERVAL: float = 5.0
+    ROLLUP_MIN_WINDOW_HOURS: float = 48.0
+    AGGREGATE_MAX_BUCKETS: int = 1500
+
+    # Retention settings
+    RETENTION_ENABLED: bool = False
+    RETENTION_RAW_DAYS: int = 7
+    RETENTION_ROLLUP_1M_DAYS: int = 30
+    RETENTION_ROLLUP_1H_DAYS: int = 365
+    RETENTION_ROLLUP_1D_DAYS: int = 0
+    RETENTION_INTERVAL: float = 3600.0
+    RETENTION_BATCH_SIZE: int = 5000
+    RETENTION_BATCH_PAUSE: float = 0.05
+    RETENTION_VACUUM_PAGES: int = 1000
+
+    # Device stats settings
+    DEVICE_STATS_RECONCILE_INTERVAL: float = 3600.0
+    DEVICE_STATS_RECONCILE_PAUSE: float = 0.01
+
+    # Latest values snapshot settings
+    LATEST_VALUES_REDIS: bool = True
+    LATEST_VALUES_REDIS_RETRY: float = 30.0
+    LATEST_VALUES_WARM_DAYS: int = 7
+
+    # Hot window settings
+    HOT_WINDOW_ENABLED: bool = False
+    HOT_WINDOW_HOURS: float = 3.0
+    HOT_WINDOW_CAPACITY: int = 16384
+    HOT_WINDOW_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # Threshold alert settings
+    THRESHOLD_ALERTS_ENABLED: bool = False
+    THRESHOLD_HYSTERESIS: float = 0.05
+    THRESHOLD_LIMITS_TTL: float = 60.0
+
+    # Anomaly detector settings
+    ANOMALY_ENABLED: bool = False
+    ANOMALY_ALPHA: float = 0.05
+    ANOMALY_Z_THRESHOLD: float = 4.0
+    ANOMALY_MIN_STD: float = 0.1
+    ANOMALY_WARMUP: int = 30
+    ANOMALY_BACKFILL_HOURS: float = 24.0
+
+    # Query cache settings
+    DATA_VERSIONS_REDIS: bool = True
+    DATA_VERSIONS_REDIS_RETRY: float = 30.0
+    QUERY_CACHE_ENABLED: bool = True
+    QUERY_CACHE_SIZE: int = 1024
+    QUERY_CACHE_TTL: float = 30.0
+    QUERY_CACHE_REDIS: bool = False
+
+    # Device cache settings
+    DEVICE_CACHE_SIZE: int = 10000
+    DEVICE_CACHE_TTL: float = 60.0
+    DEVICE_CACHE_NEGATIVE_TTL: float = 10.0
+
+    # UDP gateway settings
+    UDP_ENABLED: bool = False
+    UDP_HOST: str = "0.0.0.0"
+    UDP_PORT: int = 9999
+    UDP_QUEUE_MAX_SIZE: int = 10000
+    UDP_DEVICE_REFRESH_INTERVAL: float = 30.0
+
+    # Live stream settings
+    LIVE_SUBSCRIBER_QUEUE_SIZE: int = 256
+    LIVE_MAX_DROPPED: int = 1024
+    ALERT_STREAM_REPLAY_SIZE: int = 1000
+    ALERT_STREAM_KEEPALIVE: float = 15.0
+
 
     class Config:
         """Конфигурация Pydantic Settings.
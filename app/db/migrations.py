@@ -0,0 +1,220 @@
+"""Миграции схемы базы данных SQLite.
+
+create_all() создает только отсутствующие таблицы и не изменяет
+существующие, поэтому изменения схемы уже работающих баз (новые индексы,
+новые колонки, перестройка таблиц) выполняются миграциями.
+
+Номер примененной миграции хранится в PRAGMA user_version файла БД.
+Новая база создается сразу по актуальным моделям и получает номер
+последней миграции; существующая база последовательно проходит все
+миграции с номером больше сохраненного.
+
+Каждая миграция - функция, принимающая синхронное SQLAlchemy соединение.
+Миграции выполняются в одной транзакции с create_all() при запуске
+приложения (init_db) или из scripts/init_db.py.
+
+Functions:
+    upgrade_schema: Создание таблиц и применение недостающих миграций
+"""
+
+from typing import Callable, List, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+from app.db.session import Base
+from app.enums.rollup_resolution import RollupResolution
+from app.enums.sensor_type import SENSOR_TYPE_CODES
+from app.models.device_stats import device_counts_sql
+from app.models.reading_rollup import rollup_from_readings_sql
+from app.models.sensor_reading import is_partition_name, partition_bounds, sensor_readings_table
+from app.models.types import datetime_to_millis
+
+
+def _add_time_series_indexes(connection: Connection) -> None:
+    """Составные индексы для выборок показаний, оповещений и команд по устройству."""
+    statements = [
+        "CREATE INDEX IF NOT EXISTS ix_sensor_readings_device_type_ts "
+        "ON sensor_readings (device_id, sensor_type, timestamp)",
+        "CREATE INDEX IF NOT EXISTS ix_sensor_readings_device_ts "
+        "ON sensor_readings (device_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS ix_alerts_device_status_ts "
+        "ON alerts (device_id, status, timestamp)",
+        "CREATE INDEX IF NOT EXISTS ix_alerts_device_ts "
+        "ON alerts (device_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS ix_commands_device_status_created "
+        "ON commands (device_id, status, created_at)",
+    ]
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+    # Статистика индексов для планировщика запросов
+    connection.exec_driver_sql("ANALYZE")
+
+
+def _compact_sensor_readings(connection: Connection) -> None:
+    """Перевод sensor_readings в компактный формат строки.
+
+    UUID ключ заменяется целым (alias rowid), тип датчика - кодом
+    SENSOR_TYPE_CODES, единица измерения - ссылкой на таблицу units,
+    DateTime строка - миллисекундами от 1970-01-01 (см. app/models/types.py).
+    Новые ID назначаются в порядке времени показаний, счетчик id_sequences
+    продолжает нумерацию после них.
+
+    Таблица перестраивается копированием, освобожденные страницы файл БД
+    возвращает только после VACUUM (scripts/convert_readings_storage.py).
+    """
+    sensor_type_code = "CASE r.sensor_type {} ELSE 0 END".format(" ".join(
+        f"WHEN '{sensor_type.value}' THEN {code}" for sensor_type, code in SENSOR_TYPE_CODES.items()
+    ))
+    statements = [
+        "CREATE TABLE IF NOT EXISTS units ("
+        "id INTEGER NOT NULL, symbol VARCHAR NOT NULL, PRIMARY KEY (id), UNIQUE (symbol))",
+        "CREATE TABLE IF NOT EXISTS id_sequences ("
+        "name VARCHAR NOT NULL, next_value INTEGER NOT NULL, PRIMARY KEY (name))",
+        "INSERT OR IGNORE INTO units (symbol) "
+        "SELECT DISTINCT unit FROM sensor_readings WHERE unit IS NOT NULL",
+        "DROP INDEX IF EXISTS ix_sensor_readings_device_type_ts",
+        "DROP INDEX IF EXISTS ix_sensor_readings_device_ts",
+        "ALTER TABLE sensor_readings RENAME TO sensor_readings_legacy",
+        "CREATE TABLE sensor_readings ("
+        "id INTEGER NOT NULL, "
+        "device_id VARCHAR NOT NULL, "
+        "sensor_type SMALLINT NOT NULL, "
+        "value FLOAT NOT NULL, "
+        "unit_id INTEGER, "
+        "timestamp BIGINT NOT NULL, "
+        "PRIMARY KEY (id), "
+        "FOREIGN KEY(device_id) REFERENCES devices (id), "
+        "FOREIGN KEY(unit_id) REFERENCES units (id))",
+        "INSERT INTO sensor_readings (id, device_id, sensor_type, value, unit_id, timestamp) "
+        "SELECT row_number() OVER (ORDER BY r.timestamp, r.rowid), r.device_id, "
+        f"{sensor_type_code}, r.value, u.id, "
+        # 'YYYY-MM-DD HH:MM:SS.ffffff': секунды + первые 3 цифры дробной части,
+        # как datetime_to_millis() (отбрасывание, без часового пояса)
+        "coalesce(CAST(strftime('%s', r.timestamp) AS INTEGER) * 1000 "
+        "+ CAST(substr(r.timestamp, 21, 3) AS INTEGER), 0) "
+        "FROM sensor_readings_legacy r LEFT JOIN units u ON u.symbol = r.unit",
+        "DROP TABLE sensor_readings_legacy",
+        "CREATE INDEX ix_sensor_readings_device_type_ts "
+        "ON sensor_readings (device_id, sensor_type, timestamp)",
+        "CREATE INDEX ix_sensor_readings_device_ts "
+        "ON sensor_readings (device_id, timestamp)",
+        "INSERT OR REPLACE INTO id_sequences (name, next_value) "
+        "SELECT 'sensor_readings', coalesce(max(id), 0) + 1 FROM sensor_readings",
+        "ANALYZE",
+    ]
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+def _partition_sensor_readings(connection: Connection) -> None:
+    """Разбиение sensor_readings на партиции по месяцам (sensor_readings_YYYYMM).
+
+    Показания каждого месяца копируются в свою партицию с теми же ID,
+    после чего общая таблица удаляется. Счетчик id_sequences не меняется.
+    """
+    months = connection.exec_driver_sql(
+        "SELECT DISTINCT strftime('%Y%m', timestamp / 1000, 'unixepoch') FROM sensor_readings"
+    ).scalars().all()
+    for month in months:
+        table = sensor_readings_table(f"sensor_readings_{month}")
+        table.create(connection, checkfirst=True)
+        start, end = partition_bounds(table.name)
+        connection.exec_driver_sql(
+            f"INSERT INTO {table.name} (id, device_id, sensor_type, value, unit_id, timestamp) "
+            "SELECT id, device_id, sensor_type, value, unit_id, timestamp FROM sensor_readings "
+            "WHERE timestamp >= ? AND timestamp < ? ORDER BY id",
+            (datetime_to_millis(start), datetime_to_millis(end))
+        )
+    connection.exec_driver_sql("DROP TABLE sensor_readings")
+    connection.exec_driver_sql("ANALYZE")
+
+
+def _backfill_reading_rollups(connection: Connection) -> None:
+    """Агрегаты reading_rollups по уже записанным показаниям.
+
+    Бакеты всех разрешений не пересекают границы месяцев, поэтому
+    каждая партиция агрегируется независимо.
+    """
+    partitions = [name for name in inspect(connection).get_table_names() if is_partition_name(name)]
+    for name in partitions:
+        device_ids = connection.exec_driver_sql(f"SELECT DISTINCT device_id FROM {name}").scalars().all()
+        for resolution in RollupResolution:
+            statement = rollup_from_readings_sql(name, resolution)
+            for device_id in device_ids:
+                connection.execute(statement, {"device_id": device_id, "until": ALL_READINGS_UNTIL})
+
+
+def _add_rollup_retention_index(connection: Connection) -> None:
+    """Индекс для удаления устаревших агрегатов по разрешению и времени."""
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_reading_rollups_resolution_bucket "
+        "ON reading_rollups (resolution, bucket)"
+    )
+
+
+def _backfill_device_stats(connection: Connection) -> None:
+    """Счетчики device_stats по уже записанным показаниям, оповещениям и командам."""
+    partitions = [name for name in inspect(connection).get_table_names() if is_partition_name(name)]
+    statement = device_counts_sql(partitions)
+    for device_id in connection.exec_driver_sql("SELECT id FROM devices").scalars().all():
+        counts = connection.execute(statement, {"device_id": device_id}).one()
+        connection.execute(
+            text(
+                "INSERT OR REPLACE INTO device_stats (device_id, readings_count, alerts_count, commands_count) "
+                "VALUES (:device_id, :readings_count, :alerts_count, :commands_count)"
+            ),
+            {"device_id": device_id, **counts._asdict()}
+        )
+
+
+# (номер, описание, функция) в порядке применения
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "composite indexes for time-series access paths", _add_time_series_indexes),
+    (2, "compact sensor_readings row format", _compact_sensor_readings),
+    (3, "monthly sensor_readings partitions", _partition_sensor_readings),
+    (4, "reading rollups for existing readings", _backfill_reading_rollups),
+    (5, "reading rollups retention index", _add_rollup_retention_index),
+    (6, "device stats counters for existing records", _backfill_device_stats),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# Граница времени "все показания" для rollup_from_readings_sql(), мс
+ALL_READINGS_UNTIL = 2 ** 62
+
+
+def upgrade_schema(connection: Connection) -> None:
+    """Создает отсутствующие таблицы и применяет недостающие миграции.
+
+    Для баз данных, отличных от SQLite, выполняется только create_all().
+
+    Args:
+        connection (Connection): Синхронное соединение внутри транзакции
+
+    Example:
+        >>> async with engine.begin() as conn:
+        ...     await conn.run_sync(upgrade_schema)
+    """
+    if connection.dialect.name != "sqlite":
+        Base.metadata.create_all(connection)
+        return
+
+    is_new_database = not inspect(connection).has_table("devices")
+    if is_new_database:
+        # Освобожденные страницы возвращаются по частям (PRAGMA incremental_vacuum),
+        # режим можно выбрать только до создания таблиц
+        connection.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+    Base.metadata.create_all(connection)
+
+    if is_new_database:
+        connection.exec_driver_sql(f"PRAGMA user_version = {LATEST_VERSION}")
+        return
+
+    current_version = connection.exec_driver_sql("PRAGMA user_version").scalar()
+    for version, description, migrate in MIGRATIONS:
+        if version <= current_version:
+            continue
+        migrate(connection)
+        connection.exec_driver_sql(f"PRAGMA user_version = {version}")
+        print(f"✅ Migration {version} applied: {description}")
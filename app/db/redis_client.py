@@ -6,7 +6,7 @@
 
 import json
 import redis
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from app.core.config import settings
 
 
@@ -76,6 +76,23 @@ class RedisClient:
             print(f"Error getting device values: {e}")
             return None
     
+    def get_many_device_values(self, device_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Получить значения нескольких устройств одним MGET.
+
+        Args:
+            device_ids: ID устройств
+
+        Returns:
+            Dict: device_id -> словарь со значениями или None, если не найдено
+
+        Raises:
+            redis.RedisError: Если Redis недоступен
+        """
+        if not device_ids:
+            return {}
+        data = self.client.mget([f"device:values:{device_id}" for device_id in device_ids])
+        return {device_id: json.loads(raw) if raw else None for device_id, raw in zip(device_ids, data)}
+    
     def delete_device_values(self, device_id: str) -> bool:
         """Удалить значения устройства из Redis.
         
@@ -133,6 +150,233 @@ class RedisClient:
             print(f"Error getting all devices: {e}")
             return {}
     
+    def stream_add(self, stream: str, entries: List[Dict[str, str]]) -> List[str]:
+        """Добавить записи в Redis stream одним pipeline.
+
+        В отличие от методов device values, ошибки соединения не подавляются:
+        вызывающий код должен узнать, что записи не были приняты.
+
+        Args:
+            stream: Имя stream
+            entries: Список записей (словари строка -> строка)
+
+        Returns:
+            List[str]: ID добавленных записей
+
+        Raises:
+            redis.RedisError: Если Redis недоступен
+        """
+        pipe = self.client.pipeline(transaction=False)
+        for entry in entries:
+            pipe.xadd(stream, entry)
+        return pipe.execute()
+
+    def stream_length(self, stream: str) -> int:
+        """Получить количество записей в Redis stream.
+
+        Args:
+            stream: Имя stream
+
+        Returns:
+            int: Количество записей (0 если stream не существует)
+        """
+        return self.client.xlen(stream)
+
+    def stream_ensure_group(self, stream: str, group: str) -> None:
+        """Создать consumer group для stream, если ее еще нет.
+
+        Args:
+            stream: Имя stream (создается при необходимости)
+            group: Имя consumer group
+        """
+        try:
+            self.client.xgroup_create(stream, group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def stream_read_group(
+        self,
+        stream: str,
+        group: str,
+        consumer: str,
+        count: int,
+        block_ms: Optional[int] = None,
+        pending: bool = False
+    ) -> List[Tuple[str, Dict[str, str]]]:
+        """Прочитать записи stream в составе consumer group.
+
+        Args:
+            stream: Имя stream
+            group: Имя consumer group
+            consumer: Имя потребителя
+            count: Максимальное количество записей
+            block_ms: Время ожидания новых записей в миллисекундах
+            pending: True - перечитать неподтвержденные записи этого потребителя
+
+        Returns:
+            List[Tuple[str, Dict]]: Пары (ID записи, поля записи)
+        """
+        response = self.client.xreadgroup(
+            group, consumer, {stream: "0" if pending else ">"},
+            count=count, block=None if pending else block_ms
+        )
+        if not response:
+            return []
+        return [(entry_id, fields) for entry_id, fields in response[0][1] if fields]
+
+    def stream_claim_idle(self, stream: str, group: str, consumer: str, min_idle_ms: int, count: int) -> int:
+        """Передать потребителю записи, которые другие потребители получили,
+        но не подтвердили дольше min_idle_ms (XAUTOCLAIM).
+
+        Записи потребителей завершившихся процессов иначе остались бы
+        в pending list навсегда. Переданные записи читаются как
+        неподтвержденные записи этого потребителя (stream_read_group с pending=True).
+
+        Args:
+            stream: Имя stream
+            group: Имя consumer group
+            consumer: Имя потребителя, которому передаются записи
+            min_idle_ms: Минимальное время без подтверждения, мс
+            count: Количество записей, просматриваемых за одну команду
+
+        Returns:
+            int: Количество переданных записей
+        """
+        claimed = 0
+        start_id = "0-0"
+        while True:
+            response = self.client.xautoclaim(stream, group, consumer, min_idle_ms, start_id=start_id, count=count)
+            start_id = response[0]
+            claimed += len(response[1])
+            if start_id in ("0-0", b"0-0"):
+                return claimed
+
+    def stream_ack_delete(self, stream: str, group: str, entry_ids: List[str]) -> None:
+        """Подтвердить обработку записей и удалить их из stream.
+
+        XACK и XDEL выполняются в одной транзакции, поэтому длина stream
+        всегда равна количеству необработанных записей.
+
+        Args:
+            stream: Имя stream
+            group: Имя consumer group
+            entry_ids: ID обработанных записей
+        """
+        if not entry_ids:
+            return
+        pipe = self.client.pipeline(transaction=True)
+        pipe.xack(stream, group, *entry_ids)
+        pipe.xdel(stream, *entry_ids)
+        pipe.execute()
+
+    def set_latest_values(self, values: Dict[str, Dict[str, str]]) -> None:
+        """Записать последние значения датчиков устройств одним pipeline.
+
+        Значения устройства хранятся в hash device:latest:{device_id}:
+        поле - тип датчика, значение - JSON строка. Ошибки соединения
+        не подавляются, вызывающий код переходит на копию в памяти.
+
+        Args:
+            values: device_id -> {тип датчика: JSON строка значения}
+
+        Raises:
+            redis.RedisError: Если Redis недоступен
+        """
+        pipe = self.client.pipeline(transaction=False)
+        for device_id, fields in values.items():
+            pipe.hset(f"device:latest:{device_id}", mapping=fields)
+        pipe.execute()
+
+    def get_latest_values(self, device_ids: List[str]) -> Dict[str, Dict[str, str]]:
+        """Получить последние значения датчиков устройств одним pipeline.
+
+        Args:
+            device_ids: ID устройств
+
+        Returns:
+            Dict[str, Dict[str, str]]: device_id -> {тип датчика: JSON строка значения}
+                (пустой словарь для устройств без значений)
+
+        Raises:
+            redis.RedisError: Если Redis недоступен
+        """
+        pipe = self.client.pipeline(transaction=False)
+        for device_id in device_ids:
+            pipe.hgetall(f"device:latest:{device_id}")
+        return dict(zip(device_ids, pipe.execute()))
+
+    def delete_latest_values(self, device_id: str) -> None:
+        """Удалить последние значения датчиков устройства.
+
+        Raises:
+            redis.RedisError: Если Redis недоступен
+        """
+        self.client.delete(f"device:latest:{device_id}")
+
+    def incr_data_versions(self, names: List[str]) -> None:
+        """Увеличить версии данных одним pipeline (ключи data:version:{name}).
+
+        Args:
+            names: ID устройств или общий счетчик
+
+        Raises:
+            redis.RedisError: Если Redis недоступен
+        """
+        pipe = self.client.pipeline(transaction=False)
+        for name in names:
+            pipe.incr(f"data:version:{name}")
+        pipe.execute()
+
+    def get_data_versions(self, names: List[str], token: str) -> Tuple[str, Dict[str, int]]:
+        """Получить токен и версии данных одним pipeline.
+
+        Токен (data:version:token) создается SET NX при первом обращении
+        и меняется, если Redis потерял данные (перезапуск без сохранения):
+        счетчики тогда начинаются заново, но версии с новым токеном
+        не совпадают с прежними.
+
+        Args:
+            names: ID устройств или общий счетчик
+            token: Токен, который записывается, если токена еще нет
+
+        Returns:
+            Tuple[str, Dict[str, int]]: Токен и name -> версия
+                (0, если версия еще не увеличивалась)
+
+        Raises:
+            redis.RedisError: Если Redis недоступен
+        """
+        pipe = self.client.pipeline(transaction=True)
+        pipe.set("data:version:token", token, nx=True)
+        pipe.get("data:version:token")
+        pipe.mget([f"data:version:{name}" for name in names])
+        _, current, data = pipe.execute()
+        if isinstance(current, bytes):
+            current = current.decode()
+        return current, {name: int(raw) if raw else 0 for name, raw in zip(names, data)}
+
+    def get_cached_result(self, key: str) -> Optional[str]:
+        """Получить результат запроса из кэша (ключ query:cache:{key}).
+
+        Raises:
+            redis.RedisError: Если Redis недоступен
+        """
+        return self.client.get(f"query:cache:{key}")
+
+    def set_cached_result(self, key: str, value: str, expire: int) -> None:
+        """Записать результат запроса в кэш с временем жизни.
+
+        Args:
+            key: Ключ результата
+            value: JSON строка результата
+            expire: Время жизни в секундах
+
+        Raises:
+            redis.RedisError: Если Redis недоступен
+        """
+        self.client.set(f"query:cache:{key}", value, ex=expire)
+
     def close(self):
         """Закрыть подключение к Redis."""
         self.client.close()
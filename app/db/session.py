@@ -1,36 +1,166 @@
 """Управление сессиями базы данных и инициализация.
 
-Этот модуль содержит настройки SQLAlchemy для подключения к базе данных,
-создание сессий и управление схемой базы данных.
+Этот модуль содержит настройки SQLAlchemy для асинхронного подключения к базе
+данных, создание сессий и управление схемой базы данных.
+
+Все обработчики API объявлены как async def, поэтому работа с БД тоже
+асинхронная: запросы выполняются драйвером (aiosqlite для SQLite) вне
+event loop, и медленный запрос одного клиента не блокирует остальных.
 
 Components:
-    - engine: SQLAlchemy engine для подключения к БД
-    - SessionLocal: Фабрика сессий для работы с БД
+    - engine: Асинхронный SQLAlchemy engine для подключения к БД
+    - read_engine: Engine для соединений только на чтение
+    - SessionLocal: Фабрика асинхронных сессий для работы с БД
+    - ReadSessionLocal: Фабрика сессий только для чтения
     - Base: Базовый класс для всех ORM моделей
     - get_db(): FastAPI dependency для получения сессии БД
+    - get_read_db(): FastAPI dependency для получения сессии только для чтения
     - init_db(): Функция инициализации схемы БД
 """
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import os
+from typing import List
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
 from app.core.config import settings
 
 
+# Синхронные драйверы в DATABASE_URL заменяются их асинхронными аналогами
+ASYNC_DRIVERS = {
+    "sqlite://": "sqlite+aiosqlite://",
+    "postgresql://": "postgresql+asyncpg://",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """Преобразует URL базы данных в URL с асинхронным драйвером.
+
+    Позволяет оставить в .env привычный вид DATABASE_URL.
+
+    Args:
+        url (str): URL подключения, например "sqlite:///./test.db"
+
+    Returns:
+        str: URL с асинхронным драйвером, например "sqlite+aiosqlite:///./test.db"
+
+    Example:
+        >>> get_async_database_url("sqlite:///./test.db")
+        'sqlite+aiosqlite:///./test.db'
+    """
+    for sync_prefix, async_prefix in ASYNC_DRIVERS.items():
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+
+def is_sqlite_production_profile() -> bool:
+    """Включен ли production профиль хранения SQLite.
+
+    Профиль применяется только к файловой базе SQLite: для in-memory
+    базы и других СУБД используется обычный пул соединений.
+
+    Returns:
+        bool: True если SQLITE_PROFILE="production" и DATABASE_URL - файл SQLite
+    """
+    url = make_url(settings.DATABASE_URL)
+    return (
+        settings.SQLITE_PROFILE == "production"
+        and url.get_backend_name() == "sqlite"
+        and url.database not in (None, "", ":memory:")
+    )
+
+
+def get_read_only_database_url(url: str) -> str:
+    """Строит URL подключения SQLite только для чтения.
+
+    Args:
+        url (str): URL файловой базы SQLite, например "sqlite:///./test.db"
+
+    Returns:
+        str: URL вида "sqlite+aiosqlite:///file:/abs/path/test.db?mode=ro&uri=true"
+    """
+    path = os.path.abspath(make_url(url).database)
+    return get_async_database_url(f"sqlite:///file:{path}?mode=ro&uri=true")
+
+
+def _set_sqlite_pragmas(dbapi_connection, pragmas: List[str]) -> None:
+    cursor = dbapi_connection.cursor()
+    for pragma in pragmas:
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
+
+# Общие настройки кэша страниц и memory-mapped I/O для всех соединений
+_SQLITE_TUNING_PRAGMAS = [
+    f"cache_size = -{settings.SQLITE_CACHE_SIZE_KB}",
+    f"mmap_size = {settings.SQLITE_MMAP_SIZE}",
+    "temp_store = MEMORY",
+    f"busy_timeout = {settings.SQLITE_BUSY_TIMEOUT_MS}",
+]
+
+
 # SQLAlchemy engine и базовый класс
-engine = create_engine(
-    settings.DATABASE_URL, connect_args={"check_same_thread": False}
-)
-"""SQLAlchemy engine для подключения к базе данных.
+if is_sqlite_production_profile():
+    # Единственное соединение на запись: транзакции записи выстраиваются
+    # в очередь пула, а не конкурируют за блокировку файла
+    engine = create_async_engine(
+        get_async_database_url(settings.DATABASE_URL),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.SQLITE_WRITE_TIMEOUT,
+    )
+    read_engine = create_async_engine(
+        get_read_only_database_url(settings.DATABASE_URL),
+        pool_size=settings.SQLITE_READ_POOL_SIZE,
+        max_overflow=0,
+    )
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _configure_writer_connection(dbapi_connection, connection_record):
+        _set_sqlite_pragmas(dbapi_connection, [
+            # Действует только для нового файла БД и должно идти до WAL
+            "auto_vacuum = INCREMENTAL",
+            "journal_mode = WAL",
+            "synchronous = NORMAL",
+            *_SQLITE_TUNING_PRAGMAS,
+        ])
+
+    @event.listens_for(read_engine.sync_engine, "connect")
+    def _configure_reader_connection(dbapi_connection, connection_record):
+        _set_sqlite_pragmas(dbapi_connection, [*_SQLITE_TUNING_PRAGMAS, "query_only = ON"])
+else:
+    engine = create_async_engine(get_async_database_url(settings.DATABASE_URL))
+    read_engine = engine
+"""Асинхронные SQLAlchemy engine для подключения к базе данных.
+
+Для SQLite используется драйвер aiosqlite, который выполняет запросы
+в отдельном потоке и не блокирует event loop.
+
+В production профиле (SQLITE_PROFILE="production"):
+    - engine: единственное соединение на запись, WAL журнал,
+      synchronous=NORMAL, увеличенный кэш страниц и mmap
+    - read_engine: пул соединений только для чтения (mode=ro, query_only),
+      которые в режиме WAL не блокируются записью
+В профиле по умолчанию read_engine совпадает с engine.
+"""
+
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+"""Фабрика асинхронных сессий SQLAlchemy для чтения и записи.
 
-Настройка check_same_thread=False необходима для SQLite,
-чтобы позволить использование соединения в разных потоках в FastAPI.
+Создает новые сессии базы данных с отключенным autoflush для явного
+управления транзакциями. expire_on_commit=False сохраняет атрибуты
+объектов после commit, чтобы их можно было вернуть из эндпоинта без
+повторного (ленивого) запроса к БД.
 """
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-"""Фабрика сессий SQLAlchemy.
+ReadSessionLocal = async_sessionmaker(bind=read_engine, autoflush=False, expire_on_commit=False)
+"""Фабрика асинхронных сессий только для чтения.
 
-Создает новые сессии базы данных с отключенным autocommit и autoflush
-для явного управления транзакциями.
+Используется GET эндпоинтами, чтобы опрос дашбордов не занимал
+соединение на запись, через которое идет прием показаний.
 """
 
 Base = declarative_base()
@@ -40,51 +170,67 @@ Base = declarative_base()
 """
 
 
-def get_db():
+async def get_db():
     """
-    FastAPI dependency для получения сессии базы данных.
-    
+    FastAPI dependency для получения асинхронной сессии базы данных.
+
     Создает новую сессию для каждого запроса и гарантирует ее закрытие
     после завершения обработки запроса.
-    
+
     Yields:
-        Session: Сессия SQLAlchemy для работы с базой данных
-        
+        AsyncSession: Асинхронная сессия SQLAlchemy для работы с базой данных
+
     Example:
         >>> from fastapi import Depends
         >>> from app.db.session import get_db
-        >>> 
+        >>>
         >>> @app.get("/items")
-        >>> def get_items(db: Session = Depends(get_db)):
-        ...     return db.query(Item).all()
-        
+        >>> async def get_items(db: AsyncSession = Depends(get_db)):
+        ...     return (await db.scalars(select(Item))).all()
+
     Note:
         Использует context manager для гарантированного закрытия сессии
         даже в случае исключений.
     """
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-def init_db():
+async def get_read_db():
     """
-    Инициализация базы данных - создание всех таблиц.
-    
-    Создает все таблицы, определенные в моделях, если они еще не существуют.
+    FastAPI dependency для получения сессии базы данных только для чтения.
+
+    Используется эндпоинтами, которые не изменяют данные. В production
+    профиле SQLite сессия берет соединение из пула только для чтения,
+    в остальных случаях работает так же, как get_db().
+
+    Yields:
+        AsyncSession: Асинхронная сессия SQLAlchemy только для чтения
+    """
+    async with ReadSessionLocal() as db:
+        yield db
+
+
+async def init_db():
+    """
+    Инициализация базы данных - создание всех таблиц и миграции схемы.
+
+    Создает все таблицы, определенные в моделях, если они еще не существуют,
+    и применяет к существующей базе недостающие миграции (app/db/migrations.py).
     Вызывается при запуске приложения или из скрипта инициализации.
-    
+
     Example:
+        >>> import asyncio
         >>> from app.db.session import init_db
-        >>> init_db()
+        >>> asyncio.run(init_db())
         >>> print("Таблицы созданы!")
-        
+
     Note:
         Важно убедиться, что все модели импортированы до вызова этой функции,
         чтобы они были зарегистрированы в Base.metadata.
     """
     from app import models  # Убедитесь, что модели импортированы, чтобы они зарегистрировались в Base
+    from app.db.migrations import upgrade_schema
 
-    Base.metadata.create_all(bind=engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(upgrade_schema)
@@ -0,0 +1,44 @@
+"""Перечисление статистик агрегации показаний.
+
+Enums:
+    AggregateFunction: Статистики, вычисляемые по показаниям бакета
+
+Variables:
+    ROLLUP_AGGREGATE_FUNCTIONS: Статистики, которые можно получить из агрегатов reading_rollups
+"""
+
+from enum import Enum
+
+
+class AggregateFunction(str, Enum):
+    """Статистики показаний бакета.
+
+    Attributes:
+        MIN: Минимальное значение
+        MAX: Максимальное значение
+        MEAN: Среднее значение
+        P50: Медиана (линейная интерполяция, как numpy.percentile)
+        P95: 95-й перцентиль
+        COUNT: Количество показаний
+        STDDEV: Стандартное отклонение (по генеральной совокупности)
+
+    Example:
+        >>> AggregateFunction("p95")
+        <AggregateFunction.P95: 'p95'>
+    """
+    MIN = "min"
+    MAX = "max"
+    MEAN = "mean"
+    P50 = "p50"
+    P95 = "p95"
+    COUNT = "count"
+    STDDEV = "stddev"
+
+
+ROLLUP_AGGREGATE_FUNCTIONS = {
+    AggregateFunction.MIN,
+    AggregateFunction.MAX,
+    AggregateFunction.MEAN,
+    AggregateFunction.COUNT,
+}
+"""Статистики, складываемые из count/min/max/sum агрегатов (без сырых показаний)."""
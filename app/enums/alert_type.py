@@ -21,6 +21,8 @@ class AlertType(str, Enum):
         ERROR: Ошибка устройства или системы
         TEMPERATURE: Оповещение, связанное с температурой
         HUMIDITY: Оповещение, связанное с влажностью
+        FIRE: Оповещение датчика пламени
+        ANOMALY: Статистически аномальное показание (детектор аномалий)
         MOTION: Обнаружение движения
         BATTERY: Оповещение о состоянии батареи
         
@@ -36,6 +38,8 @@ class AlertType(str, Enum):
     ERROR = "error"
     TEMPERATURE = "temperature"
     HUMIDITY = "humidity"
+    FIRE = "fire"
+    ANOMALY = "anomaly"
     MOTION = "motion"
     BATTERY = "battery"
     
\ No newline at end of file
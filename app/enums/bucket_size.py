@@ -0,0 +1,61 @@
+"""Перечисление размеров интервалов агрегации показаний.
+
+Этот модуль определяет длительности бакетов, по которым эндпоинт
+агрегации (GET /devices/{id}/readings/aggregate) группирует показания
+для графиков.
+
+Enums:
+    BucketSize: Размеры бакетов (от 1 минуты до 1 дня)
+"""
+
+from enum import Enum
+
+
+class BucketSize(str, Enum):
+    """Размеры интервалов агрегации показаний.
+
+    Бакеты выровнены по времени от 1970-01-01: бакет 1h начинается
+    в начале часа, 1d - в начале суток.
+
+    Attributes:
+        ONE_MINUTE: 1 минута
+        FIVE_MINUTES: 5 минут
+        FIFTEEN_MINUTES: 15 минут
+        THIRTY_MINUTES: 30 минут
+        ONE_HOUR: 1 час
+        THREE_HOURS: 3 часа
+        SIX_HOURS: 6 часов
+        TWELVE_HOURS: 12 часов
+        ONE_DAY: 1 день
+
+    Example:
+        >>> BucketSize.FIFTEEN_MINUTES.millis
+        900000
+    """
+    ONE_MINUTE = "1m"
+    FIVE_MINUTES = "5m"
+    FIFTEEN_MINUTES = "15m"
+    THIRTY_MINUTES = "30m"
+    ONE_HOUR = "1h"
+    THREE_HOURS = "3h"
+    SIX_HOURS = "6h"
+    TWELVE_HOURS = "12h"
+    ONE_DAY = "1d"
+
+    @property
+    def millis(self) -> int:
+        """Длительность бакета в миллисекундах."""
+        return BUCKET_SIZE_MILLIS[self]
+
+
+BUCKET_SIZE_MILLIS = {
+    BucketSize.ONE_MINUTE: 60 * 1000,
+    BucketSize.FIVE_MINUTES: 5 * 60 * 1000,
+    BucketSize.FIFTEEN_MINUTES: 15 * 60 * 1000,
+    BucketSize.THIRTY_MINUTES: 30 * 60 * 1000,
+    BucketSize.ONE_HOUR: 60 * 60 * 1000,
+    BucketSize.THREE_HOURS: 3 * 60 * 60 * 1000,
+    BucketSize.SIX_HOURS: 6 * 60 * 60 * 1000,
+    BucketSize.TWELVE_HOURS: 12 * 60 * 60 * 1000,
+    BucketSize.ONE_DAY: 24 * 60 * 60 * 1000,
+}
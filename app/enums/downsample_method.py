@@ -0,0 +1,26 @@
+"""Перечисление методов прореживания показаний для графиков.
+
+Enums:
+    DownsampleMethod: Методы выбора точек при прореживании
+"""
+
+from enum import Enum
+
+
+class DownsampleMethod(str, Enum):
+    """Методы прореживания показаний.
+
+    Attributes:
+        MINMAX: Огибающая min/max - из каждого интервала времени берутся
+            показания с минимальным и максимальным значением; выбросы
+            и пересечения порогов всегда остаются на графике
+        LTTB: Largest-Triangle-Three-Buckets - из каждой группы показаний
+            берется точка, образующая с соседними наибольший треугольник;
+            лучше передает форму кривой
+
+    Example:
+        >>> DownsampleMethod("lttb")
+        <DownsampleMethod.LTTB: 'lttb'>
+    """
+    MINMAX = "minmax"
+    LTTB = "lttb"
@@ -0,0 +1,27 @@
+"""Перечисление типов событий потока реального времени.
+
+Этот модуль определяет типы событий, которые публикуются в шину
+событий после записи данных в БД и передаются подписчикам
+(WebSocket дашборды, SSE лента оповещений).
+
+Enums:
+    EventType: Типы событий шины
+"""
+
+from enum import Enum
+
+
+class EventType(str, Enum):
+    """Типы событий шины реального времени.
+    
+    Attributes:
+        READING: Записано новое показание датчика
+        ALERT: Создано оповещение или изменен его статус
+        VALUES: Изменены значения (лимиты, позиции) устройства
+        
+    Example:
+        >>> event_bus.publish(EventType.READING, device_id, {"value": 23.5})
+    """
+    READING = "reading"
+    ALERT = "alert"
+    VALUES = "values"
@@ -0,0 +1,46 @@
+"""Перечисление разрешений агрегатов показаний.
+
+Этот модуль определяет длительности интервалов (бакетов), по которым
+движок агрегатов сворачивает показания датчиков для графиков
+за длинные периоды.
+
+Enums:
+    RollupResolution: Разрешения агрегатов (1 минута, 1 час, 1 день)
+"""
+
+from enum import Enum
+
+
+class RollupResolution(str, Enum):
+    """Разрешения агрегатов показаний.
+
+    Attributes:
+        MINUTE: Агрегаты за 1 минуту
+        HOUR: Агрегаты за 1 час
+        DAY: Агрегаты за 1 день
+
+    Example:
+        >>> RollupResolution.HOUR.millis
+        3600000
+        >>> RollupResolution.HOUR.bucket_start(1759579512345)
+        1759579200000
+    """
+    MINUTE = "1m"
+    HOUR = "1h"
+    DAY = "1d"
+
+    @property
+    def millis(self) -> int:
+        """Длительность бакета в миллисекундах."""
+        return ROLLUP_RESOLUTION_MILLIS[self]
+
+    def bucket_start(self, timestamp_millis: int) -> int:
+        """Начало бакета, в который попадает время (мс от 1970-01-01)."""
+        return timestamp_millis - timestamp_millis % self.millis
+
+
+ROLLUP_RESOLUTION_MILLIS = {
+    RollupResolution.MINUTE: 60 * 1000,
+    RollupResolution.HOUR: 60 * 60 * 1000,
+    RollupResolution.DAY: 24 * 60 * 60 * 1000,
+}
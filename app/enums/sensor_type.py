@@ -5,6 +5,11 @@
 
 Enums:
     SensorType: Типы датчиков, поддерживаемых системой
+
+Variables:
+    SENSOR_TYPE_CODES: Компактные числовые коды типов датчиков
+    SENSOR_TYPES_BY_CODE: Обратное отображение кода в тип датчика
+    SENSOR_TYPE_DEFAULT_UNITS: Единицы измерения по умолчанию
 """
 
 from enum import Enum
@@ -22,7 +27,8 @@ class SensorType(str, Enum):
         ALERT: Датчик тревоги/оповещений (бинарное значение)
         
     Example:
-        >>> reading = SensorReading(
+        >>> reading = ReadingBase(
+        ...     device_id="abc123",
         ...     sensor_type=SensorType.TEMPERATURE,
         ...     value=23.5,
         ...     unit="°C"
@@ -37,4 +43,27 @@ class SensorType(str, Enum):
     TEMPERATURE = "temperature"
     HUMIDITY = "humidity"
     ALERT = "alert"
-    FIRE = "fire"
\ No newline at end of file
+    FIRE = "fire"
+
+
+SENSOR_TYPE_CODES = {
+    SensorType.TEMPERATURE: 1,
+    SensorType.HUMIDITY: 2,
+    SensorType.ALERT: 3,
+    SensorType.FIRE: 4,
+}
+"""Числовые коды типов датчиков для компактных форматов (бинарные кадры).
+
+Коды передаются устройствами и хранятся, поэтому менять существующие
+значения нельзя - новые типы получают следующий свободный код.
+"""
+
+SENSOR_TYPES_BY_CODE = {code: sensor_type for sensor_type, code in SENSOR_TYPE_CODES.items()}
+
+SENSOR_TYPE_DEFAULT_UNITS = {
+    SensorType.TEMPERATURE: "°C",
+    SensorType.HUMIDITY: "%",
+    SensorType.ALERT: "",
+    SensorType.FIRE: "F",
+}
+"""Единицы измерения для показаний, пришедших без явной единицы."""
@@ -1,3 +1,4 @@
+from datetime import timedelta
 from enum import Enum
 
 
@@ -32,4 +33,21 @@ class TimeFrame(str, Enum):
     TWELVE_HOURS = "12h"
     ONE_DAY = "24h"
     SEVEN_DAYS = "7d"
-    THIRTY_DAYS = "30d"
\ No newline at end of file
+    THIRTY_DAYS = "30d"
+
+    @property
+    def delta(self) -> timedelta:
+        """Длительность интервала."""
+        return TIMEFRAME_DELTAS[self]
+
+
+TIMEFRAME_DELTAS = {
+    TimeFrame.ONE_HOUR: timedelta(hours=1),
+    TimeFrame.THREE_HOURS: timedelta(hours=3),
+    TimeFrame.SIX_HOURS: timedelta(hours=6),
+    TimeFrame.EIGHT_HOURS: timedelta(hours=8),
+    TimeFrame.TWELVE_HOURS: timedelta(hours=12),
+    TimeFrame.ONE_DAY: timedelta(days=1),
+    TimeFrame.SEVEN_DAYS: timedelta(days=7),
+    TimeFrame.THIRTY_DAYS: timedelta(days=30),
+}
\ No newline at end of file
@@ -3,18 +3,26 @@
 from app.models.base import Base, gen_id
 from app.models.user import User
 from app.models.device import Device
-from app.models.sensor_reading import SensorReading
+from app.models.sensor_reading import sensor_readings_table
 from app.models.log import Log
 from app.models.alert import Alert
 from app.models.command import Command
+from app.models.unit import Unit
+from app.models.id_sequence import IdSequence
+from app.models.reading_rollup import ReadingRollup
+from app.models.device_stats import DeviceStats
 
 __all__ = [
     "Base",
     "gen_id",
     "User",
     "Device",
-    "SensorReading",
+    "sensor_readings_table",
     "Log",
     "Alert",
     "Command",
+    "Unit",
+    "IdSequence",
+    "ReadingRollup",
+    "DeviceStats",
 ]
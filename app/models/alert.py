@@ -10,7 +10,7 @@ Classes:
 
 from pydantic import BaseModel
 from app.enums.alert_type import AlertType
-from app.models.base import Base, Column, String, Boolean, DateTime, ForeignKey, Text, datetime, timezone, gen_id, gen_uuid, relationship
+from app.models.base import Base, Column, String, Boolean, DateTime, ForeignKey, Index, Text, datetime, timezone, gen_id, gen_uuid, relationship
 
 
 class BaseAlert(BaseModel):
@@ -51,6 +51,11 @@ class Alert(Base):
     Relationships:
         device (Device): Устройство, от которого поступило оповещение
         
+    Indexes:
+        ix_alerts_device_status_ts: (device_id, status, timestamp) - оповещения
+            устройства с фильтром по статусу, новые первыми
+        ix_alerts_device_ts: (device_id, timestamp) - оповещения устройства без фильтра
+        
     Example:
         >>> alert = Alert(
         ...     device_id="abc123",
@@ -63,6 +68,10 @@ class Alert(Base):
         >>> db.commit()
     """
     __tablename__ = "alerts"
+    __table_args__ = (
+        Index("ix_alerts_device_status_ts", "device_id", "status", "timestamp"),
+        Index("ix_alerts_device_ts", "device_id", "timestamp"),
+    )
 
     id = Column(String, primary_key=True, default=gen_uuid)
     device_id = Column(String, ForeignKey("devices.id"), nullable=False)
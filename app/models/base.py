@@ -8,6 +8,7 @@
     - gen_id(): Генератор коротких случайных ID
     - gen_uuid(): Генератор UUID идентификаторов
     - Типы колонок: Column, String, Integer, Float, Boolean, DateTime, и др.
+    - Index: Объявление составных индексов в __table_args__
 
 Пример использования:
     >>> from app.models.base import Base, Column, String, gen_id
@@ -21,7 +22,7 @@ import random
 import string
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, ForeignKey, JSON, Text
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, ForeignKey, Index, JSON, Text
 from sqlalchemy.dialects.sqlite import BLOB
 from sqlalchemy.orm import relationship
 
@@ -69,4 +70,4 @@ def gen_uuid() -> str:
     return str(uuid.uuid4())
 
 __all__ = ["Base", "gen_id", "gen_uuid", "Column", "String", "Integer", "Float", "Boolean", 
-           "DateTime", "ForeignKey", "JSON", "Text", "BLOB", "relationship", "datetime"]
+           "DateTime", "ForeignKey", "Index", "JSON", "Text", "BLOB", "relationship", "datetime"]
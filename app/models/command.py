@@ -12,7 +12,7 @@ from pydantic import BaseModel
 from sqlalchemy import Numeric
 from app.enums.action_type import ActionType
 from app.enums.command_status import CommandStatus
-from app.models.base import Base, Column, String, DateTime, ForeignKey, JSON, datetime, timezone, gen_id, relationship
+from app.models.base import Base, Column, String, DateTime, ForeignKey, Index, JSON, datetime, timezone, gen_id, relationship
 
 
 class CreateCommand(BaseModel):
@@ -45,6 +45,10 @@ class Command(Base):
     Relationships:
         device (Device): Устройство, которому отправлена команда
         
+    Indexes:
+        ix_commands_device_status_created: (device_id, status, created_at) -
+            команды устройства в заданном статусе
+        
     Example:
         >>> command = Command(
         ...     device_id="abc123",
@@ -60,6 +64,9 @@ class Command(Base):
         обновляет статус по мере выполнения.
     """
     __tablename__ = "commands"
+    __table_args__ = (
+        Index("ix_commands_device_status_created", "device_id", "status", "created_at"),
+    )
 
     id = Column(String, primary_key=True, default=gen_id)
     device_id = Column(String, ForeignKey("devices.id"), nullable=False)
@@ -4,7 +4,7 @@
 в системе мониторинга, включая их статус, местоположение и связанные данные.
 
 Classes:
-    Device: Основная модель устройства с отношениями к показаниям, логам и алертам
+    Device: Основная модель устройства с отношениями к логам, алертам и командам
 """
 
 from app.models.base import Base, Column, String, DateTime, JSON, datetime, timezone, gen_id, relationship
@@ -26,14 +26,15 @@ class Device(Base):
         created_at (datetime): Дата и время регистрации устройства в системе
         
     Relationships:
-        readings (List[SensorReading]): Показания датчиков от устройства
         logs (List[Log]): Логи активности устройства
         alerts (List[Alert]): Оповещения, связанные с устройством
         commands (List[Command]): Команды, отправленные устройству
         
     Cascade:
         При удалении устройства автоматически удаляются все связанные записи
-        (readings, logs, alerts, commands) благодаря "all, delete-orphan"
+        (logs, alerts, commands) благодаря "all, delete-orphan". Показания
+        хранятся в партициях без relationship и удаляются эндпоинтом
+        удаления устройства (delete_device_readings)
         
     Example:
         >>> device = Device(
@@ -56,7 +57,6 @@ class Device(Base):
     created_at = Column(DateTime, default=lambda: datetime.now())
 
     # Отношения с каскадным удалением
-    readings = relationship("SensorReading", back_populates="device", cascade="all, delete-orphan")
     logs = relationship("Log", back_populates="device", cascade="all, delete-orphan")
     alerts = relationship("Alert", back_populates="device", cascade="all, delete-orphan")
     commands = relationship("Command", back_populates="device", cascade="all, delete-orphan")
@@ -0,0 +1,75 @@
+"""Счетчики записей устройства.
+
+Карточка устройства и список устройств читают количество показаний,
+оповещений и команд из одной строки вместо COUNT(*) по всей истории.
+
+Classes:
+    DeviceStats: SQLAlchemy модель счетчиков устройства
+
+Functions:
+    device_counts_sql: Точный подсчет записей устройства по таблицам
+"""
+
+from typing import Iterable
+
+from sqlalchemy import TextClause, text
+
+from app.models.base import Base, Column, String, Integer, ForeignKey
+
+
+class DeviceStats(Base):
+    """Количество записей устройства по таблицам.
+
+    Счетчики изменяются в той же транзакции, что и записи, которые они
+    считают (app/service/device_stats.py). Расхождения после сбоев или
+    ручных правок исправляет периодическая сверка с device_counts_sql().
+    Отсутствующая строка означает нулевые счетчики.
+
+    Attributes:
+        device_id (str): ID устройства (первичный и внешний ключ)
+        readings_count (int): Количество показаний во всех партициях
+        alerts_count (int): Количество оповещений
+        commands_count (int): Количество команд
+
+    Example:
+        >>> stats = await db.get(DeviceStats, "abc123")
+        >>> stats.readings_count
+        15230
+    """
+    __tablename__ = "device_stats"
+
+    device_id = Column(String, ForeignKey("devices.id"), primary_key=True)
+    readings_count = Column(Integer, nullable=False, default=0, server_default="0")
+    alerts_count = Column(Integer, nullable=False, default=0, server_default="0")
+    commands_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+def device_counts_sql(partitions: Iterable[str]) -> TextClause:
+    """Запрос точного количества показаний, оповещений и команд устройства.
+
+    Каждый подсчет выполняется по индексу (device_id, ...) соответствующей
+    таблицы и читает только записи устройства :device_id.
+
+    Args:
+        partitions (Iterable[str]): Имена партиций показаний
+
+    Returns:
+        TextClause: Запрос с параметром :device_id, возвращающий одну строку
+            (readings_count, alerts_count, commands_count)
+
+    Example:
+        >>> row = (await db.execute(device_counts_sql(names), {"device_id": "abc123"})).one()
+        >>> row.readings_count
+        15230
+    """
+    readings = " + ".join(
+        f"(SELECT count(*) FROM {name} WHERE device_id = :device_id)" for name in partitions
+    ) or "0"
+    return text(
+        f"SELECT {readings} AS readings_count, "
+        "(SELECT count(*) FROM alerts WHERE device_id = :device_id) AS alerts_count, "
+        "(SELECT count(*) FROM commands WHERE device_id = :device_id) AS commands_count"
+    )
+
+
+__all__ = ["DeviceStats", "device_counts_sql"]
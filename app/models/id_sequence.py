@@ -0,0 +1,27 @@
+"""Счетчики идентификаторов, выдаваемых приложением.
+
+Classes:
+    IdSequence: SQLAlchemy модель счетчика идентификаторов
+"""
+
+from app.models.base import Base, Column, String, Integer
+
+
+class IdSequence(Base):
+    """Счетчик целочисленных идентификаторов таблицы.
+
+    Процесс приложения резервирует у счетчика блок идентификаторов
+    и выдает их из памяти (см. app/service/id_allocator.py), поэтому
+    ID известен до записи строки в БД и не повторяется между процессами.
+
+    Attributes:
+        name (str): Имя счетчика (обычно имя таблицы)
+        next_value (int): Первый еще не зарезервированный идентификатор
+    """
+    __tablename__ = "id_sequences"
+
+    name = Column(String, primary_key=True)
+    next_value = Column(Integer, nullable=False)
+
+
+__all__ = ["IdSequence"]
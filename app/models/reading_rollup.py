@@ -0,0 +1,117 @@
+"""Агрегаты показаний датчиков по интервалам времени.
+
+Графики за длинные периоды читают агрегаты вместо сырых показаний:
+30 дней по часам - это 720 строк на тип датчика вместо миллионов
+показаний.
+
+Classes:
+    ReadingRollup: SQLAlchemy модель агрегата показаний
+
+Functions:
+    rollup_from_readings_sql: Агрегация показаний партиции в reading_rollups
+"""
+
+from sqlalchemy import TextClause, text
+
+from app.enums.rollup_resolution import RollupResolution
+from app.models.base import Base, Column, String, Integer, Float, ForeignKey, Index
+from app.models.types import EpochMillis, SensorTypeCode
+
+
+class ReadingRollup(Base):
+    """Агрегат показаний устройства по типу датчика за один интервал.
+
+    Строки поддерживает движок агрегатов (app/service/rollup_engine.py):
+    новые показания сворачиваются в памяти и периодически добавляются
+    к строкам UPSERT'ом, поэтому агрегаты можно складывать (сумма
+    и количество вместо среднего).
+
+    Attributes:
+        device_id (str): ID устройства (внешний ключ)
+        resolution (str): Разрешение агрегата (RollupResolution: 1m, 1h, 1d)
+        sensor_type (str): Тип датчика, хранится кодом SensorTypeCode
+        bucket (datetime): Начало интервала
+        count (int): Количество показаний
+        min (float): Минимальное значение
+        max (float): Максимальное значение
+        sum (float): Сумма значений (среднее = sum / count)
+        last_value (float): Значение самого позднего показания
+        last_timestamp (datetime): Время самого позднего показания
+
+    Primary key:
+        (device_id, resolution, sensor_type, bucket) - таблица без rowid,
+        строки устройства одного разрешения лежат рядом и читаются
+        диапазоном по bucket.
+
+    Indexes:
+        ix_reading_rollups_resolution_bucket: (resolution, bucket) - удаление
+            устаревших агрегатов разрешения (app/service/retention_service.py)
+
+    Example:
+        >>> rollup = await db.get(ReadingRollup, ("abc123", "1h", "temperature", datetime(2025, 10, 4, 12)))
+        >>> rollup.sum / rollup.count
+        23.4
+    """
+    __tablename__ = "reading_rollups"
+    __table_args__ = (
+        Index("ix_reading_rollups_resolution_bucket", "resolution", "bucket"),
+        {"sqlite_with_rowid": False},
+    )
+
+    device_id = Column(String, ForeignKey("devices.id"), primary_key=True)
+    resolution = Column(String, primary_key=True)
+    sensor_type = Column(SensorTypeCode, primary_key=True)
+    bucket = Column(EpochMillis, primary_key=True)
+    count = Column(Integer, nullable=False)
+    min = Column(Float, nullable=False)
+    max = Column(Float, nullable=False)
+    sum = Column(Float, nullable=False)
+    last_value = Column(Float, nullable=False)
+    last_timestamp = Column(EpochMillis, nullable=False)
+
+
+def rollup_from_readings_sql(partition: str, resolution: RollupResolution) -> TextClause:
+    """Запрос агрегации показаний устройства из партиции в reading_rollups.
+
+    Агрегирует показания устройства :device_id с временем меньше :until
+    (миллисекунды). Существующий агрегат бакета заменяется, только если
+    по сырым показаниям в нем больше показаний: так восстанавливаются
+    агрегаты, не записанные движком (например, при аварийной остановке),
+    но не теряются агрегаты бакетов, сырые показания которых уже удалены.
+    Последнее значение бакета выбирается оконной функцией по времени.
+
+    Бакет должен целиком лежать до :until, поэтому :until выравнивается
+    по границе самого крупного бакета (суток).
+
+    Args:
+        partition (str): Имя партиции показаний
+        resolution (RollupResolution): Разрешение агрегатов
+
+    Returns:
+        TextClause: Запрос с параметрами :device_id и :until
+
+    Example:
+        >>> await db.execute(
+        ...     rollup_from_readings_sql("sensor_readings_202510", RollupResolution.HOUR),
+        ...     {"device_id": "abc123", "until": 1761955200000}
+        ... )
+    """
+    bucket = f"timestamp - timestamp % {resolution.millis}"
+    return text(
+        "INSERT INTO reading_rollups "
+        "(device_id, resolution, sensor_type, bucket, count, min, max, sum, last_value, last_timestamp) "
+        f"SELECT device_id, '{resolution.value}', sensor_type, bucket, count(*), min(value), max(value), "
+        "sum(value), last_value, max(timestamp) FROM ("
+        f"SELECT device_id, sensor_type, value, timestamp, {bucket} AS bucket, "
+        f"first_value(value) OVER (PARTITION BY sensor_type, {bucket} ORDER BY timestamp DESC, id DESC) "
+        f"AS last_value FROM {partition} WHERE device_id = :device_id AND timestamp < :until"
+        # WHERE true: без него SQLite не отличает ON CONFLICT от условия соединения
+        ") WHERE true GROUP BY device_id, sensor_type, bucket "
+        "ON CONFLICT (device_id, resolution, sensor_type, bucket) DO UPDATE SET "
+        "count = excluded.count, min = excluded.min, max = excluded.max, sum = excluded.sum, "
+        "last_value = excluded.last_value, last_timestamp = excluded.last_timestamp "
+        "WHERE excluded.count > reading_rollups.count"
+    )
+
+
+__all__ = ["ReadingRollup", "rollup_from_readings_sql"]
@@ -1,16 +1,35 @@
 """Модели показаний датчиков от IoT устройств.
 
 Этот модуль содержит модели для работы с данными датчиков,
-включая SQLAlchemy модель для базы данных и Pydantic схему для валидации.
+включая описание таблиц базы данных и Pydantic схемы для валидации.
+
+Показания хранятся в таблицах-партициях по календарным месяцам
+(sensor_readings_YYYYMM): устаревшие данные удаляются целой таблицей
+(DROP TABLE) вместо DELETE миллионов строк.
 
 Classes:
-    SensorReading: SQLAlchemy модель показания датчика в базе данных
     ReadingBase: Pydantic схема для создания нового показания
+    ReadingBatch: Pydantic схема пакетной загрузки показаний
+
+Functions:
+    reading_time_bounds: Допустимый интервал времени показания
+    partition_name: Имя партиции для времени показания
+    partition_bounds: Границы месяца партиции
+    is_partition_name: Проверка имени таблицы-партиции
+    sensor_readings_table: Описание таблицы-партиции показаний
+    reading_columns: Колонки показания в представлении API
 """
 
-from pydantic import BaseModel
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel, Field, field_validator
+from app.core.config import settings
 from app.enums.sensor_type import SensorType
-from app.models.base import Base, Column, String, Float, DateTime, ForeignKey, datetime, timezone, gen_id, gen_uuid, relationship
+from sqlalchemy import Table, select
+
+from app.models.base import Base, Column, String, Integer, Float, ForeignKey, Index, datetime
+from app.models.types import EpochMillis, SensorTypeCode
+from app.models.unit import Unit
 
 
 class ReadingBase(BaseModel):
@@ -23,6 +42,9 @@ class ReadingBase(BaseModel):
         sensor_type (SensorType): Тип датчика (temperature, humidity, alert)
         value (float): Числовое значение показания
         unit (str): Единица измерения (°C, %, lux, etc.)
+        timestamp (datetime, optional): Время измерения на устройстве.
+            Если не передано, используется время приема на сервере.
+            Время вне reading_time_bounds() отклоняется (422).
         
     Example:
         >>> reading_data = ReadingBase(
@@ -36,49 +58,170 @@ class ReadingBase(BaseModel):
     sensor_type: SensorType
     value: float
     unit: str
+    timestamp: Optional[datetime] = None
 
+    @field_validator("timestamp")
+    @classmethod
+    def _check_timestamp(cls, value: Optional[datetime]) -> Optional[datetime]:
+        if value is None:
+            return value
+        earliest, latest = reading_time_bounds()
+        # Часовой пояс отбрасывается так же, как при записи (datetime_to_millis)
+        if not earliest <= value.replace(tzinfo=None) <= latest:
+            raise ValueError(
+                f"Timestamp must be between {earliest.isoformat(timespec='seconds')} "
+                f"and {latest.isoformat(timespec='seconds')}"
+            )
+        return value
 
-class SensorReading(Base):
-    """Модель показания датчика в базе данных.
+
+class ReadingBatch(BaseModel):
+    """Схема пакетной загрузки показаний датчиков.
     
-    Представляет одно измерение, полученное от датчика IoT устройства.
-    Хранит числовое значение, тип датчика, единицу измерения и временную метку.
+    Устройства накапливают показания между сеансами связи и отправляют
+    их одним запросом. Пакет может содержать показания разных устройств.
     
     Attributes:
-        id (str): Уникальный идентификатор показания
+        readings (List[ReadingBase]): Список показаний
+            (от 1 до READINGS_BATCH_MAX_SIZE элементов)
+    """
+    readings: List[ReadingBase] = Field(..., min_length=1, max_length=settings.READINGS_BATCH_MAX_SIZE)
+
+
+def reading_time_bounds(now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """Допустимый интервал времени показания, переданного устройством.
+
+    Показание создает партицию своего месяца, поэтому время с неверных
+    часов устройства (1970 или 9999 год) отклоняется, а не создает таблицу,
+    которую затем просматривает каждый запрос показаний.
+
+    Args:
+        now (datetime, optional): Время приема (по умолчанию - текущее)
+
+    Returns:
+        Tuple[datetime, datetime]: [now - READING_MAX_AGE_DAYS (при включенном
+            удалении - не раньше RETENTION_RAW_DAYS), now + READING_MAX_FUTURE_SKEW]
+
+    Example:
+        >>> reading_time_bounds(datetime(2025, 10, 4, 12, 0))
+        (datetime(2025, 9, 3, 12, 0), datetime(2025, 10, 4, 12, 5))
+    """
+    now = now or datetime.now()
+    max_age_days = settings.READING_MAX_AGE_DAYS
+    if settings.RETENTION_ENABLED and settings.RETENTION_RAW_DAYS:
+        max_age_days = min(max_age_days, settings.RETENTION_RAW_DAYS)
+    return now - timedelta(days=max_age_days), now + timedelta(seconds=settings.READING_MAX_FUTURE_SKEW)
+
+
+# Таблицы показаний: sensor_readings_YYYYMM, одна на календарный месяц
+PARTITION_PREFIX = "sensor_readings_"
+
+_partition_tables: Dict[str, Table] = {}
+
+
+def partition_name(moment: datetime) -> str:
+    """Имя таблицы-партиции, в которую попадает показание с этим временем.
+
+    Example:
+        >>> partition_name(datetime(2025, 10, 4, 12, 0))
+        'sensor_readings_202510'
+    """
+    return f"{PARTITION_PREFIX}{moment.year:04d}{moment.month:02d}"
+
+
+def partition_bounds(name: str) -> Tuple[datetime, datetime]:
+    """Границы месяца партиции: [начало, начало следующего месяца).
+
+    Example:
+        >>> partition_bounds("sensor_readings_202512")
+        (datetime(2025, 12, 1, 0, 0), datetime(2026, 1, 1, 0, 0))
+    """
+    suffix = name[len(PARTITION_PREFIX):]
+    year, month = int(suffix[:4]), int(suffix[4:6])
+    start = datetime(year, month, 1)
+    end = datetime(year + month // 12, month % 12 + 1, 1)
+    return start, end
+
+
+def is_partition_name(name: str) -> bool:
+    """Проверка, что имя таблицы - имя партиции показаний (sensor_readings_YYYYMM)."""
+    suffix = name[len(PARTITION_PREFIX):]
+    return name.startswith(PARTITION_PREFIX) and len(suffix) == 6 and suffix.isdigit()
+
+
+def sensor_readings_table(name: str) -> Table:
+    """Описание таблицы-партиции показаний датчиков.
+
+    Каждая партиция хранит показания одного календарного месяца (по времени
+    показания) и имеет одинаковую структуру и собственные индексы. Строка
+    хранится компактно: целочисленный ID (alias rowid SQLite), код типа
+    датчика (SENSOR_TYPE_CODES), ссылка на справочник единиц и время
+    в миллисекундах. Колонки при чтении возвращают строки и datetime.
+
+    Описание регистрируется в Base.metadata при первом обращении, но сами
+    таблицы создаются по мере необходимости (app/service/reading_partitions.py),
+    а не в create_all() при запуске.
+
+    Columns:
+        id (int): Идентификатор показания, выдается IdAllocator до записи
         device_id (str): ID устройства-источника (внешний ключ)
-        sensor_type (str): Тип датчика (temperature, humidity, alert, etc.)
+        sensor_type (str): Тип датчика (temperature, humidity, alert, etc.),
+            хранится кодом SensorTypeCode
         value (float): Числовое значение показания (обязательное)
-        unit (str, optional): Единица измерения (°C, %, Pa, lux, etc.)
-        timestamp (datetime): Дата и время получения показания
-        
-    Relationships:
-        device (Device): Устройство, от которого получено показание
-        
+        unit_id (int, optional): ID единицы измерения в таблице units
+        timestamp (datetime): Дата и время показания, хранится EpochMillis
+
+    Indexes:
+        ix_<партиция>_device_type_ts: (device_id, sensor_type, timestamp) -
+            показания устройства по типу датчика за интервал
+        ix_<партиция>_device_ts: (device_id, timestamp) - последние
+            показания устройства, подсчет показаний устройства
+
+    Args:
+        name (str): Имя партиции (см. partition_name())
+
+    Returns:
+        Table: Описание таблицы (один объект на имя)
+
     Example:
-        >>> reading = SensorReading(
-        ...     device_id="abc123",
-        ...     sensor_type="temperature",
-        ...     value=23.5,
-        ...     unit="°C"
-        ... )
-        >>> db.add(reading)
-        >>> db.commit()
-        
-    Note:
-        Показания обычно создаются в больших количествах.
-        Рассмотрите использование bulk_insert_mappings() для оптимизации.
+        >>> table = sensor_readings_table(partition_name(datetime.now()))
+        >>> await db.execute(select(table.c.value).where(table.c.device_id == "abc123"))
     """
-    __tablename__ = "sensor_readings"
+    table = _partition_tables.get(name)
+    if table is None:
+        table = Table(
+            name,
+            Base.metadata,
+            Column("id", Integer, primary_key=True, autoincrement=False),
+            Column("device_id", String, ForeignKey("devices.id"), nullable=False),
+            Column("sensor_type", SensorTypeCode, nullable=False),
+            Column("value", Float, nullable=False),
+            Column("unit_id", Integer, ForeignKey("units.id"), nullable=True),
+            Column("timestamp", EpochMillis, nullable=False),
+            Index(f"ix_{name}_device_type_ts", "device_id", "sensor_type", "timestamp"),
+            Index(f"ix_{name}_device_ts", "device_id", "timestamp"),
+        )
+        _partition_tables[name] = table
+    return table
 
-    id = Column(String, primary_key=True, default=gen_uuid)
-    device_id = Column(String, ForeignKey("devices.id"), nullable=False)
-    sensor_type = Column(String, nullable=False)
-    value = Column(Float, nullable=False)
-    unit = Column(String, nullable=True)
-    timestamp = Column(DateTime, default=lambda: datetime.now())
 
-    device = relationship("Device", back_populates="readings")
+def reading_columns(table: Table) -> List[Any]:
+    """Колонки показания в представлении API (единица измерения - строкой).
+
+    Строки результата select(*reading_columns(table)) имеют атрибуты
+    id, device_id, sensor_type, value, unit, timestamp.
+    """
+    unit = select(Unit.symbol).where(Unit.id == table.c.unit_id).scalar_subquery().label("unit")
+    return [table.c.id, table.c.device_id, table.c.sensor_type, table.c.value, unit, table.c.timestamp]
 
 
-__all__ = ["SensorReading"]
+__all__ = [
+    "ReadingBase",
+    "ReadingBatch",
+    "PARTITION_PREFIX",
+    "partition_name",
+    "partition_bounds",
+    "is_partition_name",
+    "sensor_readings_table",
+    "reading_columns",
+]
@@ -0,0 +1,89 @@
+"""Компактные типы колонок для таблиц временных рядов.
+
+Типы хранят значения в виде небольших целых чисел, а в Python
+отдают привычные значения, поэтому модели и API работают
+с датами и строками, как с обычными DateTime/String колонками.
+
+Classes:
+    EpochMillis: datetime, хранимый как миллисекунды от 1970-01-01
+    SensorTypeCode: Тип датчика, хранимый как код из SENSOR_TYPE_CODES
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import BigInteger, SmallInteger
+from sqlalchemy.types import TypeDecorator
+
+from app.enums.sensor_type import SENSOR_TYPE_CODES, SENSOR_TYPES_BY_CODE, SensorType
+
+
+EPOCH = datetime(1970, 1, 1)
+ONE_MILLISECOND = timedelta(milliseconds=1)
+
+# Значение, которое возвращается для кода, отсутствующего в SensorType
+UNKNOWN_SENSOR_TYPE = "unknown"
+
+
+def datetime_to_millis(value: datetime) -> int:
+    """Преобразовать дату в миллисекунды от 1970-01-01.
+
+    Даты в приложении - локальное время без часового пояса (datetime.now()),
+    поэтому часы на стене переводятся в число как есть, без пересчета в UTC.
+    У дат с часовым поясом пояс отбрасывается, как это делал тип DateTime
+    SQLite. Точность - миллисекунды.
+
+    Example:
+        >>> datetime_to_millis(datetime(2025, 10, 4, 12, 0))
+        1759579200000
+    """
+    return (value.replace(tzinfo=None) - EPOCH) // ONE_MILLISECOND
+
+
+def millis_to_datetime(value: int) -> datetime:
+    """Обратное преобразование для datetime_to_millis()."""
+    return EPOCH + timedelta(milliseconds=value)
+
+
+class EpochMillis(TypeDecorator):
+    """datetime, хранимый целым числом миллисекунд (8 байт вместо строки 26 байт).
+
+    Сравнения в запросах (timestamp >= cutoff) выполняются над целыми
+    числами и используют индексы так же, как с DateTime.
+    """
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[datetime], dialect) -> Optional[int]:
+        if value is None:
+            return None
+        return datetime_to_millis(value)
+
+    def process_result_value(self, value: Optional[int], dialect) -> Optional[datetime]:
+        if value is None:
+            return None
+        return millis_to_datetime(value)
+
+
+class SensorTypeCode(TypeDecorator):
+    """Тип датчика, хранимый кодом SENSOR_TYPE_CODES (1 байт вместо строки).
+
+    Принимает SensorType или его строковое значение, возвращает строку
+    ("temperature"), как колонка String до перехода на коды.
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect) -> Optional[int]:
+        if value is None:
+            return None
+        return SENSOR_TYPE_CODES[SensorType(value)]
+
+    def process_result_value(self, value: Optional[int], dialect) -> Optional[str]:
+        if value is None:
+            return None
+        sensor_type = SENSOR_TYPES_BY_CODE.get(value)
+        return sensor_type.value if sensor_type is not None else UNKNOWN_SENSOR_TYPE
+
+
+__all__ = ["EpochMillis", "SensorTypeCode", "datetime_to_millis", "millis_to_datetime"]
@@ -0,0 +1,30 @@
+"""Справочник единиц измерения показаний.
+
+Каждое показание ссылается на единицу измерения по небольшому целому ID
+вместо того, чтобы повторять строку ("°C", "%") в каждой строке
+sensor_readings.
+
+Classes:
+    Unit: SQLAlchemy модель единицы измерения
+"""
+
+from app.models.base import Base, Column, String, Integer
+
+
+class Unit(Base):
+    """Единица измерения показаний датчиков.
+
+    Записи добавляются автоматически при первом показании с новой
+    единицей (см. app/service/unit_registry.py) и не удаляются.
+
+    Attributes:
+        id (int): Идентификатор единицы
+        symbol (str): Обозначение единицы (°C, %, lux, etc.), уникально
+    """
+    __tablename__ = "units"
+
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String, nullable=False, unique=True)
+
+
+__all__ = ["Unit"]
@@ -0,0 +1,63 @@
+"""Сервис записи и публикации оповещений.
+
+Общий путь для оповещений, созданных через API и сервером (правила
+порогов и детектор аномалий): запись вместе со счетчиком оповещений
+устройства в одной транзакции и публикация в шину событий после commit.
+
+Functions:
+    publish_alert: Публикация оповещения в шину событий
+    save_alerts: Запись оповещений одной транзакцией с публикацией
+"""
+
+from collections import Counter
+from typing import List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.enums.event_type import EventType
+from app.models.alert import Alert
+from app.models.device_stats import DeviceStats
+from app.service.data_versions import data_versions
+from app.service.device_stats import add_device_counts
+from app.service.event_bus import event_bus
+
+
+def publish_alert(alert: Alert, action: str) -> None:
+    """Опубликовать оповещение в шину событий после commit.
+
+    Args:
+        alert (Alert): Записанное оповещение
+        action (str): Действие ("created" или "status_changed")
+    """
+    event_bus.publish(EventType.ALERT, alert.device_id, {
+        "action": action,
+        "id": alert.id,
+        "alert_type": alert.alert_type,
+        "message": alert.message,
+        "severity": alert.severity,
+        "status": alert.status,
+        "timestamp": alert.timestamp,
+    })
+
+
+async def save_alerts(db: AsyncSession, alerts: List[Alert]) -> None:
+    """Записать оповещения одной транзакцией и опубликовать их.
+
+    Увеличивает счетчики оповещений устройств (device_stats) в той же
+    транзакции и выполняет commit.
+
+    Args:
+        db (AsyncSession): Сессия базы данных (соединение на запись)
+        alerts (List[Alert]): Новые оповещения
+
+    Example:
+        >>> await save_alerts(db, [Alert(device_id="abc123", alert_type="temperature", ...)])
+    """
+    if not alerts:
+        return
+    db.add_all(alerts)
+    await add_device_counts(db, DeviceStats.alerts_count, Counter(alert.device_id for alert in alerts))
+    await db.commit()
+    await data_versions.bump({alert.device_id for alert in alerts})
+    for alert in alerts:
+        publish_alert(alert, "created")
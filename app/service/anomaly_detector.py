@@ -0,0 +1,342 @@
+"""Потоковый детектор аномалий показаний (EWMA / z-score).
+
+Для каждой пары (устройство, тип датчика) поддерживаются экспоненциально
+взвешенные среднее и дисперсия (EWMA, коэффициент ANOMALY_ALPHA).
+Каждое записанное показание обновляет состояние за O(1):
+
+    delta = x - mean
+    z = delta / max(sqrt(var), ANOMALY_MIN_STD)
+    mean = mean + alpha * delta
+    var = (1 - alpha) * (var + alpha * delta ** 2)
+
+z-score считается относительно состояния до показания. Кроме него
+хранится скорость изменения (единиц в секунду между двумя последними
+показаниями). Первые ANOMALY_WARMUP показаний потока только обучают
+состояние. Когда |z| достигает ANOMALY_Z_THRESHOLD, создается оповещение
+AlertType.ANOMALY; следующее оповещение потока возможно после того,
+как |z| опустится ниже половины порога.
+
+Состояния всех потоков хранятся в одном структурированном массиве NumPy
+(около 40 байт на поток). При запуске состояние восстанавливается
+из показаний последних ANOMALY_BACKFILL_HOURS часов векторно:
+рекуррентности EWMA решаются блоками (ewma_series()).
+
+Classes:
+    AnomalyDetector: Детектор аномалий потоков показаний
+
+Functions:
+    ewma_series: Среднее, дисперсия и z-score EWMA для ряда значений (NumPy)
+
+Variables:
+    anomaly_detector: Глобальный экземпляр (None, если детектор отключен)
+"""
+
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.enums.alert_status import AlertStatus
+from app.enums.alert_type import AlertType
+from app.enums.sensor_type import SENSOR_TYPES_BY_CODE, SensorType
+from app.models.alert import Alert
+from app.models.device import Device
+from app.models.types import datetime_to_millis, millis_to_datetime
+from app.service.alert_service import save_alerts
+from app.service.reading_aggregates import reading_arrays
+
+# Типы датчиков с непрерывными значениями (датчик тревоги - бинарный)
+ANOMALY_SENSOR_TYPES = {SensorType.TEMPERATURE.value, SensorType.HUMIDITY.value, SensorType.FIRE.value}
+
+# Состояние потока: EWMA среднее и дисперсия, последнее показание,
+# количество показаний, z-score и скорость изменения последнего показания
+STATE_DTYPE = np.dtype([
+    ("mean", np.float64),
+    ("var", np.float64),
+    ("last_value", np.float64),
+    ("last_timestamp", np.int64),
+    ("count", np.uint32),
+    ("score", np.float32),
+    ("rate", np.float32),
+    ("anomalous", np.bool_),
+])
+
+
+def _linear_recurrence(initial: float, inputs: np.ndarray, beta: float) -> np.ndarray:
+    """Решение y[n] = beta * y[n - 1] + inputs[n] векторно блоками.
+
+    Внутри блока y[j] = beta^j * (y0 + cumsum(inputs[k] / beta^k)); длина
+    блока ограничена так, чтобы beta^j не опускалась ниже 1e-3 и деление
+    не теряло точность. При beta = 0 (alpha = 1) y[n] = inputs[n].
+    """
+    if beta == 0:
+        return np.asarray(inputs, dtype=np.float64).copy()
+    block = max(1, int(math.log(1e-3) / math.log(beta))) if 0 < beta < 1 else len(inputs) or 1
+    powers = beta ** np.arange(1, block + 1)
+    result = np.empty(len(inputs))
+    previous = initial
+    for start in range(0, len(inputs), block):
+        chunk = inputs[start:start + block]
+        scale = powers[:len(chunk)]
+        values = scale * (previous + np.cumsum(chunk / scale))
+        result[start:start + len(chunk)] = values
+        previous = values[-1]
+    return result
+
+
+def ewma_series(
+    values: np.ndarray,
+    alpha: float,
+    min_std: float,
+    warmup: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Среднее, дисперсия и z-score EWMA после каждого значения ряда.
+
+    Результат совпадает с последовательным обновлением AnomalyDetector,
+    начатым с пустого состояния.
+
+    Args:
+        values (np.ndarray): Значения по возрастанию времени
+        alpha (float): Коэффициент сглаживания (0 < alpha <= 1)
+        min_std (float): Нижняя граница стандартного отклонения для z-score
+        warmup (int): Количество первых значений без z-score
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Среднее и дисперсия после
+            каждого значения и z-score каждого значения относительно
+            состояния перед ним
+
+    Example:
+        >>> means, variances, scores = ewma_series(np.array([20.0, 20.5, 21.0, 35.0]), 0.1, 0.1, 3)
+        >>> round(float(scores[-1]), 1)
+        46.6
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return np.empty(0), np.empty(0), np.empty(0)
+    beta = 1 - alpha
+    means = np.concatenate(([values[0]], _linear_recurrence(values[0], alpha * values[1:], beta)))
+    deltas = values[1:] - means[:-1]
+    variances = np.concatenate(([0.0], _linear_recurrence(0.0, beta * alpha * deltas * deltas, beta)))
+    scores = np.zeros(len(values))
+    scores[1:] = deltas / np.maximum(np.sqrt(variances[:-1]), min_std)
+    scores[:warmup] = 0.0
+    return means, variances, scores
+
+
+class AnomalyDetector:
+    """Детектор аномалий потоков показаний (EWMA / z-score).
+
+    Attributes:
+        alpha (float): Коэффициент сглаживания EWMA
+        z_threshold (float): |z|, начиная с которого показание аномально
+        min_std (float): Нижняя граница стандартного отклонения
+        warmup (int): Показаний потока до начала оценки
+    """
+
+    def __init__(self, alpha: float, z_threshold: float, min_std: float, warmup: int):
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.min_std = min_std
+        self.warmup = warmup
+        self._states = np.zeros(64, dtype=STATE_DTYPE)
+        self._slots: Dict[Tuple[str, str], int] = {}
+        self._free: List[int] = []
+        self.evaluated = 0
+        self.alerts_created = 0
+        self.backfilled_readings = 0
+        self.errors = 0
+
+    def _slot(self, key: Tuple[str, str]) -> int:
+        slot = self._slots.get(key)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot = len(self._slots)
+                if slot == len(self._states):
+                    self._states = np.concatenate((self._states, np.zeros(len(self._states), dtype=STATE_DTYPE)))
+            self._states[slot] = 0
+            self._slots[key] = slot
+        return slot
+
+    def _alert(self, row: Dict[str, Any], score: float, mean: float, std: float) -> Alert:
+        unit = f" {row['unit']}" if row["unit"] else ""
+        return Alert(
+            device_id=row["device_id"],
+            alert_type=AlertType.ANOMALY.value,
+            code=row["sensor_type"],
+            message=(
+                f"Аномальное показание {row['sensor_type']} {row['value']}{unit}: "
+                f"z = {score:.1f} (среднее {mean:.2f}, σ {std:.2f})"
+            ),
+            severity="medium",
+            status=AlertStatus.NEW.value
+        )
+
+    def _check(self, row: Dict[str, Any]) -> Optional[Alert]:
+        """Обновить поток показанием; оповещение, если поток стал аномальным.
+
+        Запись состояния читается и записывается целиком (одно обращение
+        к массиву вместо обращения к каждому полю).
+        """
+        slot = self._slot((row["device_id"], row["sensor_type"]))
+        mean, var, last_value, last_timestamp, count, score, rate, anomalous = self._states[slot].item()
+        value = row["value"]
+        timestamp = datetime_to_millis(row["timestamp"])
+        if count and timestamp < last_timestamp:
+            # Показание старше последнего (загрузка истории) не меняет состояние
+            return None
+        if count == 0:
+            next_mean, next_var, score, rate = value, 0.0, 0.0, 0.0
+        else:
+            delta = value - mean
+            score = delta / max(math.sqrt(var), self.min_std) if count >= self.warmup else 0.0
+            elapsed = (timestamp - last_timestamp) / 1000
+            rate = (value - last_value) / elapsed if elapsed > 0 else 0.0
+            next_mean = mean + self.alpha * delta
+            next_var = (1 - self.alpha) * (var + self.alpha * delta * delta)
+
+        alert = None
+        if abs(score) >= self.z_threshold:
+            if not anomalous:
+                anomalous = True
+                alert = self._alert(row, score, mean, math.sqrt(var))
+        elif abs(score) < self.z_threshold / 2:
+            anomalous = False
+        self._states[slot] = (next_mean, next_var, value, timestamp, count + 1, score, rate, anomalous)
+        return alert
+
+    async def evaluate(self, db: AsyncSession, rows: List[Dict[str, Any]]) -> List[Alert]:
+        """Обновить потоки записанными показаниями и записать оповещения об аномалиях.
+
+        Вызывается после commit показаний. Ошибка записи оповещений
+        не прерывает прием: она учитывается в счетчике errors, а признак
+        аномалии потоков, по которым оповещение не записано, сбрасывается.
+
+        Args:
+            db (AsyncSession): Сессия базы данных (соединение на запись)
+            rows (List[Dict[str, Any]]): Строки показаний после commit
+
+        Returns:
+            List[Alert]: Созданные оповещения
+        """
+        checked = [row for row in rows if row["sensor_type"] in ANOMALY_SENSOR_TYPES]
+        alerts = []
+        alerted = set()
+        for row in sorted(checked, key=lambda row: row["timestamp"]):
+            alert = self._check(row)
+            if alert is not None:
+                alerts.append(alert)
+                alerted.add((row["device_id"], row["sensor_type"]))
+        self.evaluated += len(checked)
+        try:
+            await save_alerts(db, alerts)
+        except Exception as e:
+            self.errors += 1
+            print(f"Error saving anomaly alerts: {e}")
+            await db.rollback()
+            # Оповещение не записано: следующее аномальное показание создаст его снова
+            for key in alerted:
+                self._states[self._slots[key]]["anomalous"] = False
+            return []
+        self.alerts_created += len(alerts)
+        return alerts
+
+    def scores(self, device_id: str) -> Dict[str, Dict[str, Any]]:
+        """Текущее состояние потоков устройства.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Тип датчика -> mean, std, score (z-score
+                последнего показания), rate (единиц в секунду), anomalous,
+                count, last_value, timestamp
+
+        Example:
+            >>> anomaly_detector.scores("abc123")
+            {"temperature": {"mean": 23.1, "std": 0.4, "score": 0.8, "rate": 0.01,
+                             "anomalous": False, "count": 86400, "last_value": 23.4, ...}}
+        """
+        result = {}
+        for (stream_device_id, sensor_type), slot in sorted(self._slots.items()):
+            if stream_device_id != device_id:
+                continue
+            state = self._states[slot]
+            result[sensor_type] = {
+                "mean": float(state["mean"]),
+                "std": math.sqrt(float(state["var"])),
+                "score": float(state["score"]),
+                "rate": float(state["rate"]),
+                "anomalous": bool(state["anomalous"]),
+                "count": int(state["count"]),
+                "last_value": float(state["last_value"]),
+                "timestamp": millis_to_datetime(int(state["last_timestamp"])),
+            }
+        return result
+
+    def forget(self, device_id: str) -> None:
+        """Удалить потоки устройства (при удалении устройства)."""
+        for key in [key for key in self._slots if key[0] == device_id]:
+            self._free.append(self._slots.pop(key))
+
+    def _restore(self, key: Tuple[str, str], timestamps: np.ndarray, values: np.ndarray) -> None:
+        """Восстановить состояние потока по истории (ewma_series())."""
+        means, variances, scores = ewma_series(values, self.alpha, self.min_std, self.warmup)
+        slot = self._slot(key)
+        state = self._states[slot]
+        state["mean"] = means[-1]
+        state["var"] = variances[-1]
+        state["last_value"] = values[-1]
+        state["last_timestamp"] = timestamps[-1]
+        state["count"] = len(values)
+        state["score"] = scores[-1]
+        elapsed = (timestamps[-1] - timestamps[-2]) / 1000 if len(values) > 1 else 0
+        state["rate"] = (values[-1] - values[-2]) / elapsed if elapsed > 0 else 0.0
+        # Продолжающаяся аномалия не создает оповещение после перезапуска
+        state["anomalous"] = abs(scores[-1]) >= self.z_threshold
+
+    async def backfill(self, db: AsyncSession) -> int:
+        """Восстановить состояния потоков из показаний последних ANOMALY_BACKFILL_HOURS часов.
+
+        Вызывается при запуске до начала приема показаний.
+
+        Returns:
+            int: Количество обработанных показаний
+        """
+        since = datetime.now() - timedelta(hours=settings.ANOMALY_BACKFILL_HOURS)
+        loaded = 0
+        for device_id in (await db.scalars(select(Device.id))).all():
+            rows = await reading_arrays(db, device_id, since)
+            codes = rows[:, 0].astype(np.int64)
+            for code in np.unique(codes).tolist():
+                sensor = SENSOR_TYPES_BY_CODE.get(code)
+                if sensor is None or sensor.value not in ANOMALY_SENSOR_TYPES:
+                    continue
+                stream = rows[codes == code]
+                stream = stream[np.argsort(stream[:, 1], kind="stable")]
+                self._restore((device_id, sensor.value), stream[:, 1].astype(np.int64), stream[:, 2])
+                loaded += len(stream)
+        self.backfilled_readings += loaded
+        return loaded
+
+    def stats(self) -> Dict[str, Any]:
+        """Количество потоков, объем состояния и счетчики оповещений."""
+        active = self._states[list(self._slots.values())] if self._slots else self._states[:0]
+        return {
+            "streams": len(self._slots),
+            "anomalous_streams": int(active["anomalous"].sum()),
+            "state_bytes": self._states.nbytes,
+            "evaluated": self.evaluated,
+            "alerts_created": self.alerts_created,
+            "backfilled_readings": self.backfilled_readings,
+            "errors": self.errors,
+        }
+
+
+# Глобальный экземпляр детектора аномалий (None, если отключен)
+anomaly_detector = AnomalyDetector(
+    settings.ANOMALY_ALPHA, settings.ANOMALY_Z_THRESHOLD, settings.ANOMALY_MIN_STD, settings.ANOMALY_WARMUP
+) if settings.ANOMALY_ENABLED else None
@@ -0,0 +1,100 @@
+"""Условные запросы HTTP (ETag / If-None-Match / Last-Modified).
+
+ETag ответа строится из версии данных устройства (data_versions)
+и нормализованных параметров запроса, поэтому вычисляется до чтения
+данных: если клиент передал тот же ETag в If-None-Match, эндпоинт
+сразу отвечает 304 без тела и без запросов к БД. Версия увеличивается
+при каждом изменении данных устройства, поэтому совпадение ETag
+означает, что ответ не изменился (сильный ETag). Если версии
+недоступны (Redis недоступен), ответ отдается без ETag.
+
+Ответы с окном, отсчитываемым от текущего момента (timeframe), меняются
+и без изменения данных: для них в параметры добавляется номер интервала
+window_slot(), и ETag меняется раз в QUERY_CACHE_TTL секунд.
+
+Functions:
+    make_etag: ETag по версии данных и параметрам запроса
+    etag_matches: Проверка заголовка If-None-Match
+    window_slot: Номер интервала для ответов с окном от текущего момента
+    not_modified: Ответ 304
+    set_validators: Заголовки ETag и Last-Modified ответа
+"""
+
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Any, Dict, Optional
+
+from fastapi import Response
+
+from app.core.config import settings
+
+
+def make_etag(scope: str, version: Optional[str], params: Dict[str, Any]) -> Optional[str]:
+    """ETag ответа по версии данных устройства и параметрам запроса.
+
+    Args:
+        scope (str): Эндпоинт (например, "readings", "alerts")
+        version (str, optional): Версия данных устройства (data_versions.version())
+        params (Dict[str, Any]): Параметры запроса
+
+    Returns:
+        Optional[str]: ETag в кавычках или None, если версии недоступны
+            (ответ отдается без ETag)
+
+    Example:
+        >>> make_etag("alerts", "9f2c41d07a3e5b18.3.1042", {"status": None, "limit": 10})
+        '"alerts-9f2c41d07a3e5b18.3.1042-5f0c2e9a7b1d3c48"'
+    """
+    if version is None:
+        return None
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return f'"{scope}-{version}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """Совпадает ли ETag с одним из значений заголовка If-None-Match.
+
+    Для If-None-Match используется слабое сравнение: префикс W/ не учитывается.
+    """
+    if not if_none_match or etag is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        value.strip().removeprefix("W/") == etag
+        for value in if_none_match.split(",")
+    )
+
+
+def window_slot() -> int:
+    """Номер интервала QUERY_CACHE_TTL секунд для ответов с окном от текущего момента."""
+    return int(time.time() // max(settings.QUERY_CACHE_TTL, 1.0))
+
+
+def not_modified(etag: str) -> Response:
+    """Ответ 304 без тела с тем же ETag."""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def set_validators(response: Response, etag: Optional[str], last_modified: Optional[datetime] = None) -> None:
+    """Добавить к ответу ETag и Last-Modified.
+
+    Cache-Control: no-cache требует от клиента проверять ответ
+    (If-None-Match) перед каждым повторным использованием.
+
+    Args:
+        response (Response): Ответ эндпоинта
+        etag (str, optional): ETag (make_etag()); None - без ETag
+        last_modified (datetime, optional): Время самой новой записи ответа
+            (локальное время сервера)
+    """
+    if etag is not None:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+    if last_modified is not None:
+        response.headers["Last-Modified"] = format_datetime(
+            last_modified.astimezone(timezone.utc), usegmt=True
+        )
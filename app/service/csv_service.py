@@ -9,30 +9,30 @@ Functions:
 
 import csv
 from io import StringIO
-from typing import List
-from app.models.sensor_reading import SensorReading
+from typing import Any, Sequence
 
 
-def export_sensor_readings_to_csv(readings: List[SensorReading]) -> str:
+def export_sensor_readings_to_csv(readings: Sequence[Any], include_header: bool = True) -> str:
     """Экспортирует список показаний датчиков в CSV формат.
     
     Создает CSV-строку с данными показаний датчиков, включая заголовки.
     Формат включает: ID, Device ID, Sensor Type, Value, Unit, Timestamp.
     
     Args:
-        readings (List[SensorReading]): Список показаний датчиков для экспорта
+        readings (Sequence[Row]): Показания датчиков для экспорта
+            (строки результата select(*reading_columns(table)))
+        include_header (bool): Добавлять ли строку заголовков. При потоковом
+            экспорте заголовок нужен только в первой порции
         
     Returns:
         str: CSV-строка с данными показаний датчиков
         
     Example:
-        >>> readings = db.query(SensorReading).filter(
-        ...     SensorReading.device_id == "device_123"
-        ... ).all()
+        >>> readings = await latest_readings(db, "device_123", 100)
         >>> csv_data = export_sensor_readings_to_csv(readings)
         >>> print(csv_data)
         id,device_id,sensor_type,value,unit,timestamp
-        abc-123,device_123,temperature,23.5,°C,2024-01-15 10:30:00
+        1001,device_123,temperature,23.5,°C,2024-01-15 10:30:00
         
     Note:
         CSV использует запятую в качестве разделителя.
@@ -55,7 +55,8 @@ def export_sensor_readings_to_csv(readings: List[SensorReading]) -> str:
     writer = csv.DictWriter(output, fieldnames=fieldnames)
     
     # Записываем заголовки
-    writer.writeheader()
+    if include_header:
+        writer.writeheader()
     
     # Записываем данные
     for reading in readings:
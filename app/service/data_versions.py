@@ -0,0 +1,159 @@
+"""Версии данных устройств для кэширования результатов запросов.
+
+У каждого устройства есть счетчик версии, который увеличивается при
+любом изменении его данных: записи показаний, создании оповещения или
+смене его статуса, изменении устройства, его значений и команд, удалении
+устройства. Общий счетчик (эпоха) увеличивается при изменениях,
+затрагивающих все устройства (очистка по сроку хранения). Результат
+запроса, сохраненный с версией устройства, становится недостижимым
+сразу после ее увеличения, поэтому инвалидация выполняется за O(1)
+без перебора кэша.
+
+При DATA_VERSIONS_REDIS версии хранятся в Redis (ключи data:version:{device_id}
+через RedisClient), чтобы изменение, принятое одним процессом, видели все
+процессы. Версия включает случайный токен, созданный в Redis при первом
+обращении (SET NX): если Redis потерял данные, счетчики начинаются заново,
+но с новым токеном. Пока Redis недоступен, версий нет (get() возвращает
+None): счетчики процесса не видят изменений, принятых другими процессами,
+поэтому кэш результатов и ETag не используются. После восстановления
+Redis увеличивается эпоха: изменения, принятые процессом за время
+недоступности, не пропадают.
+
+Без DATA_VERSIONS_REDIS (один процесс приложения) используются счетчики
+в памяти процесса; их версии включают случайный токен запуска.
+
+Classes:
+    DataVersions: Версии данных устройств
+
+Variables:
+    data_versions: Глобальный экземпляр версий
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import redis
+
+from app.core.config import settings
+from app.db.redis_client import redis_client
+
+# Имя общего счетчика (не совпадает с ID устройств)
+EPOCH = "__epoch__"
+
+
+class DataVersions:
+    """Версии данных устройств.
+
+    Attributes:
+        use_redis (bool): Хранить версии в Redis (иначе только в памяти процесса,
+                          для одного процесса приложения)
+        redis_retry (float): Пауза перед повторным обращением к Redis
+                             после ошибки, секунды
+    """
+
+    def __init__(self, use_redis: bool, redis_retry: float):
+        self.use_redis = use_redis
+        self.redis_retry = redis_retry
+        # Версии в памяти процесса отличаются от версий прошлых запусков
+        self._boot = os.urandom(8).hex()
+        self._local: Dict[str, int] = {}
+        self._redis_retry_at = 0.0
+        self._resync = False
+        self.bumps = 0
+        self.redis_errors = 0
+        self.unavailable_reads = 0
+
+    def _redis_available(self) -> bool:
+        return self.use_redis and time.monotonic() >= self._redis_retry_at
+
+    async def _call_redis(self, method: Callable, *args: Any) -> Any:
+        """Вызвать метод RedisClient в потоке; при ошибке отложить обращения к Redis."""
+        try:
+            return await asyncio.to_thread(method, *args)
+        except redis.RedisError as e:
+            self.redis_errors += 1
+            self._redis_retry_at = time.monotonic() + self.redis_retry
+            self._resync = True
+            print(f"Error accessing data versions in Redis: {e}")
+            raise
+
+    async def bump(self, device_ids: Iterable[str]) -> None:
+        """Увеличить версии устройств (после commit изменения их данных).
+
+        Args:
+            device_ids (Iterable[str]): ID устройств с измененными данными
+        """
+        names = list(dict.fromkeys(device_ids))
+        if not names:
+            return
+        self.bumps += len(names)
+        if not self.use_redis:
+            for name in names:
+                self._local[name] = self._local.get(name, 0) + 1
+        elif self._redis_available():
+            try:
+                await self._call_redis(redis_client.incr_data_versions, names)
+            except redis.RedisError:
+                pass
+        else:
+            # Изменение не попало в Redis: после восстановления увеличивается эпоха
+            self._resync = True
+
+    async def bump_all(self) -> None:
+        """Увеличить общий счетчик (изменение данных всех устройств)."""
+        await self.bump([EPOCH])
+
+    async def get(self, device_ids: Iterable[str]) -> Optional[Dict[str, str]]:
+        """Текущие версии устройств.
+
+        Args:
+            device_ids (Iterable[str]): ID устройств
+
+        Returns:
+            Optional[Dict[str, str]]: device_id -> версия (строка, включающая
+                токен и эпоху) или None, если версии сейчас недоступны
+                (Redis недоступен) и результаты нельзя кэшировать
+
+        Example:
+            >>> await data_versions.get(["abc123"])
+            {"abc123": "9f2c41d07a3e5b18.3.1042"}
+        """
+        names = list(dict.fromkeys(device_ids))
+        if not self.use_redis:
+            epoch = self._local.get(EPOCH, 0)
+            return {name: f"{self._boot}.{epoch}.{self._local.get(name, 0)}" for name in names}
+        if not self._redis_available():
+            self.unavailable_reads += 1
+            return None
+        try:
+            if self._resync:
+                await self._call_redis(redis_client.incr_data_versions, [EPOCH])
+                self._resync = False
+            token, versions = await self._call_redis(
+                redis_client.get_data_versions, [EPOCH] + names, os.urandom(8).hex()
+            )
+        except redis.RedisError:
+            self.unavailable_reads += 1
+            return None
+        return {name: f"{token}.{versions[EPOCH]}.{versions[name]}" for name in names}
+
+    async def version(self, device_id: str) -> Optional[str]:
+        """Текущая версия устройства (None, если версии недоступны)."""
+        versions = await self.get([device_id])
+        return versions[device_id] if versions is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики увеличения версий и обращений к Redis."""
+        return {
+            "redis": self.use_redis,
+            "redis_available": self._redis_available(),
+            "bumps": self.bumps,
+            "redis_errors": self.redis_errors,
+            "unavailable_reads": self.unavailable_reads,
+        }
+
+
+# Глобальный экземпляр версий данных
+data_versions = DataVersions(settings.DATA_VERSIONS_REDIS, settings.DATA_VERSIONS_REDIS_RETRY)
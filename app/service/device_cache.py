@@ -0,0 +1,186 @@
+"""Кэш устройств для проверки существования и метаданных.
+
+Почти каждый эндпоинт начинается с проверки, что устройство существует.
+Кэш хранит облегченные записи устройств (без last_seen и meta) в памяти
+процесса с ограничением по размеру (LRU) и времени жизни (TTL), поэтому
+повторные запросы к одному устройству не обращаются к БД.
+
+Неизвестные ID тоже кэшируются (с отдельным, более коротким TTL), чтобы
+неправильно настроенное устройство, отправляющее данные с несуществующим
+ID, не создавало запрос к БД на каждое обращение.
+
+Эндпоинты создания, изменения и удаления устройства обновляют кэш явно.
+Кэш работает в пределах процесса: изменения, сделанные другим процессом,
+становятся видны после истечения TTL.
+
+Classes:
+    CachedDevice: Облегченная запись устройства
+    DeviceCache: TTL/LRU кэш устройств
+
+Variables:
+    device_cache: Глобальный экземпляр кэша
+"""
+
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.device import Device
+
+
+# Ограничение количества параметров SQLite в одном запросе
+LOOKUP_CHUNK_SIZE = 500
+
+
+class CachedDevice(NamedTuple):
+    """Облегченная запись устройства, достаточная для проверок и ответов API."""
+    id: str
+    name: str
+    location: Optional[str]
+    status: Optional[str]
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_model(cls, device: Device) -> "CachedDevice":
+        return cls(device.id, device.name, device.location, device.status, device.created_at)
+
+
+class DeviceCache:
+    """TTL/LRU кэш устройств с кэшированием отсутствующих ID.
+
+    Args:
+        max_size (int): Максимальное количество записей
+        ttl (float): Время жизни записи существующего устройства, секунды
+        negative_ttl (float): Время жизни записи отсутствующего ID, секунды
+    """
+
+    def __init__(self, max_size: int, ttl: float, negative_ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[str, Tuple[float, Optional[CachedDevice]]]" = OrderedDict()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, device_id: str) -> Tuple[bool, Optional[CachedDevice]]:
+        entry = self._entries.get(device_id)
+        if entry is None:
+            return False, None
+        expires_at, device = entry
+        if expires_at < time.monotonic():
+            del self._entries[device_id]
+            return False, None
+        self._entries.move_to_end(device_id)
+        if device is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return True, device
+
+    def _store(self, device_id: str, device: Optional[CachedDevice]) -> None:
+        ttl = self.ttl if device is not None else self.negative_ttl
+        self._entries[device_id] = (time.monotonic() + ttl, device)
+        self._entries.move_to_end(device_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get(self, db: AsyncSession, device_id: str) -> Optional[CachedDevice]:
+        """Получить устройство из кэша или БД.
+
+        Args:
+            db (AsyncSession): Сессия для загрузки при промахе
+            device_id (str): ID устройства
+
+        Returns:
+            CachedDevice или None, если устройство не существует
+
+        Example:
+            >>> device = await device_cache.get(db, device_id)
+            >>> if not device:
+            ...     raise HTTPException(status_code=404, detail="Device not found")
+        """
+        found, device = self._lookup(device_id)
+        if found:
+            return device
+        self.misses += 1
+        model = await db.get(Device, device_id)
+        device = CachedDevice.from_model(model) if model is not None else None
+        self._store(device_id, device)
+        return device
+
+    async def get_many(self, db: AsyncSession, device_ids: Iterable[str]) -> Dict[str, CachedDevice]:
+        """Получить существующие устройства из набора ID.
+
+        Промахи загружаются из БД одним запросом на порцию ID.
+
+        Returns:
+            Dict[str, CachedDevice]: Найденные устройства по ID
+        """
+        found_devices: Dict[str, CachedDevice] = {}
+        missing = []
+        for device_id in set(device_ids):
+            found, device = self._lookup(device_id)
+            if not found:
+                missing.append(device_id)
+            elif device is not None:
+                found_devices[device_id] = device
+
+        self.misses += len(missing)
+        for start in range(0, len(missing), LOOKUP_CHUNK_SIZE):
+            chunk = missing[start:start + LOOKUP_CHUNK_SIZE]
+            loaded = {
+                row.id: CachedDevice(*row)
+                for row in await db.execute(
+                    select(Device.id, Device.name, Device.location, Device.status, Device.created_at)
+                    .where(Device.id.in_(chunk))
+                )
+            }
+            for device_id in chunk:
+                self._store(device_id, loaded.get(device_id))
+            found_devices.update(loaded)
+        return found_devices
+
+    def peek(self, device_id: str) -> Optional[CachedDevice]:
+        """Получить устройство только из кэша, без обращения к БД."""
+        return self._lookup(device_id)[1]
+
+    def put(self, device: Device) -> None:
+        """Сохранить созданное или измененное устройство (заменяет отрицательную запись)."""
+        self._store(device.id, CachedDevice.from_model(device))
+
+    def invalidate(self, device_id: str) -> None:
+        """Удалить запись устройства из кэша."""
+        self._entries.pop(device_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики кэша.
+
+        Returns:
+            Dict[str, Any]: Размер, попадания, промахи и доля попаданий
+        """
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.hits + self.negative_hits) / lookups, 4) if lookups else None,
+        }
+
+
+# Глобальный экземпляр кэша устройств
+device_cache = DeviceCache(
+    settings.DEVICE_CACHE_SIZE,
+    settings.DEVICE_CACHE_TTL,
+    settings.DEVICE_CACHE_NEGATIVE_TTL,
+)
@@ -0,0 +1,202 @@
+"""Счетчики записей устройств (device_stats).
+
+Счетчики изменяются в той же транзакции, что и сами записи:
+
+    - показания - write_reading_rows() при записи пакета, удаление
+      партиций и пакетное удаление задачей хранения;
+    - оповещения и команды - эндпоинты создания;
+    - удаление устройства удаляет строку счетчиков.
+
+Карточка устройства и список устройств читают счетчики одним запросом
+по первичному ключу вместо COUNT(*) по всей истории. Фоновая сверка
+(DeviceStatsReconciler) раз в DEVICE_STATS_RECONCILE_INTERVAL секунд
+пересчитывает счетчики каждого устройства и исправляет расхождения
+(например, после ручных правок БД).
+
+Classes:
+    DeviceStatsReconciler: Периодическая сверка счетчиков
+
+Functions:
+    add_device_counts: Изменить счетчик устройств на заданные величины
+    get_device_counts: Счетчики устройств
+    delete_device_stats: Удалить счетчики устройства
+
+Variables:
+    device_stats_reconciler: Глобальный экземпляр сверки
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+from sqlalchemy import delete, inspect, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import ReadSessionLocal, SessionLocal
+from app.models.device import Device
+from app.models.device_stats import DeviceStats, device_counts_sql
+from app.models.sensor_reading import is_partition_name
+from app.service.data_versions import data_versions
+
+COUNT_COLUMNS = ("readings_count", "alerts_count", "commands_count")
+
+
+async def add_device_counts(db: AsyncSession, column: Any, counts: Mapping[str, int]) -> None:
+    """Изменить счетчик устройств на заданные величины (без commit).
+
+    Вызывается в транзакции, которая добавляет или удаляет записи,
+    поэтому счетчики фиксируются вместе с ними. Строка счетчиков
+    создается при первом изменении.
+
+    Args:
+        db (AsyncSession): Сессия базы данных (соединение на запись)
+        column: Колонка счетчика (например, DeviceStats.readings_count)
+        counts (Mapping[str, int]): device_id -> изменение (отрицательное при удалении)
+
+    Example:
+        >>> await add_device_counts(db, DeviceStats.alerts_count, {"abc123": 1})
+    """
+    counts = {device_id: count for device_id, count in counts.items() if count}
+    if not counts:
+        return
+    statement = insert(DeviceStats)
+    statement = statement.on_conflict_do_update(
+        index_elements=[DeviceStats.device_id],
+        set_={column.key: column + statement.excluded[column.key]}
+    )
+    await db.execute(statement, [{"device_id": device_id, column.key: count} for device_id, count in counts.items()])
+
+
+async def get_device_counts(db: AsyncSession, device_ids: Sequence[str]) -> Dict[str, Dict[str, int]]:
+    """Счетчики устройств.
+
+    Args:
+        db (AsyncSession): Сессия базы данных
+        device_ids (Sequence[str]): ID устройств
+
+    Returns:
+        Dict[str, Dict[str, int]]: device_id -> {readings_count, alerts_count, commands_count}
+            (нули для устройств без строки счетчиков)
+
+    Example:
+        >>> await get_device_counts(db, ["abc123"])
+        {"abc123": {"readings_count": 15230, "alerts_count": 12, "commands_count": 3}}
+    """
+    result = {device_id: dict.fromkeys(COUNT_COLUMNS, 0) for device_id in device_ids}
+    if not device_ids:
+        return result
+    rows = await db.execute(select(DeviceStats).where(DeviceStats.device_id.in_(device_ids)))
+    for stats in rows.scalars():
+        result[stats.device_id] = {column: getattr(stats, column) for column in COUNT_COLUMNS}
+    return result
+
+
+async def delete_device_stats(db: AsyncSession, device_id: str) -> None:
+    """Удалить счетчики устройства (без commit, при удалении устройства)."""
+    await db.execute(delete(DeviceStats).where(DeviceStats.device_id == device_id))
+
+
+class DeviceStatsReconciler:
+    """Периодическая сверка счетчиков устройств с таблицами.
+
+    Записи каждого устройства подсчитываются на соединении чтения
+    (ReadSessionLocal), чтобы долгий COUNT по партициям не занимал
+    единственное соединение записи. Исправление выполняется короткой
+    транзакцией записи и только если счетчик не изменился после подсчета:
+    иначе прием показаний мог изменить записи между чтениями, и устройство
+    проверяется при следующей сверке.
+
+    Attributes:
+        interval (float): Период сверки, секунды
+        pause (float): Пауза между устройствами, секунды
+    """
+
+    def __init__(self, interval: float, pause: float):
+        self.interval = interval
+        self.pause = pause
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.errors = 0
+        self.devices_checked_total = 0
+        self.devices_fixed_total = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                self.errors += 1
+                print(f"Error reconciling device stats: {e}")
+
+    async def reconcile(self) -> Dict[str, Any]:
+        """Пересчитать счетчики всех устройств и исправить расхождения.
+
+        Returns:
+            Dict[str, Any]: Количество проверенных устройств, ID исправленных
+                устройств и длительность сверки
+
+        Example:
+            >>> await device_stats_reconciler.reconcile()
+            {"started_at": datetime(2025, 10, 4, 12, 0), "devices_checked": 120,
+             "devices_fixed": ["abc123"], "duration": 0.84}
+        """
+        started = time.perf_counter()
+        result: Dict[str, Any] = {"started_at": datetime.now(), "devices_checked": 0, "devices_fixed": []}
+        async with ReadSessionLocal() as db:
+            device_ids = (await db.scalars(select(Device.id))).all()
+        for device_id in device_ids:
+            async with ReadSessionLocal() as db:
+                # reading_partitions не импортируется: он сам изменяет счетчики при удалении партиций
+                table_names = await db.run_sync(lambda session: inspect(session.connection()).get_table_names())
+                statement = device_counts_sql(name for name in table_names if is_partition_name(name))
+                stored = (await get_device_counts(db, [device_id]))[device_id]
+                actual = (await db.execute(statement, {"device_id": device_id})).one()._asdict()
+            if actual != stored:
+                async with SessionLocal() as db:
+                    # Счетчик изменился после подсчета: записи могли измениться между
+                    # чтениями, устройство проверяется при следующей сверке
+                    if (await get_device_counts(db, [device_id]))[device_id] == stored:
+                        upsert = insert(DeviceStats).values(device_id=device_id, **actual)
+                        await db.execute(upsert.on_conflict_do_update(index_elements=[DeviceStats.device_id], set_=actual))
+                        await db.commit()
+                        result["devices_fixed"].append(device_id)
+            result["devices_checked"] += 1
+            await asyncio.sleep(self.pause)
+        await data_versions.bump(result["devices_fixed"])
+        result["duration"] = round(time.perf_counter() - started, 3)
+
+        self.runs += 1
+        self.devices_checked_total += result["devices_checked"]
+        self.devices_fixed_total += len(result["devices_fixed"])
+        self.last_run = result
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики сверки и итог последнего запуска."""
+        return {
+            "runs": self.runs,
+            "errors": self.errors,
+            "devices_checked_total": self.devices_checked_total,
+            "devices_fixed_total": self.devices_fixed_total,
+            "last_run": self.last_run,
+        }
+
+
+# Глобальный экземпляр сверки счетчиков
+device_stats_reconciler = DeviceStatsReconciler(
+    settings.DEVICE_STATS_RECONCILE_INTERVAL, settings.DEVICE_STATS_RECONCILE_PAUSE
+)
@@ -0,0 +1,151 @@
+"""Прореживание показаний для графиков с сохранением формы кривой.
+
+Окно сырых показаний (например, 100 тысяч точек) сокращается до
+max_points точек на тип датчика без усреднения: выбираются реальные
+показания, поэтому выбросы (например, датчика FIRE), которые исчезают
+в средних значениях агрегатов, остаются на графике.
+
+Functions:
+    minmax_indices: Огибающая min/max по интервалам времени
+    lttb_indices: Largest-Triangle-Three-Buckets
+    downsample_readings: Прореженные показания устройства за интервал
+"""
+
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.enums.downsample_method import DownsampleMethod
+from app.enums.sensor_type import SensorType
+from app.models.sensor_reading import reading_columns
+from app.service.reading_aggregates import reading_arrays
+from app.service.reading_partitions import reading_partitions
+
+
+def minmax_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Индексы показаний с минимумом и максимумом в каждом интервале времени.
+
+    Ось x делится на max_points // 2 равных интервалов; из каждого
+    берутся две точки, поэтому любое значение, выходящее за порог,
+    представлено на графике экстремумом своего интервала.
+
+    Args:
+        x (np.ndarray): Время по возрастанию
+        y (np.ndarray): Значения
+        max_points (int): Максимальное количество точек
+
+    Returns:
+        np.ndarray: Индексы выбранных точек по возрастанию
+
+    Example:
+        >>> minmax_indices(np.arange(6.0), np.array([0, 5, 1, 1, 9, 2.0]), 4)
+        array([0, 1, 3, 4])
+    """
+    if len(x) <= max_points:
+        return np.arange(len(x))
+    bucket_count = max_points // 2
+    span = x[-1] - x[0]
+    buckets = np.minimum(((x - x[0]) * bucket_count // (span or 1)).astype(np.int64), bucket_count - 1)
+    order = np.lexsort((y, buckets))
+    sorted_buckets = buckets[order]
+    starts = np.flatnonzero(np.concatenate(([True], sorted_buckets[1:] != sorted_buckets[:-1])))
+    ends = np.append(starts[1:], len(order)) - 1
+    return np.unique(np.concatenate((order[starts], order[ends])))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Индексы точек Largest-Triangle-Three-Buckets.
+
+    Первая и последняя точки сохраняются, остальные делятся на max_points - 2
+    групп равного размера. Из каждой группы выбирается точка, образующая
+    наибольший треугольник с точкой, выбранной в предыдущей группе,
+    и средней точкой следующей группы. Площади внутри группы и средние
+    групп считаются векторно, цикл выполняется по группам.
+
+    Args:
+        x (np.ndarray): Время по возрастанию
+        y (np.ndarray): Значения
+        max_points (int): Максимальное количество точек (не меньше 3)
+
+    Returns:
+        np.ndarray: Индексы выбранных точек по возрастанию
+    """
+    count = len(x)
+    if count <= max_points or max_points < 3:
+        return np.arange(count)
+    x = x - x[0]
+    group_count = max_points - 2
+    edges = (np.arange(group_count + 1) * ((count - 2) / group_count)).astype(np.int64) + 1
+    edges[-1] = count - 1
+    # Средние точки групп через накопленные суммы
+    sum_x = np.concatenate(([0.0], np.cumsum(x)))
+    sum_y = np.concatenate(([0.0], np.cumsum(y)))
+    sizes = edges[1:] - edges[:-1]
+    mean_x = np.append((sum_x[edges[1:]] - sum_x[edges[:-1]]) / sizes, x[-1])
+    mean_y = np.append((sum_y[edges[1:]] - sum_y[edges[:-1]]) / sizes, y[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = count - 1
+    previous = 0
+    for group in range(group_count):
+        start, end = edges[group], edges[group + 1]
+        ax, ay = x[previous], y[previous]
+        cx, cy = mean_x[group + 1], mean_y[group + 1]
+        areas = np.abs((ax - cx) * (y[start:end] - ay) - (ax - x[start:end]) * (cy - ay))
+        previous = start + int(np.argmax(areas))
+        selected[group + 1] = previous
+    return selected
+
+
+async def downsample_readings(
+    db: AsyncSession,
+    device_id: str,
+    since: datetime,
+    max_points: int,
+    method: DownsampleMethod,
+    sensor_type: Optional[SensorType] = None
+) -> Tuple[int, List[Any]]:
+    """Прореженные показания устройства за интервал, от новых к старым.
+
+    Время и значения интервала читаются массивами (reading_arrays()),
+    точки выбираются отдельно для каждого типа датчика, затем выбранные
+    показания читаются по первичному ключу в формате latest_readings().
+
+    Args:
+        db (AsyncSession): Сессия базы данных
+        device_id (str): ID устройства
+        since (datetime): Начало интервала
+        max_points (int): Максимальное количество точек на тип датчика
+        method (DownsampleMethod): Метод прореживания
+        sensor_type (SensorType, optional): Фильтр по типу датчика
+
+    Returns:
+        Tuple[int, List[Row]]: Количество показаний в интервале и выбранные строки
+            с атрибутами id, sensor_type, value, unit, timestamp
+
+    Example:
+        >>> total, rows = await downsample_readings(db, "abc123", datetime.now() - timedelta(days=1),
+        ...                                         800, DownsampleMethod.MINMAX, SensorType.FIRE)
+        >>> total, len(rows)
+        (86400, 800)
+    """
+    rows = await reading_arrays(db, device_id, since, sensor_type, include_id=True)
+    select_indices = lttb_indices if method == DownsampleMethod.LTTB else minmax_indices
+    selected_ids = []
+    for code in np.unique(rows[:, 0]):
+        type_rows = rows[rows[:, 0] == code]
+        type_rows = type_rows[np.lexsort((type_rows[:, 3], type_rows[:, 1]))]
+        indices = select_indices(type_rows[:, 1], type_rows[:, 2], max_points)
+        selected_ids.extend(type_rows[indices, 3].astype(np.int64).tolist())
+
+    readings: List[Any] = []
+    if selected_ids:
+        for table in await reading_partitions.overlapping(db, since=since):
+            result = await db.execute(select(*reading_columns(table)).where(table.c.id.in_(selected_ids)))
+            readings.extend(result.all())
+    readings.sort(key=lambda row: (row.timestamp, row.id), reverse=True)
+    return len(rows), readings
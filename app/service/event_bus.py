@@ -0,0 +1,333 @@
+"""Шина событий реального времени внутри процесса.
+
+Эндпоинты записи публикуют события после commit: новые показания,
+оповещения, изменения значений устройства. Долгоживущие соединения
+(WebSocket, SSE) подписываются на события одного устройства или всего
+парка и получают их без опроса БД.
+
+Каждый подписчик имеет собственную ограниченную очередь. Публикация не
+ждет подписчиков: если очередь заполнена, самое старое событие
+отбрасывается, а подписчик получает число пропущенных событий вместе
+со следующей порцией. Если подписчик пропустил больше max_dropped
+событий подряд, он считается медленным и отключается (SlowConsumer).
+
+Шина работает в пределах одного процесса: события, записанные другим
+процессом приложения, в нее не попадают.
+
+События выбранных типов (replay_types) дополнительно сохраняются
+в ограниченном буфере, чтобы переподключившийся клиент мог получить
+пропущенные события по номеру последнего полученного (Last-Event-ID).
+
+Classes:
+    BusEvent: Событие шины с ленивой JSON сериализацией
+    SlowConsumer: Подписчик не успевает забирать события
+    Subscription: Очередь событий одного подписчика
+    EventBus: Шина событий
+
+Functions:
+    field_filter: Фильтр событий по типу и значениям полей
+
+Variables:
+    event_bus: Глобальный экземпляр шины событий
+"""
+
+import asyncio
+import json
+from collections import deque
+from datetime import datetime
+from enum import Enum
+from itertools import count
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.enums.event_type import EventType
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class BusEvent:
+    """Событие шины.
+
+    JSON представление строится один раз при первой отправке
+    и переиспользуется для всех подписчиков.
+
+    Attributes:
+        id (int): Монотонно возрастающий номер события в процессе
+        type (str): Тип события (значение EventType)
+        device_id (str): ID устройства
+        data (Dict[str, Any]): Данные события
+    """
+    __slots__ = ("id", "type", "device_id", "data", "_json")
+
+    def __init__(self, event_id: int, event_type: str, device_id: str, data: Dict[str, Any]):
+        self.id = event_id
+        self.type = event_type
+        self.device_id = device_id
+        self.data = data
+        self._json: Optional[str] = None
+
+    def to_json(self) -> str:
+        if self._json is None:
+            self._json = json.dumps(
+                {"id": self.id, "event": self.type, "device_id": self.device_id, "data": self.data},
+                default=_json_default,
+                ensure_ascii=False,
+            )
+        return self._json
+
+
+class SlowConsumer(Exception):
+    """Подписчик пропустил слишком много событий и должен быть отключен."""
+
+
+class Subscription:
+    """Ограниченная очередь событий одного подписчика.
+
+    Attributes:
+        device_id (str, optional): ID устройства (None - события всего парка)
+        accept (Callable, optional): Фильтр событий (None - все события)
+    """
+
+    def __init__(
+        self,
+        device_id: Optional[str],
+        accept: Optional[Callable[[BusEvent], bool]],
+        max_size: int,
+        max_dropped: int
+    ):
+        self.device_id = device_id
+        self.accept = accept
+        self._max_size = max_size
+        self._max_dropped = max_dropped
+        self._events: Deque[BusEvent] = deque()
+        self._ready = asyncio.Event()
+        self._dropped = 0
+        self.overflowed = False
+        self.fleet_types: List[str] = []
+
+    def push(self, event: BusEvent) -> int:
+        """Добавляет событие в очередь. Возвращает число отброшенных событий (0 или 1)."""
+        if self.accept is not None and not self.accept(event):
+            return 0
+        dropped = 0
+        if len(self._events) >= self._max_size:
+            self._events.popleft()
+            self._dropped += 1
+            dropped = 1
+            if self._dropped >= self._max_dropped:
+                self.overflowed = True
+        self._events.append(event)
+        self._ready.set()
+        return dropped
+
+    async def get(self) -> Tuple[List[BusEvent], int]:
+        """Ждет и забирает все накопленные события.
+
+        Returns:
+            Tuple[List[BusEvent], int]: События и число событий, отброшенных
+                с момента предыдущего вызова
+
+        Raises:
+            SlowConsumer: Если подписчик пропустил max_dropped событий
+        """
+        while not self._events and not self.overflowed:
+            self._ready.clear()
+            await self._ready.wait()
+        if self.overflowed:
+            raise SlowConsumer()
+        events = list(self._events)
+        self._events.clear()
+        dropped, self._dropped = self._dropped, 0
+        return events, dropped
+
+
+class EventBus:
+    """Шина событий с подписками на устройство или на весь парк.
+
+    Args:
+        max_size (int): Размер очереди одного подписчика
+        max_dropped (int): Пропущенных событий подряд до отключения подписчика
+        replay_size (int): Размер буфера повтора событий
+        replay_types (Iterable[EventType]): Типы событий, сохраняемые в буфере повтора
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        max_dropped: int,
+        replay_size: int = 0,
+        replay_types: Iterable[EventType] = ()
+    ):
+        self._max_size = max_size
+        self._max_dropped = max_dropped
+        self._ids = count(1)
+        self._last_id = 0
+        self._replay_size = replay_size
+        self._replay_types = {t.value for t in replay_types} if replay_size else set()
+        self._replay: Deque[BusEvent] = deque()
+        self._replay_evicted_id = 0
+        self._by_device: Dict[str, Set[Subscription]] = {}
+        self._fleet: Dict[str, Set[Subscription]] = {t.value: set() for t in EventType}
+        self.published = 0
+        self.dropped = 0
+        self.disconnected_slow = 0
+
+    def subscribe(
+        self,
+        device_id: Optional[str] = None,
+        accept: Optional[Callable[[BusEvent], bool]] = None,
+        event_types: Optional[Iterable[EventType]] = None
+    ) -> Subscription:
+        """Создает подписку на события устройства (или всего парка при device_id=None).
+
+        Подписка на весь парк регистрируется только для типов event_types
+        (по умолчанию - все типы), чтобы, например, лента оповещений не
+        заставляла шину создавать события для каждого показания.
+
+        Example:
+            >>> subscription = event_bus.subscribe(device_id, field_filter(sensor_type=["temperature"]))
+            >>> events, dropped = await subscription.get()
+        """
+        subscription = Subscription(device_id, accept, self._max_size, self._max_dropped)
+        if device_id is None:
+            subscription.fleet_types = [t.value for t in (event_types or EventType)]
+            for event_type in subscription.fleet_types:
+                self._fleet[event_type].add(subscription)
+        else:
+            self._by_device.setdefault(device_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription.overflowed:
+            self.disconnected_slow += 1
+        if subscription.device_id is None:
+            for event_type in subscription.fleet_types:
+                self._fleet[event_type].discard(subscription)
+            return
+        subscribers = self._by_device.get(subscription.device_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._by_device[subscription.device_id]
+
+    def has_subscribers(self, event_type: EventType, device_id: str) -> bool:
+        return bool(self._fleet[event_type.value]) or device_id in self._by_device
+
+    def publish(self, event_type: EventType, device_id: str, data: Dict[str, Any]) -> None:
+        """Публикует событие подписчикам устройства и подписчикам всего парка.
+
+        Вызывается после commit. Если подписчиков нет и тип события
+        не сохраняется в буфере повтора, событие не создается.
+
+        Args:
+            event_type (EventType): Тип события
+            device_id (str): ID устройства
+            data (Dict[str, Any]): Данные события (значения должны сериализоваться в JSON)
+        """
+        retain = event_type.value in self._replay_types
+        if not retain and not self.has_subscribers(event_type, device_id):
+            return
+        event = BusEvent(next(self._ids), event_type.value, device_id, data)
+        self._last_id = event.id
+        self.published += 1
+        if retain:
+            if len(self._replay) >= self._replay_size:
+                self._replay_evicted_id = self._replay.popleft().id
+            self._replay.append(event)
+        for subscription in self._by_device.get(device_id, ()):
+            self.dropped += subscription.push(event)
+        for subscription in self._fleet[event.type]:
+            self.dropped += subscription.push(event)
+
+    def replay(
+        self,
+        after_id: int,
+        accept: Optional[Callable[[BusEvent], bool]] = None
+    ) -> Tuple[List[BusEvent], bool]:
+        """Возвращает события из буфера повтора с номером больше after_id.
+
+        Вызывается перед subscribe() без await между вызовами, поэтому
+        события не теряются и не дублируются.
+
+        Args:
+            after_id (int): Номер последнего полученного клиентом события
+            accept (Callable, optional): Фильтр событий
+
+        Returns:
+            Tuple[List[BusEvent], bool]: События и признак полноты: False, если
+                часть событий после after_id уже вытеснена из буфера или номер
+                выдан до перезапуска процесса
+        """
+        complete = self._replay_evicted_id <= after_id <= self._last_id
+        events = [
+            event for event in self._replay
+            if event.id > after_id and (accept is None or accept(event))
+        ]
+        return events, complete
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики шины.
+
+        Returns:
+            Dict[str, Any]: Подписчики, опубликованные и отброшенные события
+        """
+        return {
+            "device_subscribers": sum(len(s) for s in self._by_device.values()),
+            "fleet_subscribers": len(set().union(*self._fleet.values())),
+            "published": self.published,
+            "dropped": self.dropped,
+            "disconnected_slow": self.disconnected_slow,
+            "replay_buffered": len(self._replay),
+        }
+
+
+def field_filter(event_types: Optional[Iterable[Any]] = None, **fields: Optional[Iterable[Any]]) -> Optional[Callable[[BusEvent], bool]]:
+    """Строит фильтр событий по типу и допустимым значениям полей data.
+
+    Пустые и None ограничения не применяются. Ограничение на поле не
+    применяется к событиям, в data которых этого поля нет (например,
+    фильтр по sensor_type не отсекает события оповещений).
+
+    Args:
+        event_types (Iterable, optional): Допустимые типы событий
+        **fields (Iterable, optional): Допустимые значения полей data
+
+    Returns:
+        Callable или None, если ограничений нет
+
+    Example:
+        >>> accept = field_filter([EventType.READING], sensor_type=[SensorType.TEMPERATURE])
+    """
+    def normalize(values: Iterable[Any]) -> Set[Any]:
+        return {getattr(v, "value", v) for v in values}
+
+    allowed_types = normalize(event_types) if event_types else None
+    allowed_fields = {key: normalize(values) for key, values in fields.items() if values}
+    if allowed_types is None and not allowed_fields:
+        return None
+
+    def accept(event: BusEvent) -> bool:
+        if allowed_types is not None and event.type not in allowed_types:
+            return False
+        for key, allowed in allowed_fields.items():
+            value = event.data.get(key)
+            if value is not None and getattr(value, "value", value) not in allowed:
+                return False
+        return True
+
+    return accept
+
+
+# Глобальный экземпляр шины событий
+event_bus = EventBus(
+    settings.LIVE_SUBSCRIBER_QUEUE_SIZE,
+    settings.LIVE_MAX_DROPPED,
+    replay_size=settings.ALERT_STREAM_REPLAY_SIZE,
+    replay_types=[EventType.ALERT],
+)
@@ -0,0 +1,182 @@
+"""Компактный бинарный формат кадров показаний датчиков.
+
+Формат предназначен для микроконтроллеров с ограниченным каналом связи:
+вместо JSON объекта на каждое показание устройство отправляет кадр
+с заголовком и массивом 9-байтовых записей. Тело запроса может содержать
+несколько кадров подряд (например, от шлюза с несколькими устройствами).
+
+Формат кадра (little-endian):
+
+    Заголовок:
+        magic       2 байта   b"SR"
+        version     uint8     1
+        id_len      uint8     длина ID устройства в байтах
+        device_id   id_len    ID устройства (ASCII)
+        base_time   uint32    время отправки, секунды Unix epoch
+                              (0 - использовать время приема на сервере)
+        count       uint16    количество записей
+
+    Запись (count раз, 9 байт):
+        sensor      uint8     код типа датчика из SENSOR_TYPE_CODES
+        age_ms      uint32    сколько миллисекунд назад до base_time снято показание
+        value       float32   значение показания
+
+Декодирование не копирует тело запроса: заголовки читаются через
+struct.unpack_from, записи - через struct.iter_unpack по memoryview.
+
+Classes:
+    FrameDecodeError: Ошибка разбора кадра
+    FrameTimeError: Время показания вне допустимого интервала
+    DecodedReading: Декодированное показание, совместимое с build_reading_rows()
+
+Functions:
+    decode_frames: Разбор тела запроса в список показаний
+    encode_frame: Сборка кадра (для устройств, шлюзов и тестов)
+"""
+
+import math
+import struct
+from datetime import datetime
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from app.enums.sensor_type import SENSOR_TYPE_CODES, SENSOR_TYPE_DEFAULT_UNITS, SENSOR_TYPES_BY_CODE, SensorType
+from app.models.sensor_reading import reading_time_bounds
+
+
+FRAME_CONTENT_TYPE = "application/x-sensor-frame"
+FRAME_MAGIC = b"SR"
+FRAME_VERSION = 1
+
+_PREFIX = struct.Struct("<2sBB")
+_HEADER_TAIL = struct.Struct("<IH")
+_RECORD = struct.Struct("<BIf")
+
+
+class FrameDecodeError(ValueError):
+    """Тело запроса не является корректной последовательностью кадров."""
+
+
+class FrameTimeError(FrameDecodeError):
+    """Время показания кадра вне reading_time_bounds() (неверные часы устройства)."""
+
+
+class DecodedReading(NamedTuple):
+    """Показание, извлеченное из бинарного кадра.
+
+    Имеет те же атрибуты, что и ReadingBase, поэтому передается в общий
+    путь пакетной записи без создания и валидации Pydantic моделей.
+    """
+    device_id: str
+    sensor_type: SensorType
+    value: float
+    unit: str
+    timestamp: datetime
+
+
+def decode_frames(body: bytes, max_readings: int, received_at: Optional[datetime] = None) -> List[DecodedReading]:
+    """Разбирает тело запроса из одного или нескольких кадров.
+
+    Args:
+        body (bytes): Тело запроса
+        max_readings (int): Максимальное общее количество записей
+        received_at (datetime, optional): Время приема (по умолчанию - текущее)
+
+    Returns:
+        List[DecodedReading]: Показания всех кадров в порядке следования
+
+    Raises:
+        FrameDecodeError: Если кадр обрезан, имеет неизвестную версию,
+            неизвестный код датчика, нечисловое значение или записей
+            больше max_readings
+        FrameTimeError: Если время показания вне reading_time_bounds()
+
+    Example:
+        >>> body = encode_frame("abc1", [(SensorType.TEMPERATURE, 0, 23.5)])
+        >>> decode_frames(body, max_readings=100)[0].value
+        23.5
+    """
+    view = memoryview(body)
+    received_at = received_at or datetime.now()
+    earliest, latest = reading_time_bounds(received_at)
+    earliest_seconds, latest_seconds = earliest.timestamp(), latest.timestamp()
+    readings: List[DecodedReading] = []
+    offset = 0
+
+    while offset < len(view):
+        if len(view) - offset < _PREFIX.size:
+            raise FrameDecodeError(f"Truncated frame header at byte {offset}")
+        magic, version, id_len = _PREFIX.unpack_from(view, offset)
+        if magic != FRAME_MAGIC:
+            raise FrameDecodeError(f"Bad frame magic at byte {offset}")
+        if version != FRAME_VERSION:
+            raise FrameDecodeError(f"Unsupported frame version {version}")
+        offset += _PREFIX.size
+
+        if len(view) - offset < id_len + _HEADER_TAIL.size:
+            raise FrameDecodeError(f"Truncated frame header at byte {offset}")
+        try:
+            device_id = str(view[offset:offset + id_len], "ascii")
+        except UnicodeDecodeError:
+            raise FrameDecodeError("Device id must be ASCII")
+        offset += id_len
+        base_time, count = _HEADER_TAIL.unpack_from(view, offset)
+        offset += _HEADER_TAIL.size
+
+        records_end = offset + count * _RECORD.size
+        if records_end > len(view):
+            raise FrameDecodeError(f"Frame for device {device_id} declares {count} records but is truncated")
+        if len(readings) + count > max_readings:
+            raise FrameDecodeError(f"Too many readings, maximum is {max_readings}")
+
+        base_seconds = base_time or received_at.timestamp()
+        append = readings.append
+        for code, age_ms, value in _RECORD.iter_unpack(view[offset:records_end]):
+            sensor_type = SENSOR_TYPES_BY_CODE.get(code)
+            if sensor_type is None:
+                raise FrameDecodeError(f"Unknown sensor type code {code}")
+            if not math.isfinite(value):
+                raise FrameDecodeError(f"Non-finite value for device {device_id}")
+            seconds = base_seconds - age_ms / 1000
+            if not earliest_seconds <= seconds <= latest_seconds:
+                raise FrameTimeError(f"Reading time out of allowed range for device {device_id}")
+            append(DecodedReading(
+                device_id,
+                sensor_type,
+                value,
+                SENSOR_TYPE_DEFAULT_UNITS[sensor_type],
+                datetime.fromtimestamp(seconds),
+            ))
+        offset = records_end
+
+    return readings
+
+
+def encode_frame(
+    device_id: str,
+    records: Iterable[Tuple[SensorType, int, float]],
+    base_time: int = 0
+) -> bytes:
+    """Собирает бинарный кадр показаний одного устройства.
+
+    Args:
+        device_id (str): ID устройства (ASCII, до 255 байт)
+        records (Iterable[Tuple[SensorType, int, float]]): Записи
+            (тип датчика, age_ms, значение)
+        base_time (int): Время отправки, секунды Unix epoch (0 - время приема)
+
+    Returns:
+        bytes: Кадр, готовый к отправке
+
+    Example:
+        >>> encode_frame("abc1", [(SensorType.TEMPERATURE, 1500, 23.5)])
+        b'SR\\x01\\x04abc1...'
+    """
+    records = list(records)
+    encoded_id = device_id.encode("ascii")
+    parts = [
+        _PREFIX.pack(FRAME_MAGIC, FRAME_VERSION, len(encoded_id)),
+        encoded_id,
+        _HEADER_TAIL.pack(base_time, len(records)),
+    ]
+    parts.extend(_RECORD.pack(SENSOR_TYPE_CODES[sensor_type], age_ms, value) for sensor_type, age_ms, value in records)
+    return b"".join(parts)
@@ -0,0 +1,382 @@
+"""Горячее окно показаний в памяти процесса.
+
+Для каждой пары (устройство, тип датчика) последние показания хранятся
+в кольцевом буфере из массивов NumPy (ID, время в мс, значение, код
+единицы измерения) без ORM объектов. Буферы заполняются после каждой
+записи пакета показаний (write_reading_rows()) и загружаются из БД
+при запуске за последние HOT_WINDOW_HOURS часов.
+
+Короткие запросы (timeframe не длиннее HOT_WINDOW_HOURS) читаемых
+показаний и статистик отвечаются из буферов без обращения к БД.
+Буфер отвечает, только если гарантированно содержит все показания
+интервала: для каждого потока хранится время, начиная с которого
+буфер полон (covered_from). Время сдвигается вперед, когда буфер
+перезаписывает старейшее показание или поток вытесняется из памяти.
+
+Буфер создается небольшим и удваивается, пока старейшее показание
+моложе HOT_WINDOW_HOURS, до HOT_WINDOW_CAPACITY показаний. Общий
+объем массивов ограничен HOT_WINDOW_MAX_BYTES: при превышении
+вытесняются потоки, в которые дольше всего не было записи.
+
+Буферы заполняются только показаниями, записанными этим процессом,
+поэтому горячее окно выключено по умолчанию и включается
+(HOT_WINDOW_ENABLED=True) только при одном процессе приложения.
+
+Classes:
+    HotReading: Показание из горячего окна
+    HotWindow: Кольцевые буферы показаний
+
+Variables:
+    hot_window: Глобальный экземпляр (None, если горячее окно отключено)
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.enums.sensor_type import SENSOR_TYPE_CODES, SensorType
+from app.models.sensor_reading import reading_columns
+from app.models.types import datetime_to_millis, millis_to_datetime
+from app.service.reading_partitions import reading_partitions
+
+# Начальная емкость буфера потока, показаний
+INITIAL_CAPACITY = 64
+# Байт на показание: ID (int64), время (int64), значение (float64), код единицы (uint16)
+BYTES_PER_READING = 8 + 8 + 8 + 2
+# Строк показаний, читаемых из курсора за один шаг загрузки при запуске
+WARM_CHUNK_SIZE = 10000
+# Код типа датчика по строковому значению (колонка кода в arrays())
+_SENSOR_CODES = {sensor.value: code for sensor, code in SENSOR_TYPE_CODES.items()}
+
+
+class HotReading(NamedTuple):
+    """Показание из горячего окна (атрибуты как у строк latest_readings())."""
+    id: int
+    sensor_type: str
+    value: float
+    unit: Optional[str]
+    timestamp: datetime
+
+
+class _RingBuffer:
+    """Кольцевой буфер показаний одного потока (устройство, тип датчика).
+
+    Пока буфер не заполнен, показания лежат в начале массивов;
+    после заполнения новое показание перезаписывает старейшее (start).
+    """
+
+    def __init__(self, capacity: int, covered_from: int):
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.timestamps = np.empty(capacity, dtype=np.int64)
+        self.values = np.empty(capacity, dtype=np.float64)
+        self.units = np.empty(capacity, dtype=np.uint16)
+        self.start = 0
+        self.size = 0
+        self.covered_from = covered_from
+
+    @property
+    def capacity(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return self.capacity * BYTES_PER_READING
+
+    def grow(self, capacity: int) -> None:
+        """Увеличить емкость, сохранив показания в порядке записи."""
+        order = np.roll(np.arange(self.size), -self.start)
+        for name in ("ids", "timestamps", "values", "units"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[order]
+            setattr(self, name, new)
+        self.start = 0
+
+    def append(self, reading_id: int, timestamp: int, value: float, unit: int) -> None:
+        if self.size < self.capacity:
+            index = self.size
+            self.size += 1
+        else:
+            index = self.start
+            self.start = (self.start + 1) % self.capacity
+            # Перезаписанное показание больше не в буфере
+            self.covered_from = max(self.covered_from, int(self.timestamps[index]) + 1)
+        self.ids[index] = reading_id
+        self.timestamps[index] = timestamp
+        self.values[index] = value
+        self.units[index] = unit
+
+    def oldest_timestamp(self) -> int:
+        return int(self.timestamps[self.start])
+
+    def newest_covered_from(self) -> int:
+        """covered_from потока после вытеснения буфера (все показания потеряны)."""
+        if self.size == 0:
+            return self.covered_from
+        return max(self.covered_from, int(self.timestamps[:self.size].max()) + 1)
+
+
+class HotWindow:
+    """Кольцевые буферы последних показаний устройств.
+
+    Attributes:
+        window (timedelta): Длительность горячего окна
+        max_capacity (int): Максимальная емкость буфера одного потока
+        max_bytes (int): Максимальный общий объем буферов, байты
+    """
+
+    def __init__(self, window: timedelta, max_capacity: int, max_bytes: int):
+        self.window = window
+        self.max_capacity = max_capacity
+        self.max_bytes = max_bytes
+        self._buffers: "OrderedDict[Tuple[str, str], _RingBuffer]" = OrderedDict()
+        self._device_types: Dict[str, set] = {}
+        # covered_from вытесненных потоков: буфер, созданный заново, не содержит их показаний
+        self._evicted: Dict[Tuple[str, str], int] = {}
+        self._unit_codes: Dict[Optional[str], int] = {}
+        self._unit_names: List[Optional[str]] = []
+        # До загрузки при запуске буферы не отвечают ни на какой интервал
+        self._covered_from = 2 ** 62
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _unit_code(self, unit: Optional[str]) -> int:
+        code = self._unit_codes.get(unit)
+        if code is None:
+            code = self._unit_codes[unit] = len(self._unit_names)
+            self._unit_names.append(unit)
+        return code
+
+    def _evict_until(self, needed: int) -> None:
+        """Вытеснить потоки без записи дольше остальных, пока needed байт не помещаются."""
+        while self._buffers and self.nbytes + needed > self.max_bytes:
+            key, buffer = self._buffers.popitem(last=False)
+            self.nbytes -= buffer.nbytes
+            self._evicted[key] = buffer.newest_covered_from()
+            self._device_types[key[0]].discard(key[1])
+            self.evictions += 1
+
+    def _buffer(self, key: Tuple[str, str]) -> _RingBuffer:
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            self._evict_until(INITIAL_CAPACITY * BYTES_PER_READING)
+            buffer = _RingBuffer(INITIAL_CAPACITY, self._evicted.pop(key, self._covered_from))
+            self._buffers[key] = buffer
+            self._device_types.setdefault(key[0], set()).add(key[1])
+            self.nbytes += buffer.nbytes
+        else:
+            self._buffers.move_to_end(key)
+        return buffer
+
+    def add(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Добавить записанные показания.
+
+        Args:
+            rows (Iterable[Dict[str, Any]]): Строки показаний после commit
+                (id, device_id, sensor_type, value, unit, timestamp)
+        """
+        window_start = datetime_to_millis(datetime.now() - self.window)
+        for row in rows:
+            if row["sensor_type"] not in _SENSOR_CODES:
+                continue
+            timestamp = datetime_to_millis(row["timestamp"])
+            key = (row["device_id"], row["sensor_type"])
+            buffer = self._buffer(key)
+            if timestamp < buffer.covered_from:
+                # Показание старше интервала, за который буфер полон
+                continue
+            if buffer.size == buffer.capacity and buffer.capacity < self.max_capacity \
+                    and buffer.oldest_timestamp() >= window_start:
+                capacity = min(buffer.capacity * 2, self.max_capacity)
+                extra = (capacity - buffer.capacity) * BYTES_PER_READING
+                self._evict_until(extra)
+                if key in self._buffers:
+                    buffer.grow(capacity)
+                    self.nbytes += extra
+                else:
+                    buffer = self._buffer(key)
+            buffer.append(row["id"], timestamp, row["value"], self._unit_code(row["unit"]))
+
+    def delete(self, device_id: str) -> None:
+        """Удалить буферы устройства (при удалении устройства)."""
+        for sensor_type in self._device_types.pop(device_id, set()):
+            self.nbytes -= self._buffers.pop((device_id, sensor_type)).nbytes
+        for key in [key for key in self._evicted if key[0] == device_id]:
+            del self._evicted[key]
+
+    def _covered(self, device_id: str, since: int, sensor_type: Optional[SensorType]) -> bool:
+        sensor_types = [sensor_type.value] if sensor_type else [sensor.value for sensor in SensorType]
+        for name in sensor_types:
+            buffer = self._buffers.get((device_id, name))
+            covered_from = buffer.covered_from if buffer else self._evicted.get((device_id, name), self._covered_from)
+            if since < covered_from:
+                return False
+        return True
+
+    def _window_buffers(
+        self,
+        device_id: str,
+        since: Optional[datetime],
+        sensor_type: Optional[SensorType]
+    ) -> Optional[Tuple[int, List[Tuple[str, _RingBuffer, np.ndarray]]]]:
+        """Буферы устройства и маски показаний не старше since (None - интервал не покрыт)."""
+        if since is None:
+            return None
+        since_ms = datetime_to_millis(since)
+        if not self._covered(device_id, since_ms, sensor_type):
+            self.misses += 1
+            return None
+        self.hits += 1
+        selected = []
+        for name in sorted(self._device_types.get(device_id, ())):
+            if sensor_type and name != sensor_type.value:
+                continue
+            buffer = self._buffers[(device_id, name)]
+            selected.append((name, buffer, buffer.timestamps[:buffer.size] >= since_ms))
+        return since_ms, selected
+
+    def latest(
+        self,
+        device_id: str,
+        limit: int,
+        sensor_type: Optional[SensorType] = None,
+        since: Optional[datetime] = None,
+        before: Optional[Tuple[datetime, int]] = None
+    ) -> Optional[Tuple[int, List[HotReading]]]:
+        """Последние показания устройства, от новых к старым, если интервал в горячем окне.
+
+        Args:
+            device_id (str): ID устройства
+            limit (int): Максимальное количество показаний
+            sensor_type (SensorType, optional): Фильтр по типу датчика
+            since (datetime, optional): Начало интервала (без него - None)
+            before (Tuple[datetime, int], optional): Только показания после позиции
+                (время, id) в порядке от новых к старым (decode_cursor())
+
+        Returns:
+            Optional[Tuple[int, List[HotReading]]]: Количество показаний в интервале
+                (без учета before) и показания страницы; None, если буферы
+                не содержат все показания интервала
+
+        Example:
+            >>> hot_window.latest("abc123", 20, since=datetime.now() - timedelta(hours=1))
+            (3600, [HotReading(id=1042, sensor_type="temperature", value=23.5, unit="°C", ...), ...])
+        """
+        found = self._window_buffers(device_id, since, sensor_type)
+        if found is None:
+            return None
+        _, selected = found
+        total = sum(int(mask.sum()) for _, _, mask in selected)
+        if before:
+            position = (datetime_to_millis(before[0]), before[1])
+        parts = []
+        for name, buffer, mask in selected:
+            ids = buffer.ids[:buffer.size]
+            timestamps = buffer.timestamps[:buffer.size]
+            if before:
+                mask = mask & ((timestamps < position[0]) | ((timestamps == position[0]) & (ids < position[1])))
+            indices = np.flatnonzero(mask)
+            # Не больше limit новейших показаний каждого потока
+            if len(indices) > limit:
+                indices = indices[np.lexsort((ids[indices], timestamps[indices]))[-limit:]]
+            parts.append((name, buffer, indices))
+        if not parts:
+            return total, []
+
+        timestamps = np.concatenate([buffer.timestamps[indices] for _, buffer, indices in parts])
+        ids = np.concatenate([buffer.ids[indices] for _, buffer, indices in parts])
+        order = np.lexsort((ids, timestamps))[::-1][:limit]
+        names = np.concatenate([np.full(len(indices), i) for i, (_, _, indices) in enumerate(parts)])[order]
+        values = np.concatenate([buffer.values[indices] for _, buffer, indices in parts])[order]
+        units = np.concatenate([buffer.units[indices] for _, buffer, indices in parts])[order]
+        readings = [
+            HotReading(reading_id, parts[part][0], value, self._unit_names[unit], millis_to_datetime(timestamp))
+            for reading_id, part, value, unit, timestamp in zip(
+                ids[order].tolist(), names.tolist(), values.tolist(), units.tolist(), timestamps[order].tolist()
+            )
+        ]
+        return total, readings
+
+    def arrays(
+        self,
+        device_id: str,
+        since: datetime,
+        sensor_type: Optional[SensorType] = None,
+        include_id: bool = False
+    ) -> Optional[np.ndarray]:
+        """Показания устройства не старше since в формате reading_arrays(), если интервал в горячем окне.
+
+        Returns:
+            Optional[np.ndarray]: Массив float64 (код типа датчика, время в мс,
+                значение[, ID]); None, если буферы не содержат все показания интервала
+        """
+        found = self._window_buffers(device_id, since, sensor_type)
+        if found is None:
+            return None
+        _, selected = found
+        width = 4 if include_id else 3
+        chunks = []
+        for name, buffer, mask in selected:
+            columns = [
+                np.full(int(mask.sum()), _SENSOR_CODES[name], dtype=np.float64),
+                buffer.timestamps[:buffer.size][mask],
+                buffer.values[:buffer.size][mask],
+            ]
+            if include_id:
+                columns.append(buffer.ids[:buffer.size][mask])
+            chunks.append(np.column_stack(columns).astype(np.float64))
+        if not chunks:
+            return np.empty((0, width))
+        return np.concatenate(chunks)
+
+    async def warm(self, db: AsyncSession) -> int:
+        """Загрузить показания последних HOT_WINDOW_HOURS часов из БД.
+
+        Вызывается при запуске до начала приема показаний. После загрузки
+        буферы отвечают на интервалы, начинающиеся не раньше начала окна.
+
+        Returns:
+            int: Количество загруженных показаний
+        """
+        since = datetime.now() - self.window
+        self._covered_from = datetime_to_millis(since)
+        loaded = 0
+        for table in reversed(await reading_partitions.overlapping(db, since=since)):
+            result = await db.stream(
+                select(*reading_columns(table))
+                .where(table.c.timestamp >= since)
+                .order_by(table.c.timestamp, table.c.id)
+                .execution_options(yield_per=WARM_CHUNK_SIZE)
+            )
+            async for chunk in result.partitions():
+                self.add(row._asdict() for row in chunk)
+                loaded += len(chunk)
+        return loaded
+
+    def stats(self) -> Dict[str, Any]:
+        """Объем буферов и попадания запросов в горячее окно."""
+        requests = self.hits + self.misses
+        return {
+            "window_hours": self.window.total_seconds() / 3600,
+            "streams": len(self._buffers),
+            "readings": sum(buffer.size for buffer in self._buffers.values()),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / requests, 4) if requests else None,
+        }
+
+
+# Глобальный экземпляр горячего окна (None, если отключено)
+hot_window = HotWindow(
+    timedelta(hours=settings.HOT_WINDOW_HOURS), settings.HOT_WINDOW_CAPACITY, settings.HOT_WINDOW_MAX_BYTES
+) if settings.HOT_WINDOW_ENABLED else None
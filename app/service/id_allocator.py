@@ -0,0 +1,96 @@
+"""Выдача целочисленных идентификаторов блоками (hi/lo).
+
+Показаниям ID назначается до записи в БД: в режиме отложенной записи
+клиент получает ID сразу, а строка попадает в sensor_readings позже.
+Чтобы ID оставались короткими целыми числами и не повторялись между
+процессами, процесс резервирует в таблице id_sequences блок из
+READING_ID_BLOCK_SIZE значений одним UPDATE и дальше выдает их из памяти.
+
+Неиспользованный остаток блока теряется при перезапуске процесса,
+поэтому ID возрастают, но могут идти с пропусками.
+
+Classes:
+    IdAllocator: Выдача ID из зарезервированных блоков
+
+Variables:
+    reading_id_allocator: Глобальный экземпляр для sensor_readings
+"""
+
+from typing import Any, Dict, List
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.id_sequence import IdSequence
+
+
+class IdAllocator:
+    """Выдача ID из блоков, зарезервированных в таблице id_sequences.
+
+    Attributes:
+        name (str): Имя счетчика в id_sequences
+        block_size (int): Минимальный размер резервируемого блока
+    """
+
+    def __init__(self, name: str, block_size: int):
+        self.name = name
+        self.block_size = block_size
+        self._next = 0
+        self._end = 0
+        self.reserved_blocks = 0
+
+    async def allocate(self, db: AsyncSession, count: int) -> List[int]:
+        """Выдать count новых идентификаторов.
+
+        Если текущий блок исчерпан, резервирует следующий и выполняет
+        commit сессии, поэтому вызывать нужно до добавления в сессию
+        изменений, которые еще не должны быть записаны.
+
+        Args:
+            db (AsyncSession): Сессия для резервирования блока
+            count (int): Количество идентификаторов
+
+        Returns:
+            List[int]: Возрастающие уникальные идентификаторы
+
+        Example:
+            >>> ids = await reading_id_allocator.allocate(db, len(rows))
+        """
+        ids: List[int] = []
+        while len(ids) < count:
+            if self._next >= self._end:
+                await self._reserve(db, max(self.block_size, count - len(ids)))
+            take = min(count - len(ids), self._end - self._next)
+            ids.extend(range(self._next, self._next + take))
+            self._next += take
+        return ids
+
+    async def _reserve(self, db: AsyncSession, size: int) -> None:
+        """Сдвинуть счетчик в БД на size и запомнить полученный блок."""
+        increment = (
+            update(IdSequence)
+            .where(IdSequence.name == self.name)
+            .values(next_value=IdSequence.next_value + size)
+        )
+        result = await db.execute(increment)
+        if result.rowcount == 0:
+            # Первое обращение к счетчику в новой базе
+            await db.execute(insert(IdSequence).values(name=self.name, next_value=1))
+            await db.execute(increment)
+        end = await db.scalar(select(IdSequence.next_value).where(IdSequence.name == self.name))
+        await db.commit()
+        self._next, self._end = end - size, end
+        self.reserved_blocks += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Остаток текущего блока и количество резервирований."""
+        return {
+            "block_size": self.block_size,
+            "remaining_in_block": self._end - self._next,
+            "reserved_blocks": self.reserved_blocks,
+        }
+
+
+# Глобальный выдатчик ID показаний датчиков
+reading_id_allocator = IdAllocator("sensor_readings", settings.READING_ID_BLOCK_SIZE)
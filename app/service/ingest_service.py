@@ -0,0 +1,437 @@
+"""Сервис приема показаний с отложенной записью (write-behind).
+
+В режиме отложенной записи показания принимаются в ограниченную очередь
+и подтверждаются клиенту сразу, а фоновый flusher пакетами записывает
+их в sensor_readings. Пакет сбрасывается при накоплении
+INGEST_FLUSH_BATCH_SIZE показаний или по истечении INGEST_FLUSH_INTERVAL.
+Задержка ответа на прием показаний перестает зависеть от fsync SQLite.
+
+Режимы (settings.INGEST_MODE):
+    - "sync": запись в БД в рамках запроса (по умолчанию)
+    - "memory": очередь в памяти процесса
+    - "redis": Redis stream через существующее подключение RedisClient
+
+Classes:
+    IngestQueueFull: Очередь заполнена, клиент должен повторить позже (HTTP 429)
+    IngestQueue: Базовый класс очереди с фоновым flusher и метриками
+    MemoryIngestQueue: Очередь в памяти процесса
+    RedisStreamIngestQueue: Очередь в Redis stream с consumer group
+
+Functions:
+    create_ingest_queue: Создание очереди по настройкам
+    submit_readings: Прием показаний с учетом текущего режима
+
+Variables:
+    ingest_queue: Глобальная очередь (None в режиме "sync")
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.redis_client import redis_client
+from app.db.session import SessionLocal
+from app.models.device import Device
+from app.models.sensor_reading import ReadingBase
+from app.service.reading_service import (
+    build_reading_rows,
+    find_existing_device_ids,
+    find_written_reading_ids,
+    insert_readings,
+    write_reading_rows,
+)
+
+
+class IngestQueueFull(Exception):
+    """Очередь приема показаний заполнена.
+
+    Эндпоинты преобразуют это исключение в HTTP 429 Too Many Requests.
+    """
+
+
+class IngestQueue:
+    """Базовая очередь отложенной записи показаний.
+
+    Хранит строки sensor_readings, подготовленные build_reading_rows(),
+    и управляет фоновой задачей, которая сбрасывает их в БД пакетами.
+    Конкретное хранилище очереди реализуют наследники.
+
+    Attributes:
+        max_size (int): Максимальная глубина очереди
+        batch_size (int): Размер пакета записи в БД
+        flush_interval (float): Максимальное время ожидания пакета, секунды
+                                (и пауза после ошибки)
+        stop_retries (int): Неудачных попыток подряд при остановке, после
+                            которых flusher завершается без записи остатка
+    """
+
+    def __init__(self, max_size: int, batch_size: int, flush_interval: float, stop_retries: int):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stop_retries = stop_retries
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._latencies: Deque[float] = deque(maxlen=1000)
+        self.flushed_total = 0
+        self.flush_count = 0
+        self.flush_errors = 0
+        self.rejected_total = 0
+        self.redelivered_total = 0
+        self.dropped_total = 0
+
+    async def put(self, rows: List[Dict[str, Any]]) -> int:
+        """Поставить строки в очередь целиком или не поставить ни одной.
+
+        Args:
+            rows: Строки показаний
+
+        Returns:
+            int: Глубина очереди после добавления
+
+        Raises:
+            IngestQueueFull: Если строки не помещаются в очередь
+        """
+        raise NotImplementedError
+
+    async def depth(self) -> int:
+        """Текущее количество показаний, ожидающих записи."""
+        raise NotImplementedError
+
+    async def _take_batch(self) -> Tuple[Any, List[Dict[str, Any]]]:
+        """Дождаться пакета и вернуть (токен подтверждения, строки)."""
+        raise NotImplementedError
+
+    async def _commit_batch(self, token: Any) -> None:
+        """Подтвердить успешную запись пакета."""
+        raise NotImplementedError
+
+    async def _retry_batch(self, token: Any, rows: List[Dict[str, Any]]) -> None:
+        """Вернуть пакет в очередь после ошибки записи."""
+        raise NotImplementedError
+
+    async def start(self) -> None:
+        """Запустить фоновый flusher."""
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Остановить flusher, предварительно записав все накопленные показания.
+
+        Если запись не удается stop_retries раз подряд, flusher завершается
+        без записи остатка, чтобы не блокировать остановку приложения.
+        """
+        self._stopping = True
+        if self._task:
+            await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        # Ошибка БД или Redis не завершает задачу: иначе очередь
+        # перестает разбираться и прием отвечает 429 до перезапуска
+        stop_failures = 0
+        while True:
+            try:
+                token, rows = await self._take_batch()
+                if rows:
+                    await self._flush(token, rows)
+                elif self._stopping:
+                    return
+            except Exception as e:
+                self.flush_errors += 1
+                print(f"Error flushing readings: {e}")
+                if self._stopping:
+                    # При остановке БД может не восстановиться: не блокировать завершение
+                    stop_failures += 1
+                    if stop_failures >= self.stop_retries:
+                        print(f"Ingest flusher stopped after {stop_failures} failed attempts with readings left in the queue")
+                        return
+                await asyncio.sleep(self.flush_interval)
+
+    async def _flush(self, token: Any, rows: List[Dict[str, Any]]) -> None:
+        started = time.perf_counter()
+        # write_reading_rows() не выбрасывает исключений после commit,
+        # поэтому в очередь возвращаются только незаписанные пакеты
+        try:
+            async with SessionLocal() as db:
+                writable = await self._drop_deleted_devices(db, rows)
+                try:
+                    if writable:
+                        await write_reading_rows(db, writable)
+                except IntegrityError:
+                    # Повторная доставка: часть строк записана до сбоя, подтверждение не дошло
+                    await db.rollback()
+                    written = await find_written_reading_ids(db, writable)
+                    if not written:
+                        raise
+                    self.redelivered_total += len(written)
+                    await write_reading_rows(db, [row for row in writable if row["id"] not in written])
+        except Exception:
+            await self._retry_batch(token, rows)
+            raise
+
+        await self._commit_batch(token)
+        self._latencies.append((time.perf_counter() - started) * 1000)
+        self.flushed_total += len(writable)
+        self.flush_count += 1
+
+    async def _drop_deleted_devices(self, db: AsyncSession, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Строки устройств, которые еще существуют.
+
+        Устройство могло быть удалено (в том числе другим процессом), пока
+        его показания ждали в очереди: такие строки не записываются, иначе
+        они остались бы без устройства и вновь создали бы его счетчики.
+        Проверка идет по БД, а не по кэшу устройств.
+        """
+        device_ids = {row["device_id"] for row in rows}
+        existing = set((await db.scalars(select(Device.id).where(Device.id.in_(device_ids)))).all())
+        if len(existing) == len(device_ids):
+            return rows
+        writable = [row for row in rows if row["device_id"] in existing]
+        self.dropped_total += len(rows) - len(writable)
+        return writable
+
+    async def stats(self) -> Dict[str, Any]:
+        """Метрики очереди: глубина, объем записи и задержка сброса.
+
+        Returns:
+            Dict[str, Any]: Метрики очереди
+        """
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 3)
+
+        return {
+            "mode": settings.INGEST_MODE,
+            "queue_depth": await self.depth(),
+            "queue_max_size": self.max_size,
+            "flushed_total": self.flushed_total,
+            "flush_count": self.flush_count,
+            "flush_errors": self.flush_errors,
+            "rejected_total": self.rejected_total,
+            "redelivered_total": self.redelivered_total,
+            "dropped_total": self.dropped_total,
+            "flush_latency_ms": {
+                "last": round(self._latencies[-1], 3) if self._latencies else None,
+                "p50": percentile(0.50),
+                "p99": percentile(0.99),
+                "max": round(latencies[-1], 3) if latencies else None,
+            },
+        }
+
+
+class MemoryIngestQueue(IngestQueue):
+    """Очередь отложенной записи в памяти процесса.
+
+    Самый быстрый вариант, но показания, не записанные до аварийного
+    завершения процесса, теряются. При штатной остановке очередь
+    записывается в БД полностью.
+    """
+
+    def __init__(self, max_size: int, batch_size: int, flush_interval: float, stop_retries: int):
+        super().__init__(max_size, batch_size, flush_interval, stop_retries)
+        self._rows: Deque[Dict[str, Any]] = deque()
+        self._batch_ready = asyncio.Event()
+
+    async def put(self, rows: List[Dict[str, Any]]) -> int:
+        if len(self._rows) + len(rows) > self.max_size:
+            self.rejected_total += len(rows)
+            raise IngestQueueFull()
+        self._rows.extend(rows)
+        if len(self._rows) >= self.batch_size:
+            self._batch_ready.set()
+        return len(self._rows)
+
+    async def depth(self) -> int:
+        return len(self._rows)
+
+    async def _take_batch(self) -> Tuple[Any, List[Dict[str, Any]]]:
+        if not self._stopping and len(self._rows) < self.batch_size:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+        self._batch_ready.clear()
+        count = min(len(self._rows), self.batch_size)
+        return None, [self._rows.popleft() for _ in range(count)]
+
+    async def _commit_batch(self, token: Any) -> None:
+        return None
+
+    async def _retry_batch(self, token: Any, rows: List[Dict[str, Any]]) -> None:
+        self._rows.extendleft(reversed(rows))
+
+
+class RedisStreamIngestQueue(IngestQueue):
+    """Очередь отложенной записи в Redis stream.
+
+    Показания переживают перезапуск процесса: запись удаляется из stream
+    только после успешного commit в SQLite (XACK + XDEL в одной транзакции,
+    поэтому длина stream - количество необработанных записей). Неподтвержденные
+    записи этого потребителя перечитываются при следующей итерации. Имя
+    потребителя меняется с перезапуском процесса, поэтому записи, не
+    подтвержденные другими потребителями дольше claim_idle секунд
+    (процесс завершился до записи), передаются этому потребителю (XAUTOCLAIM)
+    при запуске и в каждом цикле.
+    """
+
+    GROUP = "readings-flusher"
+
+    def __init__(
+        self,
+        max_size: int,
+        batch_size: int,
+        flush_interval: float,
+        stop_retries: int,
+        stream: str,
+        claim_idle: float
+    ):
+        super().__init__(max_size, batch_size, flush_interval, stop_retries)
+        self.stream = stream
+        self.claim_idle = claim_idle
+        self.consumer = f"flusher-{os.getpid()}"
+        self._has_pending = True
+        self.claimed_total = 0
+
+    async def put(self, rows: List[Dict[str, Any]]) -> int:
+        depth = await self.depth()
+        if depth + len(rows) > self.max_size:
+            self.rejected_total += len(rows)
+            raise IngestQueueFull()
+        entries = [{"row": json.dumps(row, default=_encode_datetime)} for row in rows]
+        await asyncio.to_thread(redis_client.stream_add, self.stream, entries)
+        return depth + len(rows)
+
+    async def depth(self) -> int:
+        # Обработанные записи удаляются вместе с подтверждением
+        return await asyncio.to_thread(redis_client.stream_length, self.stream)
+
+    async def start(self) -> None:
+        await asyncio.to_thread(redis_client.stream_ensure_group, self.stream, self.GROUP)
+        await self._claim_idle()
+        await super().start()
+
+    async def _claim_idle(self) -> None:
+        """Забрать записи, надолго оставшиеся неподтвержденными у других потребителей."""
+        claimed = await asyncio.to_thread(
+            redis_client.stream_claim_idle,
+            self.stream, self.GROUP, self.consumer, int(self.claim_idle * 1000), self.batch_size
+        )
+        if claimed:
+            self.claimed_total += claimed
+            self._has_pending = True
+
+    async def _take_batch(self) -> Tuple[Any, List[Dict[str, Any]]]:
+        if not self._has_pending:
+            await self._claim_idle()
+        entries = await asyncio.to_thread(
+            redis_client.stream_read_group,
+            self.stream, self.GROUP, self.consumer, self.batch_size,
+            None if self._stopping else int(self.flush_interval * 1000),
+            self._has_pending
+        )
+        if self._has_pending and not entries:
+            self._has_pending = False
+            return await self._take_batch()
+        entry_ids = [entry_id for entry_id, _ in entries]
+        rows = [json.loads(fields["row"], object_hook=_decode_datetime) for _, fields in entries]
+        return entry_ids, rows
+
+    async def _commit_batch(self, token: Any) -> None:
+        try:
+            await asyncio.to_thread(redis_client.stream_ack_delete, self.stream, self.GROUP, token)
+        except Exception:
+            # Пакет записан, но остался в pending list: при повторном чтении
+            # записанные строки будут пропущены
+            self._has_pending = True
+            raise
+
+    async def stats(self) -> Dict[str, Any]:
+        result = await super().stats()
+        result["claimed_total"] = self.claimed_total
+        return result
+
+    async def _retry_batch(self, token: Any, rows: List[Dict[str, Any]]) -> None:
+        # Записи остаются в pending list потребителя и будут перечитаны
+        self._has_pending = True
+
+
+def _encode_datetime(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode_datetime(obj: Dict[str, Any]) -> Any:
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+def create_ingest_queue() -> Optional[IngestQueue]:
+    """Создать очередь приема показаний по настройкам INGEST_*.
+
+    Returns:
+        Optional[IngestQueue]: Очередь или None в режиме "sync"
+
+    Raises:
+        ValueError: Если INGEST_MODE имеет неизвестное значение
+    """
+    params = (
+        settings.INGEST_QUEUE_MAX_SIZE,
+        settings.INGEST_FLUSH_BATCH_SIZE,
+        settings.INGEST_FLUSH_INTERVAL,
+        settings.INGEST_STOP_RETRIES,
+    )
+    if settings.INGEST_MODE == "sync":
+        return None
+    if settings.INGEST_MODE == "memory":
+        return MemoryIngestQueue(*params)
+    if settings.INGEST_MODE == "redis":
+        return RedisStreamIngestQueue(
+            *params, stream=settings.INGEST_REDIS_STREAM, claim_idle=settings.INGEST_REDIS_CLAIM_IDLE
+        )
+    raise ValueError(f"Unknown INGEST_MODE: {settings.INGEST_MODE}")
+
+
+async def submit_readings(db: AsyncSession, readings: List[ReadingBase]) -> Tuple[List[Dict[str, Any]], bool]:
+    """Принять показания: записать сразу или поставить в очередь.
+
+    Существование устройств проверяется в момент приема в обоих режимах,
+    поэтому отклоненные элементы видны клиенту сразу.
+
+    Args:
+        db (AsyncSession): Сессия базы данных
+        readings (List[ReadingBase]): Входящие показания
+
+    Returns:
+        Tuple[List[Dict], bool]: Результаты по элементам и признак того,
+            что показания поставлены в очередь (а не записаны)
+
+    Raises:
+        IngestQueueFull: Если очередь отложенной записи заполнена
+    """
+    if ingest_queue is None:
+        return await insert_readings(db, readings), False
+
+    known_device_ids = await find_existing_device_ids(db, (r.device_id for r in readings))
+    rows, results = await build_reading_rows(db, readings, known_device_ids, accepted_status="accepted")
+    if rows:
+        await ingest_queue.put(rows)
+    return results, True
+
+
+# Глобальная очередь приема показаний
+ingest_queue = create_ingest_queue()
@@ -0,0 +1,157 @@
+"""Отложенное обновление времени последней активности устройств.
+
+Прием показаний не переписывает строку devices на каждое показание.
+Время активности запоминается в памяти процесса, а фоновая задача раз
+в LAST_SEEN_FLUSH_INTERVAL секунд записывает накопленные значения всех
+устройств одним UPDATE ... SET last_seen = CASE id WHEN ... END.
+
+Эндпоинты чтения подмешивают еще не записанное значение к значению
+из БД, поэтому клиенты видят актуальное время активности.
+
+Classes:
+    LastSeenTracker: Накопитель времени активности устройств
+
+Variables:
+    last_seen_tracker: Глобальный экземпляр накопителя
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import case, or_, update
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.device import Device
+
+
+# Ограничение количества параметров SQLite в одном запросе
+FLUSH_CHUNK_SIZE = 300
+
+
+class LastSeenTracker:
+    """Накопитель времени последней активности устройств.
+
+    Attributes:
+        flush_interval (float): Период записи в БД, секунды
+    """
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, datetime] = {}
+        self._flushing: Dict[str, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.flushed_total = 0
+        self.flush_count = 0
+        self.flush_errors = 0
+
+    def touch(self, device_ids: Iterable[str], seen_at: datetime) -> None:
+        """Отметить активность устройств.
+
+        Args:
+            device_ids (Iterable[str]): ID устройств
+            seen_at (datetime): Время активности
+        """
+        pending = self._pending
+        for device_id in device_ids:
+            current = pending.get(device_id)
+            if current is None or current < seen_at:
+                pending[device_id] = seen_at
+
+    def get(self, device_id: str) -> Optional[datetime]:
+        """Незаписанное в БД время активности устройства (или None)."""
+        return self._pending.get(device_id) or self._flushing.get(device_id)
+
+    def merge(self, device_id: str, stored: Optional[datetime]) -> Optional[datetime]:
+        """Выбрать более свежее из значения в БД и накопленного значения.
+
+        Example:
+            >>> last_seen_tracker.merge(d.id, d.last_seen)
+        """
+        cached = self.get(device_id)
+        if cached is None:
+            return stored
+        if stored is None or cached > stored:
+            return cached
+        return stored
+
+    def merge_into(self, device: Device) -> Device:
+        """Подставить в загруженный объект Device свежее время активности.
+
+        Значение выставляется как загруженное из БД, поэтому объект
+        не становится измененным и не будет записан сессией.
+        """
+        merged = self.merge(device.id, device.last_seen)
+        if merged is not device.last_seen:
+            set_committed_value(device, "last_seen", merged)
+        return device
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Остановить фоновую задачу и записать накопленные значения."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Записать накопленные значения пакетным UPDATE.
+
+        Значение не уменьшает last_seen, уже записанный в БД другим путем
+        (например, при обновлении устройства). При ошибке значения
+        возвращаются в накопитель и записываются при следующем цикле.
+        """
+        if not self._pending:
+            return
+        self._flushing, self._pending = self._pending, {}
+        items = list(self._flushing.items())
+        try:
+            async with SessionLocal() as db:
+                for start in range(0, len(items), FLUSH_CHUNK_SIZE):
+                    chunk = dict(items[start:start + FLUSH_CHUNK_SIZE])
+                    new_value = case(chunk, value=Device.id)
+                    await db.execute(
+                        update(Device)
+                        .where(Device.id.in_(chunk.keys()))
+                        .where(or_(Device.last_seen.is_(None), Device.last_seen < new_value))
+                        .values(last_seen=new_value)
+                        .execution_options(synchronize_session=False)
+                    )
+                await db.commit()
+        except Exception as e:
+            self.flush_errors += 1
+            print(f"Error flushing last_seen: {e}")
+            for device_id, seen_at in items:
+                self.touch((device_id,), seen_at)
+        else:
+            self.flush_count += 1
+            self.flushed_total += len(items)
+        finally:
+            self._flushing = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики накопителя.
+
+        Returns:
+            Dict[str, Any]: Количество ожидающих записи устройств и счетчики записи
+        """
+        return {
+            "pending_devices": len(self._pending),
+            "flushed_total": self.flushed_total,
+            "flush_count": self.flush_count,
+            "flush_errors": self.flush_errors,
+        }
+
+
+# Глобальный экземпляр накопителя времени активности
+last_seen_tracker = LastSeenTracker(settings.LAST_SEEN_FLUSH_INTERVAL)
@@ -0,0 +1,209 @@
+"""Последние значения датчиков устройств (снимок для обзора парка).
+
+Для каждой пары (устройство, тип датчика) хранится последнее показание:
+ID, значение, единица измерения и время. Снимок обновляется после
+каждой записи пакета показаний (write_reading_rows()), поэтому текущие
+значения всех устройств читаются одним обращением, без запроса
+к партициям показаний на каждое устройство.
+
+Снимок хранится в Redis (hash device:latest:{device_id} через RedisClient),
+чтобы его видели все процессы приложения, и копией в памяти процесса.
+Если Redis недоступен, запись и чтение продолжаются по копии в памяти,
+а обращения к Redis возобновляются через LATEST_VALUES_REDIS_RETRY секунд.
+Копия в памяти заполняется при запуске из показаний последних
+LATEST_VALUES_WARM_DAYS дней.
+
+Значение заменяется только более новым показанием (по времени, затем ID),
+поэтому загрузка исторических показаний не перезаписывает текущие.
+
+Classes:
+    LatestValueStore: Снимок последних значений датчиков
+
+Variables:
+    latest_values: Глобальный экземпляр снимка
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import redis
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.redis_client import redis_client
+from app.models.sensor_reading import reading_columns
+from app.service.reading_partitions import reading_partitions
+
+
+def _is_newer(entry: Dict[str, Any], current: Optional[Dict[str, Any]]) -> bool:
+    return current is None or (entry["timestamp"], entry["id"]) > (current["timestamp"], current["id"])
+
+
+def _encode(entry: Dict[str, Any]) -> str:
+    return json.dumps({**entry, "timestamp": entry["timestamp"].isoformat()})
+
+
+def _decode(raw: str) -> Dict[str, Any]:
+    entry = json.loads(raw)
+    entry["timestamp"] = datetime.fromisoformat(entry["timestamp"])
+    return entry
+
+
+class LatestValueStore:
+    """Снимок последних значений датчиков устройств.
+
+    Attributes:
+        use_redis (bool): Хранить снимок в Redis (иначе только в памяти процесса)
+        redis_retry (float): Пауза перед повторным обращением к Redis
+                             после ошибки, секунды
+    """
+
+    def __init__(self, use_redis: bool, redis_retry: float):
+        self.use_redis = use_redis
+        self.redis_retry = redis_retry
+        self._values: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._redis_retry_at = 0.0
+        self.updates = 0
+        self.redis_errors = 0
+        self.fallback_reads = 0
+        self.warmed_values = 0
+
+    def _redis_available(self) -> bool:
+        return self.use_redis and time.monotonic() >= self._redis_retry_at
+
+    async def _call_redis(self, method: Callable, *args: Any) -> Any:
+        """Вызвать метод RedisClient в потоке; при ошибке отложить обращения к Redis."""
+        try:
+            return await asyncio.to_thread(method, *args)
+        except redis.RedisError as e:
+            self.redis_errors += 1
+            self._redis_retry_at = time.monotonic() + self.redis_retry
+            print(f"Error accessing latest values in Redis: {e}")
+            raise
+
+    def _merge_local(self, entries: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Обновить копию в памяти; возвращает значения, которые оказались новее."""
+        changed: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for entry in entries:
+            device_values = self._values.setdefault(entry["device_id"], {})
+            value = {key: entry[key] for key in ("id", "value", "unit", "timestamp")}
+            if _is_newer(value, device_values.get(entry["sensor_type"])):
+                device_values[entry["sensor_type"]] = value
+                changed.setdefault(entry["device_id"], {})[entry["sensor_type"]] = value
+        return changed
+
+    async def update(self, rows: List[Dict[str, Any]]) -> None:
+        """Учесть записанные показания.
+
+        Args:
+            rows (List[Dict[str, Any]]): Строки показаний после commit
+                (device_id, sensor_type, id, value, unit, timestamp)
+        """
+        changed = self._merge_local(rows)
+        self.updates += sum(len(values) for values in changed.values())
+        if changed and self._redis_available():
+            encoded = {
+                device_id: {sensor_type: _encode(value) for sensor_type, value in values.items()}
+                for device_id, values in changed.items()
+            }
+            try:
+                await self._call_redis(redis_client.set_latest_values, encoded)
+            except redis.RedisError:
+                pass
+
+    async def get(
+        self,
+        device_ids: Sequence[str],
+        sensor_types: Optional[Iterable[str]] = None
+    ) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Последние значения датчиков устройств.
+
+        Значения из Redis (записанные любым процессом) объединяются
+        с копией в памяти: для каждого датчика берется более новое.
+
+        Args:
+            device_ids (Sequence[str]): ID устройств
+            sensor_types (Iterable[str], optional): Только эти типы датчиков
+
+        Returns:
+            Dict[str, Dict[str, Dict[str, Any]]]: device_id -> {тип датчика:
+                {id, value, unit, timestamp}} (пустой словарь для устройств без показаний)
+
+        Example:
+            >>> await latest_values.get(["abc123"])
+            {"abc123": {"temperature": {"id": 1042, "value": 23.5, "unit": "°C",
+                                        "timestamp": datetime(2025, 10, 4, 12, 0, 5)}}}
+        """
+        result = {device_id: dict(self._values.get(device_id, {})) for device_id in device_ids}
+        if self._redis_available() and device_ids:
+            try:
+                stored = await self._call_redis(redis_client.get_latest_values, list(device_ids))
+            except redis.RedisError:
+                self.fallback_reads += 1
+            else:
+                for device_id, fields in stored.items():
+                    for sensor_type, raw in fields.items():
+                        value = _decode(raw)
+                        if _is_newer(value, result[device_id].get(sensor_type)):
+                            result[device_id][sensor_type] = value
+        elif self.use_redis:
+            self.fallback_reads += 1
+        if sensor_types is not None:
+            wanted = set(sensor_types)
+            result = {
+                device_id: {sensor_type: value for sensor_type, value in values.items() if sensor_type in wanted}
+                for device_id, values in result.items()
+            }
+        return result
+
+    async def delete(self, device_id: str) -> None:
+        """Удалить значения устройства (при удалении устройства или его показаний)."""
+        self._values.pop(device_id, None)
+        if self._redis_available():
+            try:
+                await self._call_redis(redis_client.delete_latest_values, device_id)
+            except redis.RedisError:
+                pass
+
+    async def warm(self, db: AsyncSession) -> int:
+        """Заполнить копию в памяти из показаний последних LATEST_VALUES_WARM_DAYS дней.
+
+        Для каждой партиции выполняется один запрос с группировкой
+        по (устройство, тип датчика) по индексу (device_id, sensor_type, timestamp).
+
+        Returns:
+            int: Количество пар (устройство, тип датчика) в снимке
+        """
+        since = datetime.now() - timedelta(days=settings.LATEST_VALUES_WARM_DAYS)
+        for table in await reading_partitions.overlapping(db, since=since):
+            # SQLite берет остальные колонки из строки с max(timestamp)
+            columns = reading_columns(table)[:-1] + [func.max(table.c.timestamp).label("timestamp")]
+            result = await db.execute(
+                select(*columns)
+                .where(table.c.timestamp >= since)
+                .group_by(table.c.device_id, table.c.sensor_type)
+            )
+            self._merge_local(row._asdict() for row in result)
+        self.warmed_values = sum(len(values) for values in self._values.values())
+        return self.warmed_values
+
+    def stats(self) -> Dict[str, Any]:
+        """Размер снимка и счетчики обращений к Redis."""
+        return {
+            "redis": self.use_redis,
+            "redis_available": self._redis_available(),
+            "devices": len(self._values),
+            "values": sum(len(values) for values in self._values.values()),
+            "warmed_values": self.warmed_values,
+            "updates": self.updates,
+            "redis_errors": self.redis_errors,
+            "fallback_reads": self.fallback_reads,
+        }
+
+
+# Глобальный экземпляр снимка последних значений
+latest_values = LatestValueStore(settings.LATEST_VALUES_REDIS, settings.LATEST_VALUES_REDIS_RETRY)
@@ -0,0 +1,93 @@
+"""Курсорная (keyset) пагинация списков по (время, id).
+
+Страница продолжается с позиции последней строки предыдущей страницы
+(условие по индексируемому времени вместо OFFSET), поэтому страница
+глубоко в истории стоит столько же, сколько первая, а новые строки,
+записанные между запросами, не сдвигают страницы.
+
+Курсор - непрозрачная для клиента строка (base64url от JSON [время, id]).
+
+Classes:
+    CursorError: Некорректный курсор
+
+Functions:
+    encode_cursor: Курсор для позиции строки
+    decode_cursor: Позиция строки из курсора
+    after_cursor: Условие WHERE для строк после позиции
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Tuple, Type
+
+from sqlalchemy import and_, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+
+class CursorError(ValueError):
+    """Курсор поврежден или выдан для другого списка."""
+
+
+def encode_cursor(timestamp: datetime, row_id: Any) -> str:
+    """Курсор, указывающий на строку с временем timestamp и ID row_id.
+
+    Example:
+        >>> encode_cursor(datetime(2025, 10, 4, 12, 0), 1042)
+        'WyIyMDI1LTEwLTA0VDEyOjAwOjAwIiwgMTA0Ml0'
+    """
+    payload = json.dumps([timestamp.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, id_type: Type = str) -> Tuple[datetime, Any]:
+    """Позиция строки из курсора encode_cursor().
+
+    Args:
+        cursor (str): Курсор из ответа (next_cursor)
+        id_type (Type): Тип ID строк списка (int для показаний, str для остальных)
+
+    Returns:
+        Tuple[datetime, Any]: (время, ID) последней строки предыдущей страницы
+
+    Raises:
+        CursorError: Если курсор не удается разобрать
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, row_id = json.loads(raw)
+        timestamp = datetime.fromisoformat(timestamp)
+    except (ValueError, TypeError) as e:
+        raise CursorError("Invalid cursor") from e
+    if type(row_id) is not id_type:
+        raise CursorError("Invalid cursor")
+    return timestamp, row_id
+
+
+def after_cursor(
+    timestamp_column: Any,
+    id_column: Any,
+    position: Tuple[datetime, Any],
+    descending: bool = True
+) -> ColumnElement:
+    """Условие для строк, следующих за позицией в порядке (время, id).
+
+    Условие на время вынесено отдельно, чтобы SQLite использовал его
+    как границу диапазона по индексу (device_id, ..., timestamp).
+
+    Args:
+        timestamp_column: Колонка времени
+        id_column: Колонка ID (разрешает равенство времени)
+        position (Tuple[datetime, Any]): Позиция из decode_cursor()
+        descending (bool): Порядок списка - от новых к старым (True) или наоборот
+
+    Returns:
+        ColumnElement: Условие для .where()
+
+    Example:
+        >>> query.where(after_cursor(Alert.timestamp, Alert.id, decode_cursor(cursor)))
+    """
+    timestamp, row_id = position
+    if descending:
+        return and_(timestamp_column <= timestamp, or_(timestamp_column < timestamp, id_column < row_id))
+    return and_(timestamp_column >= timestamp, or_(timestamp_column > timestamp, id_column > row_id))
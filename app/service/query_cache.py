@@ -0,0 +1,191 @@
+"""Кэш результатов запросов показаний и оповещений.
+
+Одни и те же запросы (например, показания за 24 часа и список
+оповещений устройства) повторяет каждая открытая панель мониторинга.
+Результат сохраняется по ключу из области запроса, ID устройства,
+версии данных устройства (data_versions) и нормализованных параметров.
+Версия увеличивается при каждом изменении данных устройства, поэтому
+сохраненный результат никогда не отдается после изменения: ключ
+с новой версией просто не найден, а старые записи вытесняются.
+
+Результаты хранятся в памяти процесса (LRU, не больше QUERY_CACHE_SIZE
+записей) и, при QUERY_CACHE_REDIS, в Redis (общий кэш всех процессов).
+Время жизни QUERY_CACHE_TTL ограничивает сдвиг окон, отсчитываемых
+от текущего момента (timeframe=24h): за это время окно сдвигается,
+но данные устройства не меняются.
+
+Classes:
+    QueryCache: Кэш результатов запросов
+
+Variables:
+    query_cache: Глобальный экземпляр кэша
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import redis
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+from app.db.redis_client import redis_client
+from app.service.data_versions import data_versions
+
+
+class QueryCache:
+    """Кэш результатов запросов по версиям данных устройств.
+
+    Attributes:
+        enabled (bool): Кэширование включено (иначе результат всегда вычисляется)
+        max_entries (int): Максимальное количество результатов в памяти процесса
+        ttl (float): Время жизни результата, секунды
+        use_redis (bool): Хранить результаты также в Redis
+        redis_retry (float): Пауза перед повторным обращением к Redis
+                             после ошибки, секунды
+    """
+
+    def __init__(self, enabled: bool, max_entries: int, ttl: float, use_redis: bool, redis_retry: float):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self.redis_retry = redis_retry
+        # ключ -> (момент устаревания, результат)
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._redis_retry_at = 0.0
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.redis_errors = 0
+        self.bypassed = 0
+
+    def _redis_available(self) -> bool:
+        return self.use_redis and time.monotonic() >= self._redis_retry_at
+
+    async def _call_redis(self, method: Callable, *args: Any) -> Any:
+        """Вызвать метод RedisClient в потоке; при ошибке отложить обращения к Redis."""
+        try:
+            return await asyncio.to_thread(method, *args)
+        except redis.RedisError as e:
+            self.redis_errors += 1
+            self._redis_retry_at = time.monotonic() + self.redis_retry
+            print(f"Error accessing query cache in Redis: {e}")
+            raise
+
+    def _store(self, key: str, value: Any, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(
+        self,
+        scope: str,
+        device_id: str,
+        params: Dict[str, Any],
+        compute: Callable[[], Awaitable[Any]],
+        version: Optional[str] = None
+    ) -> Any:
+        """Результат запроса из кэша или вычисленный и сохраненный.
+
+        Версия устройства читается до вычисления: если данные изменятся
+        во время вычисления, результат сохранится под старой версией
+        и больше не будет отдан.
+
+        Args:
+            scope (str): Область запроса (например, "readings", "alerts")
+            device_id (str): ID устройства, от данных которого зависит результат
+            params (Dict[str, Any]): Параметры запроса
+            compute (Callable[[], Awaitable[Any]]): Вычисление результата
+            version (str, optional): Уже прочитанная версия устройства
+                (например, для ETag ответа); если версии недоступны
+                (data_versions.get() вернул None), результат вычисляется
+
+        Returns:
+            Any: Результат, приведенный к JSON-совместимому виду
+
+        Example:
+            >>> await query_cache.get_or_compute(
+            ...     "alerts", "abc123", {"status": None, "limit": 10},
+            ...     lambda: load_alerts(db, "abc123")
+            ... )
+            {"device_id": "abc123", "total": 2, "alerts": [...]}
+        """
+        if not self.enabled:
+            return await compute()
+        if version is None:
+            version = await data_versions.version(device_id)
+        if version is None:
+            # Версии недоступны: сохраненный результат нельзя проверить на актуальность
+            self.bypassed += 1
+            return await compute()
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+        key = f"{scope}:{device_id}:{version}:{digest}"
+        now = time.monotonic()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+
+        if self._redis_available():
+            try:
+                raw = await self._call_redis(redis_client.get_cached_result, key)
+            except redis.RedisError:
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self._store(key, value, now + self.ttl)
+                self.redis_hits += 1
+                return value
+
+        self.misses += 1
+        value = jsonable_encoder(await compute())
+        self._store(key, value, now + self.ttl)
+        if self._redis_available():
+            try:
+                await self._call_redis(
+                    redis_client.set_cached_result, key, json.dumps(value), max(1, int(self.ttl))
+                )
+            except redis.RedisError:
+                pass
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """Размер кэша и доля запросов, отданных из кэша."""
+        requests = self.hits + self.redis_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "redis": self.use_redis,
+            "redis_available": self._redis_available(),
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.redis_hits) / requests, 4) if requests else None,
+            "evictions": self.evictions,
+            "redis_errors": self.redis_errors,
+            "bypassed": self.bypassed,
+            "versions": data_versions.stats(),
+        }
+
+
+# Глобальный экземпляр кэша результатов запросов
+query_cache = QueryCache(
+    settings.QUERY_CACHE_ENABLED,
+    settings.QUERY_CACHE_SIZE,
+    settings.QUERY_CACHE_TTL,
+    settings.QUERY_CACHE_REDIS,
+    settings.DATA_VERSIONS_REDIS_RETRY,
+)
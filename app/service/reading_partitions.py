@@ -0,0 +1,147 @@
+"""Партиции показаний датчиков по календарным месяцам.
+
+Показания записываются в таблицы sensor_readings_YYYYMM по месяцу
+времени показания. Таблица месяца создается при первой записи в нее,
+чтение выбирает только партиции, пересекающиеся с запрошенным интервалом,
+а удаление старых данных сводится к DROP TABLE целой партиции: без
+DELETE по строкам, роста WAL и долгой блокировки записи.
+
+Список существующих партиций читается из схемы БД при каждом запросе
+(это запрос к sqlite_master, а не к данным), поэтому партиции,
+созданные другим процессом, видны сразу.
+
+Classes:
+    ReadingPartitions: Создание, выбор и удаление партиций
+
+Variables:
+    reading_partitions: Глобальный экземпляр
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import Table, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.device_stats import DeviceStats
+from app.models.sensor_reading import is_partition_name, partition_bounds, sensor_readings_table
+from app.service.device_stats import add_device_counts
+
+
+class ReadingPartitions:
+    """Реестр партиций показаний."""
+
+    def __init__(self):
+        # Партиции, созданные или найденные этим процессом
+        self._created: Set[str] = set()
+
+    async def names(self, db: AsyncSession) -> List[str]:
+        """Имена существующих партиций, от новых к старым.
+
+        Args:
+            db (AsyncSession): Сессия базы данных
+
+        Returns:
+            List[str]: Имена таблиц sensor_readings_YYYYMM
+        """
+        table_names = await db.run_sync(lambda session: inspect(session.connection()).get_table_names())
+        return sorted((name for name in table_names if is_partition_name(name)), reverse=True)
+
+    async def overlapping(
+        self,
+        db: AsyncSession,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[Table]:
+        """Партиции, пересекающиеся с интервалом [since, until), от новых к старым.
+
+        Args:
+            db (AsyncSession): Сессия базы данных
+            since (datetime, optional): Начало интервала (None - без ограничения)
+            until (datetime, optional): Конец интервала (None - без ограничения)
+
+        Returns:
+            List[Table]: Таблицы партиций
+
+        Example:
+            >>> tables = await reading_partitions.overlapping(db, since=datetime.now() - timedelta(days=1))
+        """
+        tables = []
+        for name in await self.names(db):
+            start, end = partition_bounds(name)
+            if since is not None and end <= since:
+                continue
+            if until is not None and start >= until:
+                continue
+            tables.append(sensor_readings_table(name))
+        return tables
+
+    async def ensure(self, db: AsyncSession, names: Iterable[str]) -> None:
+        """Создать партиции, которых еще нет.
+
+        Создание фиксируется commit сразу, поэтому вызывать нужно до добавления
+        в сессию изменений, которые еще не должны быть записаны.
+
+        Args:
+            db (AsyncSession): Сессия базы данных
+            names (Iterable[str]): Имена партиций (partition_name())
+        """
+        missing = [name for name in set(names) if name not in self._created]
+        if not missing:
+            return
+
+        def create(session):
+            connection = session.connection()
+            for name in missing:
+                sensor_readings_table(name).create(connection, checkfirst=True)
+
+        await db.run_sync(create)
+        await db.commit()
+        self._created.update(missing)
+
+    async def drop_before(self, db: AsyncSession, cutoff: datetime) -> List[str]:
+        """Удалить партиции, все показания которых старше cutoff.
+
+        Партиция удаляется целиком одним DROP TABLE, время не зависит
+        от количества показаний в ней. Партиция, в которой есть показания
+        новее cutoff, не удаляется. Счетчики показаний устройств (device_stats)
+        уменьшаются в той же транзакции на количество показаний в партициях
+        (подсчет по индексу device_id).
+
+        Args:
+            db (AsyncSession): Сессия базы данных (соединение на запись)
+            cutoff (datetime): Граница хранения
+
+        Returns:
+            List[str]: Имена удаленных партиций
+
+        Example:
+            >>> await reading_partitions.drop_before(db, datetime(2025, 1, 1))
+            ['sensor_readings_202411', 'sensor_readings_202412']
+        """
+        expired = [name for name in await self.names(db) if partition_bounds(name)[1] <= cutoff]
+        if not expired:
+            return []
+
+        removed: Dict[str, int] = defaultdict(int)
+        for name in expired:
+            table = sensor_readings_table(name)
+            result = await db.execute(select(table.c.device_id, func.count()).group_by(table.c.device_id))
+            for device_id, count in result:
+                removed[device_id] -= count
+        await add_device_counts(db, DeviceStats.readings_count, removed)
+
+        def drop(session):
+            connection = session.connection()
+            for name in expired:
+                sensor_readings_table(name).drop(connection, checkfirst=True)
+
+        await db.run_sync(drop)
+        await db.commit()
+        self._created.difference_update(expired)
+        return sorted(expired)
+
+
+# Глобальный реестр партиций показаний
+reading_partitions = ReadingPartitions()
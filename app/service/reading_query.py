@@ -0,0 +1,290 @@
+"""Чтение показаний датчиков из партиций.
+
+Запросы к показаниям выполняются по партициям, пересекающимся
+с запрошенным интервалом времени, от новых к старым. Выборка последних
+показаний останавливается, как только набран limit, поэтому запрос
+последних N показаний обычно читает одну партицию.
+
+Строки результатов имеют атрибуты id, device_id, sensor_type, value,
+unit, timestamp (см. reading_columns()).
+
+Для длинных интервалов показания читаются из агрегатов reading_rollups
+с разрешением, при котором весь интервал помещается в limit точек
+(choose_resolution(), rollup_series()).
+
+Functions:
+    count_readings: Количество показаний устройств
+    latest_readings: Последние показания устройства
+    stream_device_readings: Все показания устройства порциями
+    delete_device_readings: Удаление показаний устройства из всех партиций
+    choose_resolution: Разрешение агрегатов для интервала и количества точек
+    rollup_series: Агрегаты показаний устройства за интервал
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Table, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.enums.rollup_resolution import RollupResolution
+from app.enums.sensor_type import SensorType
+from app.models.reading_rollup import ReadingRollup
+from app.models.sensor_reading import reading_columns
+from app.models.types import datetime_to_millis, millis_to_datetime
+from app.service.pagination import after_cursor
+from app.service.reading_partitions import reading_partitions
+from app.service.rollup_engine import merge_aggregate, rollup_engine
+
+
+def _filters(
+    table: Table,
+    device_ids: Sequence[str],
+    sensor_type: Optional[SensorType] = None,
+    since: Optional[datetime] = None
+) -> List[Any]:
+    filters = [
+        table.c.device_id == device_ids[0] if len(device_ids) == 1 else table.c.device_id.in_(device_ids)
+    ]
+    if sensor_type:
+        filters.append(table.c.sensor_type == sensor_type)
+    if since:
+        filters.append(table.c.timestamp >= since)
+    return filters
+
+
+async def count_readings(
+    db: AsyncSession,
+    device_ids: Sequence[str],
+    sensor_type: Optional[SensorType] = None,
+    since: Optional[datetime] = None
+) -> int:
+    """Количество показаний устройств по всем подходящим партициям.
+
+    Args:
+        db (AsyncSession): Сессия базы данных
+        device_ids (Sequence[str]): ID устройств
+        sensor_type (SensorType, optional): Фильтр по типу датчика
+        since (datetime, optional): Только показания не старше этого времени
+
+    Returns:
+        int: Количество показаний
+    """
+    if not device_ids:
+        return 0
+    total = 0
+    for table in await reading_partitions.overlapping(db, since=since):
+        total += await db.scalar(
+            select(func.count()).select_from(table).where(*_filters(table, device_ids, sensor_type, since))
+        )
+    return total
+
+
+async def latest_readings(
+    db: AsyncSession,
+    device_id: str,
+    limit: int,
+    sensor_type: Optional[SensorType] = None,
+    since: Optional[datetime] = None,
+    before: Optional[Tuple[datetime, int]] = None
+) -> List[Any]:
+    """Последние показания устройства, от новых к старым.
+
+    Партиции читаются от новых к старым, пока не набрано limit показаний.
+    Следующая страница читается с позиции последнего показания (before),
+    поэтому партиции новее этой позиции не затрагиваются.
+
+    Args:
+        db (AsyncSession): Сессия базы данных
+        device_id (str): ID устройства
+        limit (int): Максимальное количество показаний
+        sensor_type (SensorType, optional): Фильтр по типу датчика
+        since (datetime, optional): Только показания не старше этого времени
+        before (Tuple[datetime, int], optional): Только показания после позиции
+            (время, id) в порядке от новых к старым (decode_cursor())
+
+    Returns:
+        List[Row]: Строки с атрибутами id, sensor_type, value, unit, timestamp
+
+    Example:
+        >>> rows = await latest_readings(db, "abc123", 20, since=datetime.now() - timedelta(hours=1))
+        >>> rows[0].value
+        23.5
+    """
+    readings: List[Any] = []
+    until = before[0] + timedelta(milliseconds=1) if before else None
+    for table in await reading_partitions.overlapping(db, since=since, until=until):
+        if len(readings) >= limit:
+            break
+        filters = _filters(table, [device_id], sensor_type, since)
+        if before:
+            filters.append(after_cursor(table.c.timestamp, table.c.id, before))
+        result = await db.execute(
+            select(*reading_columns(table))
+            .where(*filters)
+            .order_by(table.c.timestamp.desc(), table.c.id.desc())
+            .limit(limit - len(readings))
+        )
+        readings.extend(result.all())
+    return readings
+
+
+async def stream_device_readings(
+    db: AsyncSession,
+    device_id: str,
+    chunk_size: int
+) -> AsyncIterator[List[Any]]:
+    """Все показания устройства порциями, от новых к старым.
+
+    Каждая партиция читается потоково (server-side cursor), в памяти
+    находится не более одной порции.
+
+    Args:
+        db (AsyncSession): Сессия базы данных
+        device_id (str): ID устройства
+        chunk_size (int): Размер порции
+
+    Yields:
+        List[Row]: Порция строк
+
+    Example:
+        >>> async for chunk in stream_device_readings(db, device_id, 1000):
+        ...     write_csv(chunk)
+    """
+    for table in await reading_partitions.overlapping(db):
+        result = await db.stream(
+            select(*reading_columns(table))
+            .where(table.c.device_id == device_id)
+            .order_by(table.c.timestamp.desc(), table.c.id.desc())
+            .execution_options(yield_per=chunk_size)
+        )
+        async for chunk in result.partitions():
+            yield chunk
+
+
+async def delete_device_readings(db: AsyncSession, device_id: str) -> int:
+    """Удалить показания устройства из всех партиций и его агрегаты.
+
+    Изменения не фиксируются: commit выполняет вызывающий код вместе
+    с удалением устройства.
+
+    Args:
+        db (AsyncSession): Сессия базы данных (соединение на запись)
+        device_id (str): ID устройства
+
+    Returns:
+        int: Количество удаленных показаний
+    """
+    deleted = 0
+    for table in await reading_partitions.overlapping(db):
+        result = await db.execute(delete(table).where(table.c.device_id == device_id))
+        deleted += result.rowcount
+    await db.execute(delete(ReadingRollup).where(ReadingRollup.device_id == device_id))
+    rollup_engine.forget(device_id)
+    return deleted
+
+
+def choose_resolution(window: timedelta, limit: int) -> RollupResolution:
+    """Самое подробное разрешение, при котором интервал помещается в limit точек.
+
+    Точки считаются на один тип датчика. Если интервал не помещается
+    ни в одном разрешении, возвращается самое грубое.
+
+    Example:
+        >>> choose_resolution(timedelta(days=30), 1000)
+        <RollupResolution.HOUR: '1h'>
+        >>> choose_resolution(timedelta(days=7), 100)
+        <RollupResolution.DAY: '1d'>
+    """
+    window_millis = window // timedelta(milliseconds=1)
+    for resolution in RollupResolution:
+        # +1: интервал, начатый внутри бакета, задевает еще один бакет
+        if -(-window_millis // resolution.millis) + 1 <= limit:
+            return resolution
+    return RollupResolution.DAY
+
+
+async def rollup_series(
+    db: AsyncSession,
+    device_id: str,
+    resolution: RollupResolution,
+    since: datetime,
+    sensor_type: Optional[SensorType] = None,
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Агрегаты показаний устройства за интервал, от новых бакетов к старым.
+
+    К строкам reading_rollups добавляются еще не записанные агрегаты
+    движка, поэтому последний бакет учитывает только что принятые показания.
+
+    Args:
+        db (AsyncSession): Сессия базы данных
+        device_id (str): ID устройства
+        resolution (RollupResolution): Разрешение агрегатов
+        since (datetime): Начало интервала (бакет, в который оно попадает,
+            включается целиком)
+        sensor_type (SensorType, optional): Фильтр по типу датчика
+        limit (int, optional): Не больше limit последних точек на тип датчика
+
+    Returns:
+        List[Dict[str, Any]]: Точки с ключами sensor_type, timestamp (начало бакета),
+            value (среднее), min, max, count, last
+
+    Example:
+        >>> await rollup_series(db, "abc123", RollupResolution.HOUR, datetime.now() - timedelta(days=30))
+        [{"sensor_type": "temperature", "timestamp": datetime(2025, 10, 4, 12), "value": 23.4,
+          "min": 22.9, "max": 24.1, "count": 360, "last": 23.8}, ...]
+    """
+    since_bucket = resolution.bucket_start(datetime_to_millis(since))
+    if limit is not None:
+        # Последние limit бакетов каждого типа не старше limit бакетов от текущего
+        now_bucket = resolution.bucket_start(datetime_to_millis(datetime.now()))
+        since_bucket = max(since_bucket, now_bucket - (limit - 1) * resolution.millis)
+    table = ReadingRollup.__table__
+    filters = [
+        table.c.device_id == device_id,
+        table.c.resolution == resolution.value,
+        table.c.bucket >= millis_to_datetime(since_bucket),
+    ]
+    if sensor_type:
+        filters.append(table.c.sensor_type == sensor_type)
+    result = await db.execute(select(
+        table.c.sensor_type, table.c.bucket, table.c.count, table.c.min, table.c.max,
+        table.c.sum, table.c.last_value, table.c.last_timestamp
+    ).where(*filters))
+    # Незаписанные агрегаты берутся после запроса: агрегат, записанный
+    # во время запроса, может не попасть в этот ответ, но не учитывается дважды
+    pending = rollup_engine.pending(
+        device_id, resolution, since_bucket, sensor_type.value if sensor_type else None
+    )
+
+    aggregates = {}
+    for row in result:
+        aggregates[(row.sensor_type, datetime_to_millis(row.bucket))] = [
+            row.count, row.min, row.max, row.sum, row.last_value, datetime_to_millis(row.last_timestamp)
+        ]
+    for key, aggregate in pending.items():
+        current = aggregates.get(key)
+        if current is None:
+            aggregates[key] = aggregate
+        else:
+            merge_aggregate(current, aggregate)
+
+    points = []
+    per_type: Dict[str, int] = {}
+    for (key_type, bucket), aggregate in sorted(
+        aggregates.items(), key=lambda item: (item[0][1], item[0][0]), reverse=True
+    ):
+        per_type[key_type] = per_type.get(key_type, 0) + 1
+        if limit is not None and per_type[key_type] > limit:
+            continue
+        points.append({
+            "sensor_type": key_type,
+            "timestamp": millis_to_datetime(bucket),
+            "value": aggregate[3] / aggregate[0],
+            "min": aggregate[1],
+            "max": aggregate[2],
+            "count": aggregate[0],
+            "last": aggregate[4],
+        })
+    return points
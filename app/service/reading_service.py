@@ -0,0 +1,248 @@
+"""Сервис записи показаний датчиков.
+
+Этот модуль содержит общий путь сохранения показаний датчиков, который
+используют эндпоинты приема данных. Показания сохраняются пакетно:
+одна проверка устройств на весь пакет, один многострочный INSERT
+и один commit вместо отдельной транзакции на каждое показание.
+Время активности устройств (last_seen) не записывается в рамках
+транзакции показаний, а накапливается в LastSeenTracker.
+
+Строки показаний передаются между функциями (и через очередь отложенной
+записи) в логическом виде: тип датчика и единица измерения - строки,
+время - datetime. В компактный формат таблицы (ID единицы из справочника)
+строки преобразуются непосредственно перед INSERT. Каждая строка
+записывается в партицию месяца своего времени (sensor_readings_YYYYMM).
+
+Functions:
+    find_existing_device_ids: Проверка существования устройств пакета одним запросом
+    build_reading_rows: Подготовка строк sensor_readings и результатов по элементам
+    write_reading_rows: Запись готовых строк одним INSERT в одной транзакции
+    find_written_reading_ids: ID строк пакета, уже записанных в партиции
+    publish_reading_rows: Публикация записанных показаний в шину событий
+    insert_readings: Пакетная вставка показаний с результатом по каждому элементу
+"""
+
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.enums.event_type import EventType
+from app.models.device_stats import DeviceStats
+from app.models.sensor_reading import ReadingBase, partition_name, sensor_readings_table
+from app.models.types import datetime_to_millis, millis_to_datetime
+from app.service.anomaly_detector import anomaly_detector
+from app.service.data_versions import data_versions
+from app.service.device_cache import device_cache
+from app.service.device_stats import add_device_counts
+from app.service.event_bus import event_bus
+from app.service.hot_window import hot_window
+from app.service.id_allocator import reading_id_allocator
+from app.service.last_seen_tracker import last_seen_tracker
+from app.service.latest_values import latest_values
+from app.service.reading_partitions import reading_partitions
+from app.service.rollup_engine import rollup_engine
+from app.service.threshold_engine import threshold_engine
+from app.service.unit_registry import unit_registry
+
+
+async def find_existing_device_ids(db: AsyncSession, device_ids: Iterable[str]) -> Set[str]:
+    """Возвращает подмножество переданных ID устройств, которые есть в БД.
+
+    Устройства проверяются через кэш устройств; промахи загружаются
+    из БД одним запросом на порцию ID.
+
+    Args:
+        db (AsyncSession): Сессия базы данных
+        device_ids (Iterable[str]): ID устройств для проверки
+
+    Returns:
+        Set[str]: ID существующих устройств
+    """
+    return set(await device_cache.get_many(db, device_ids))
+
+
+async def build_reading_rows(
+    db: AsyncSession,
+    readings: List[ReadingBase],
+    known_device_ids: Set[str],
+    accepted_status: str = "created"
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Готовит строки для вставки в sensor_readings.
+
+    ID и время приема назначаются здесь, поэтому клиент получает ID
+    показания сразу, даже если запись в БД произойдет позже. ID выдаются
+    reading_id_allocator из зарезервированного блока.
+
+    Args:
+        db (AsyncSession): Сессия для резервирования блока ID
+        readings (List[ReadingBase]): Входящие показания (ReadingBase или объекты
+            с теми же атрибутами, например DecodedReading из бинарного кадра)
+        known_device_ids (Set[str]): ID существующих устройств
+        accepted_status (str): Статус принятого элемента в результатах
+                               ("created" или "accepted" для отложенной записи)
+
+    Returns:
+        Tuple[List[Dict], List[Dict]]: Строки для INSERT и результаты по каждому
+            элементу в порядке входного списка
+    """
+    now_millis = datetime_to_millis(datetime.now())
+    accepted_count = sum(1 for reading in readings if reading.device_id in known_device_ids)
+    ids = iter(await reading_id_allocator.allocate(db, accepted_count))
+    rows = []
+    results = []
+    for index, reading in enumerate(readings):
+        if reading.device_id not in known_device_ids:
+            results.append({"index": index, "status": "rejected", "detail": "Device not found"})
+            continue
+
+        row = {
+            "id": next(ids),
+            "device_id": reading.device_id,
+            "sensor_type": reading.sensor_type.value,
+            "value": reading.value,
+            "unit": reading.unit,
+            # Время в точности хранения (мс, без часового пояса), чтобы ответ
+            # и события совпадали с тем, что потом вернет чтение из БД
+            "timestamp": millis_to_datetime(
+                datetime_to_millis(reading.timestamp) if reading.timestamp else now_millis
+            ),
+        }
+        rows.append(row)
+        results.append({"index": index, "status": accepted_status, "id": row["id"]})
+
+    return rows, results
+
+
+async def write_reading_rows(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """Записывает подготовленные строки показаний одной транзакцией.
+
+    Вставляет строки одним INSERT на партицию, увеличивает счетчики
+    показаний устройств (device_stats) и выполняет единственный commit.
+    Единицы измерения заменяются ID из справочника units (новая единица
+    и новая партиция добавляются отдельным commit до INSERT). После commit
+    отмечает активность устройств в LastSeenTracker, добавляет показания
+    в агрегаты RollupEngine, горячее окно и снимок последних значений,
+    публикует показания в шину событий, проверяет их по порогам
+    устройств и детектором аномалий (оповещения записываются
+    отдельным commit). Ошибка этой обработки записывается в лог
+    и не выбрасывается: исключение означает, что строки не записаны.
+
+    Args:
+        db (AsyncSession): Сессия базы данных
+        rows (List[Dict[str, Any]]): Строки, подготовленные build_reading_rows()
+    """
+    if not rows:
+        return
+
+    unit_ids = await unit_registry.resolve(db, {row["unit"] for row in rows})
+    by_partition: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for row in rows:
+        by_partition[partition_name(row["timestamp"])].append({
+            "id": row["id"],
+            "device_id": row["device_id"],
+            "sensor_type": row["sensor_type"],
+            "value": row["value"],
+            "unit_id": unit_ids.get(row["unit"]),
+            "timestamp": row["timestamp"],
+        })
+    await reading_partitions.ensure(db, by_partition)
+    for name, partition_rows in by_partition.items():
+        await db.execute(insert(sensor_readings_table(name)), partition_rows)
+    await add_device_counts(db, DeviceStats.readings_count, Counter(row["device_id"] for row in rows))
+    await db.commit()
+
+    # Строки уже записаны: ошибка обработки после commit не должна
+    # приводить к повторной записи пакета (очередь, ответ 500 клиенту)
+    try:
+        await _process_written_rows(db, rows)
+    except Exception as e:
+        print(f"Error processing written readings: {e}")
+        await db.rollback()
+
+
+async def _process_written_rows(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    device_ids = {row["device_id"] for row in rows}
+    await data_versions.bump(device_ids)
+    last_seen_tracker.touch(device_ids, datetime.now())
+    rollup_engine.add(rows)
+    if hot_window is not None:
+        hot_window.add(rows)
+    await latest_values.update(rows)
+    publish_reading_rows(rows)
+    if threshold_engine is not None:
+        await threshold_engine.evaluate(db, rows)
+    if anomaly_detector is not None:
+        await anomaly_detector.evaluate(db, rows)
+
+
+async def find_written_reading_ids(db: AsyncSession, rows: List[Dict[str, Any]]) -> Set[int]:
+    """ID строк пакета, которые уже есть в партициях показаний.
+
+    Используется очередью отложенной записи при повторной доставке пакета,
+    записанного до сбоя, но не подтвержденного.
+
+    Args:
+        db (AsyncSession): Сессия базы данных
+        rows (List[Dict[str, Any]]): Строки, подготовленные build_reading_rows()
+
+    Returns:
+        Set[int]: ID записанных строк
+    """
+    by_partition: Dict[str, List[int]] = defaultdict(list)
+    for row in rows:
+        by_partition[partition_name(row["timestamp"])].append(row["id"])
+    existing = set(await reading_partitions.names(db))
+    written: Set[int] = set()
+    for name, ids in by_partition.items():
+        if name in existing:
+            table = sensor_readings_table(name)
+            written.update(await db.scalars(select(table.c.id).where(table.c.id.in_(ids))))
+    return written
+
+
+def publish_reading_rows(rows: List[Dict[str, Any]]) -> None:
+    """Публикует записанные показания подписчикам потока реального времени.
+
+    Args:
+        rows (List[Dict[str, Any]]): Строки sensor_readings после commit
+    """
+    for row in rows:
+        device_id = row["device_id"]
+        if event_bus.has_subscribers(EventType.READING, device_id):
+            event_bus.publish(EventType.READING, device_id, {
+                "id": row["id"],
+                "sensor_type": row["sensor_type"],
+                "value": row["value"],
+                "unit": row["unit"],
+                "timestamp": row["timestamp"],
+            })
+
+
+async def insert_readings(db: AsyncSession, readings: List[ReadingBase]) -> List[Dict[str, Any]]:
+    """Сохраняет пакет показаний датчиков одной транзакцией.
+
+    Проверяет существование всех устройств пакета одним запросом
+    и записывает показания существующих устройств через write_reading_rows().
+    Показания неизвестных устройств отклоняются, не прерывая обработку остальных.
+
+    Args:
+        db (AsyncSession): Сессия базы данных
+        readings (List[ReadingBase]): Показания для сохранения
+
+    Returns:
+        List[Dict[str, Any]]: Результат по каждому показанию в порядке входного списка:
+            {"index": 0, "status": "created", "id": 1001} или
+            {"index": 1, "status": "rejected", "detail": "Device not found"}
+
+    Example:
+        >>> results = await insert_readings(db, batch.readings)
+        >>> sum(r["status"] == "created" for r in results)
+        998
+    """
+    known_device_ids = await find_existing_device_ids(db, (r.device_id for r in readings))
+    rows, results = await build_reading_rows(db, readings, known_device_ids)
+    await write_reading_rows(db, rows)
+    return results
@@ -0,0 +1,311 @@
+"""Удаление устаревших показаний и агрегатов по политикам хранения.
+
+Политики задаются в настройках: RETENTION_RAW_DAYS для сырых показаний
+и RETENTION_ROLLUP_*_DAYS для агрегатов каждого разрешения (0 - хранить
+всегда). Задача включается явно (RETENTION_ENABLED=True, по умолчанию
+выключена) и при запуске приложения и затем раз в RETENTION_INTERVAL
+секунд:
+
+    1. Записывает накопленные агрегаты движка и досчитывает агрегаты
+       по сырым показаниям, которые будут удалены (rollup_from_readings_sql),
+       чтобы история за удаляемый период осталась в reading_rollups.
+    2. Удаляет партиции, целиком вышедшие за срок хранения (DROP TABLE),
+       а в партиции на границе срока - показания старше границы
+       пакетами по RETENTION_BATCH_SIZE строк.
+    3. Удаляет устаревшие агрегаты такими же пакетами.
+    4. Возвращает освободившиеся страницы файлу БД порциями
+       PRAGMA incremental_vacuum (для баз с auto_vacuum = INCREMENTAL).
+
+Каждый пакет - отдельная короткая транзакция, между пакетами задача
+делает паузу RETENTION_BATCH_PAUSE, поэтому соединение на запись
+не занимается надолго и прием показаний не останавливается.
+
+Граница хранения выравнивается по началу суток: бакеты агрегатов
+всех разрешений целиком лежат до границы или после нее.
+
+Classes:
+    RetentionJob: Периодическое удаление устаревших данных
+
+Variables:
+    retention_job: Глобальный экземпляр (None если RETENTION_ENABLED=False)
+"""
+
+import asyncio
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import SessionLocal, engine
+from app.enums.rollup_resolution import RollupResolution
+from app.models.device_stats import DeviceStats
+from app.models.reading_rollup import rollup_from_readings_sql
+from app.models.types import datetime_to_millis, millis_to_datetime
+from app.service.data_versions import data_versions
+from app.service.device_stats import add_device_counts
+from app.service.reading_partitions import reading_partitions
+from app.service.rollup_engine import rollup_engine
+
+
+def retention_cutoff(now: datetime, days: int) -> datetime:
+    """Граница хранения: начало суток, отстоящих от now на days дней.
+
+    Example:
+        >>> retention_cutoff(datetime(2025, 10, 8, 15, 30), 7)
+        datetime.datetime(2025, 10, 1, 0, 0)
+    """
+    day = RollupResolution.DAY
+    return millis_to_datetime(day.bucket_start(datetime_to_millis(now - timedelta(days=days))))
+
+
+class RetentionStopped(Exception):
+    """Запуск прерван остановкой задачи (между транзакциями)."""
+
+
+class RetentionJob:
+    """Периодическое удаление устаревших показаний и агрегатов.
+
+    Attributes:
+        interval (float): Период запуска, секунды
+        raw_days (int): Срок хранения сырых показаний, дни (0 - всегда)
+        rollup_days (Dict[RollupResolution, int]): Сроки хранения агрегатов, дни
+        batch_size (int): Строк в одной транзакции удаления
+        batch_pause (float): Пауза между транзакциями, секунды
+        vacuum_pages (int): Страниц за один PRAGMA incremental_vacuum
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        raw_days: int,
+        rollup_days: Dict[RollupResolution, int],
+        batch_size: int,
+        batch_pause: float,
+        vacuum_pages: int
+    ):
+        self.interval = interval
+        self.raw_days = raw_days
+        self.rollup_days = rollup_days
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.vacuum_pages = vacuum_pages
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self.runs = 0
+        self.errors = 0
+        self.dropped_partitions_total = 0
+        self.deleted_readings_total = 0
+        self.deleted_rollups_total = 0
+        self.vacuumed_pages_total = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    async def start(self) -> None:
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Остановить фоновую задачу после текущей транзакции.
+
+        Задача не отменяется посреди транзакции: она завершает текущий
+        пакет и выходит на ближайшей паузе между пакетами.
+        """
+        if self._task:
+            self._stopping.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await self.run_once()
+            except RetentionStopped:
+                return
+            except Exception as e:
+                self.errors += 1
+                print(f"Error applying retention: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _pause(self) -> None:
+        """Пауза между транзакциями; прерывает запуск, если задача останавливается."""
+        await asyncio.sleep(self.batch_pause)
+        if self._stopping.is_set():
+            raise RetentionStopped()
+
+    async def run_once(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Применить политики хранения один раз.
+
+        Args:
+            now (datetime, optional): Текущее время (по умолчанию datetime.now())
+
+        Returns:
+            Dict[str, Any]: Итог запуска: границы хранения, удаленные партиции,
+                количество удаленных показаний и агрегатов, освобожденные страницы
+
+        Example:
+            >>> await retention_job.run_once()
+            {"raw_cutoff": datetime(2025, 10, 1), "dropped_partitions": ["sensor_readings_202508"],
+             "deleted_readings": 1203344, "deleted_rollups": 86400, "vacuumed_pages": 52311, ...}
+        """
+        started = time.perf_counter()
+        now = now or datetime.now()
+        result: Dict[str, Any] = {
+            "started_at": now,
+            "raw_cutoff": None,
+            "dropped_partitions": [],
+            "deleted_readings": 0,
+            "deleted_rollups": 0,
+            "vacuumed_pages": 0,
+        }
+
+        if self.raw_days:
+            cutoff = retention_cutoff(now, self.raw_days)
+            result["raw_cutoff"] = cutoff
+            await rollup_engine.flush()
+            async with SessionLocal() as db:
+                expiring = [table.name for table in await reading_partitions.overlapping(db, until=cutoff)]
+            for name in expiring:
+                await self._summarize_partition(name, cutoff)
+            async with SessionLocal() as db:
+                result["dropped_partitions"] = await reading_partitions.drop_before(db, cutoff)
+            for name in expiring:
+                if name not in result["dropped_partitions"]:
+                    result["deleted_readings"] += await self._delete_readings(name, cutoff)
+
+        for resolution, days in self.rollup_days.items():
+            if days:
+                result["deleted_rollups"] += await self._delete_rollups(resolution, retention_cutoff(now, days))
+
+        if result["dropped_partitions"] or result["deleted_readings"] or result["deleted_rollups"]:
+            # Удаление затрагивает данные всех устройств
+            await data_versions.bump_all()
+
+        result["vacuumed_pages"] = await self._incremental_vacuum()
+        result["duration"] = round(time.perf_counter() - started, 3)
+
+        self.runs += 1
+        self.dropped_partitions_total += len(result["dropped_partitions"])
+        self.deleted_readings_total += result["deleted_readings"]
+        self.deleted_rollups_total += result["deleted_rollups"]
+        self.vacuumed_pages_total += result["vacuumed_pages"]
+        self.last_run = result
+        return result
+
+    async def _summarize_partition(self, name: str, cutoff: datetime) -> None:
+        """Досчитать агрегаты по показаниям партиции старше cutoff, по устройству за транзакцию."""
+        until = datetime_to_millis(cutoff)
+        async with SessionLocal() as db:
+            device_ids = (await db.execute(
+                text(f"SELECT DISTINCT device_id FROM {name} WHERE timestamp < :until"), {"until": until}
+            )).scalars().all()
+        statements = [rollup_from_readings_sql(name, resolution) for resolution in RollupResolution]
+        for device_id in device_ids:
+            async with SessionLocal() as db:
+                for statement in statements:
+                    await db.execute(statement, {"device_id": device_id, "until": until})
+                await db.commit()
+            await self._pause()
+
+    async def _delete_readings(self, name: str, cutoff: datetime) -> int:
+        """Удалить показания партиции старше cutoff пакетами.
+
+        Счетчики показаний устройств уменьшаются в транзакции каждого пакета.
+        """
+        # ID выдаются по возрастанию, поэтому старые строки находятся в начале таблицы
+        statement = text(
+            f"DELETE FROM {name} WHERE id IN "
+            f"(SELECT id FROM {name} WHERE timestamp < :until LIMIT :limit) RETURNING device_id"
+        )
+        params = {"until": datetime_to_millis(cutoff), "limit": self.batch_size}
+        deleted = 0
+        while True:
+            async with SessionLocal() as db:
+                removed = Counter((await db.execute(statement, params)).scalars().all())
+                await add_device_counts(
+                    db, DeviceStats.readings_count, {device_id: -count for device_id, count in removed.items()}
+                )
+                await db.commit()
+            batch = sum(removed.values())
+            deleted += batch
+            if batch < self.batch_size:
+                return deleted
+            await self._pause()
+
+    async def _delete_rollups(self, resolution: RollupResolution, cutoff: datetime) -> int:
+        """Удалить агрегаты разрешения старше cutoff пакетами."""
+        statement = text(
+            "DELETE FROM reading_rollups WHERE (device_id, resolution, sensor_type, bucket) IN ("
+            "SELECT device_id, resolution, sensor_type, bucket FROM reading_rollups "
+            "WHERE resolution = :resolution AND bucket < :until LIMIT :limit)"
+        )
+        params = {"resolution": resolution.value, "until": datetime_to_millis(cutoff), "limit": self.batch_size}
+        deleted = 0
+        while True:
+            async with SessionLocal() as db:
+                result = await db.execute(statement, params)
+                await db.commit()
+            deleted += result.rowcount
+            if result.rowcount < self.batch_size:
+                return deleted
+            await self._pause()
+
+    async def _incremental_vacuum(self) -> int:
+        """Вернуть свободные страницы файлу БД порциями по vacuum_pages.
+
+        Для баз без auto_vacuum = INCREMENTAL (созданных до включения режима)
+        ничего не делает: свободные страницы переиспользуются новыми
+        данными, а уменьшить файл можно VACUUM
+        (scripts/convert_readings_storage.py).
+        """
+        vacuumed = 0
+        while True:
+            async with engine.connect() as conn:
+                if (await conn.execute(text("PRAGMA auto_vacuum"))).scalar() != 2:
+                    return vacuumed
+                free_pages = (await conn.execute(text("PRAGMA freelist_count"))).scalar()
+                if not free_pages:
+                    return vacuumed
+                # Драйвер выполняет прагму одним шагом (одна страница),
+                # executescript выполняет ее до конца
+                raw = await conn.get_raw_connection()
+                await raw.driver_connection.executescript(f"PRAGMA incremental_vacuum({self.vacuum_pages});")
+                vacuumed += free_pages - (await conn.execute(text("PRAGMA freelist_count"))).scalar()
+            await self._pause()
+
+    def stats(self) -> Dict[str, Any]:
+        """Политики хранения, итог последнего запуска и накопленные счетчики."""
+        return {
+            "enabled": True,
+            "raw_days": self.raw_days,
+            "rollup_days": {resolution.value: days for resolution, days in self.rollup_days.items()},
+            "runs": self.runs,
+            "errors": self.errors,
+            "dropped_partitions_total": self.dropped_partitions_total,
+            "deleted_readings_total": self.deleted_readings_total,
+            "deleted_rollups_total": self.deleted_rollups_total,
+            "vacuumed_pages_total": self.vacuumed_pages_total,
+            "last_run": self.last_run,
+        }
+
+
+# Глобальный экземпляр задачи хранения
+retention_job = (
+    RetentionJob(
+        interval=settings.RETENTION_INTERVAL,
+        raw_days=settings.RETENTION_RAW_DAYS,
+        rollup_days={
+            RollupResolution.MINUTE: settings.RETENTION_ROLLUP_1M_DAYS,
+            RollupResolution.HOUR: settings.RETENTION_ROLLUP_1H_DAYS,
+            RollupResolution.DAY: settings.RETENTION_ROLLUP_1D_DAYS,
+        },
+        batch_size=settings.RETENTION_BATCH_SIZE,
+        batch_pause=settings.RETENTION_BATCH_PAUSE,
+        vacuum_pages=settings.RETENTION_VACUUM_PAGES,
+    )
+    if settings.RETENTION_ENABLED else None
+)
@@ -0,0 +1,261 @@
+"""Движок агрегатов показаний (1 минута, 1 час, 1 день).
+
+Каждое записанное показание сворачивается в памяти процесса в агрегаты
+всех разрешений RollupResolution (количество, минимум, максимум, сумма,
+последнее значение). Фоновая задача раз в ROLLUP_FLUSH_INTERVAL секунд
+добавляет накопленные агрегаты к строкам reading_rollups одним пакетным
+UPSERT, поэтому поток показаний не порождает отдельную запись
+на каждое показание.
+
+Чтение агрегатов (app/service/reading_query.py) подмешивает еще
+не записанные значения к строкам из БД, как LastSeenTracker для last_seen.
+
+Classes:
+    RollupEngine: Накопитель агрегатов показаний
+
+Variables:
+    rollup_engine: Глобальный экземпляр накопителя
+"""
+
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import case, delete, func
+from sqlalchemy.dialects.sqlite import insert
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.enums.rollup_resolution import RollupResolution
+from app.models.reading_rollup import ReadingRollup
+from app.models.types import datetime_to_millis, millis_to_datetime
+
+
+# (разрешение, device_id, sensor_type, начало бакета в мс)
+RollupKey = Tuple[str, str, str, int]
+# [count, min, max, sum, last_value, last_timestamp в мс]
+Aggregate = List[Any]
+
+
+def merge_aggregate(target: Aggregate, other: Aggregate) -> None:
+    """Добавить агрегат other к агрегату target (на месте)."""
+    target[0] += other[0]
+    target[1] = min(target[1], other[1])
+    target[2] = max(target[2], other[2])
+    target[3] += other[3]
+    if other[5] >= target[5]:
+        target[4] = other[4]
+        target[5] = other[5]
+
+
+class RollupEngine:
+    """Накопитель агрегатов показаний.
+
+    Attributes:
+        flush_interval (float): Период записи в БД, секунды
+    """
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._pending: Dict[RollupKey, Aggregate] = {}
+        self._flushing: Dict[RollupKey, Aggregate] = {}
+        # Устройства, удаленные после начала текущей записи
+        self._forgotten: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self.readings_total = 0
+        self.flushed_total = 0
+        self.flush_count = 0
+        self.flush_errors = 0
+
+    def add(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Свернуть записанные показания в агрегаты всех разрешений.
+
+        Args:
+            rows (Iterable[Dict[str, Any]]): Строки показаний (build_reading_rows())
+        """
+        pending = self._pending
+        for row in rows:
+            timestamp = datetime_to_millis(row["timestamp"])
+            value = row["value"]
+            self.readings_total += 1
+            for resolution in RollupResolution:
+                key = (resolution.value, row["device_id"], row["sensor_type"], resolution.bucket_start(timestamp))
+                aggregate = pending.get(key)
+                if aggregate is None:
+                    pending[key] = [1, value, value, value, value, timestamp]
+                else:
+                    merge_aggregate(aggregate, [1, value, value, value, value, timestamp])
+
+    def pending(
+        self,
+        device_id: str,
+        resolution: RollupResolution,
+        since_millis: Optional[int] = None,
+        sensor_type: Optional[str] = None
+    ) -> Dict[Tuple[str, int], Aggregate]:
+        """Незаписанные в БД агрегаты устройства.
+
+        Args:
+            device_id (str): ID устройства
+            resolution (RollupResolution): Разрешение
+            since_millis (int, optional): Только бакеты, начинающиеся не раньше
+            sensor_type (str, optional): Только этот тип датчика
+
+        Returns:
+            Dict[Tuple[str, int], Aggregate]: (sensor_type, bucket) -> копия агрегата
+        """
+        result: Dict[Tuple[str, int], Aggregate] = {}
+        for source in (self._flushing, self._pending):
+            for (key_resolution, key_device, key_type, bucket), aggregate in source.items():
+                if key_resolution != resolution.value or key_device != device_id:
+                    continue
+                if sensor_type is not None and key_type != sensor_type:
+                    continue
+                if since_millis is not None and bucket < since_millis:
+                    continue
+                current = result.get((key_type, bucket))
+                if current is None:
+                    result[(key_type, bucket)] = list(aggregate)
+                else:
+                    merge_aggregate(current, aggregate)
+        return result
+
+    def forget(self, device_id: str) -> None:
+        """Отбросить незаписанные агрегаты устройства (при удалении устройства).
+
+        Агрегаты, которые уже записываются, удаляются из БД после
+        завершения текущей записи.
+        """
+        for source in (self._pending, self._flushing):
+            for key in [key for key in source if key[1] == device_id]:
+                del source[key]
+        self._forgotten.add(device_id)
+
+    async def start(self) -> None:
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Остановить фоновую задачу и записать накопленные агрегаты.
+
+        Задача не отменяется посреди записи: текущая запись завершается,
+        после чего записываются оставшиеся агрегаты.
+        """
+        if self._task:
+            self._stopping.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                await self.flush()
+
+    def _restore(self, items: List[Tuple[RollupKey, Aggregate]]) -> None:
+        """Вернуть агрегаты незавершенной записи в накопитель."""
+        for key, aggregate in items:
+            if key[1] in self._forgotten:
+                continue
+            current = self._pending.get(key)
+            if current is None:
+                self._pending[key] = aggregate
+            else:
+                merge_aggregate(current, aggregate)
+
+    async def flush(self) -> None:
+        """Добавить накопленные агрегаты к строкам reading_rollups.
+
+        Строка бакета создается или дополняется одним UPSERT: количество
+        и сумма складываются, минимум и максимум сравниваются, последнее
+        значение берется по времени показания. При ошибке агрегаты
+        возвращаются в накопитель и записываются при следующем цикле.
+        """
+        if not self._pending:
+            return
+        self._flushing, self._pending = self._pending, {}
+        self._forgotten = set()
+        items = list(self._flushing.items())
+        table = ReadingRollup.__table__
+        statement = insert(table)
+        excluded = statement.excluded
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.device_id, table.c.resolution, table.c.sensor_type, table.c.bucket],
+            set_={
+                "count": table.c.count + excluded.count,
+                "min": func.min(table.c.min, excluded.min),
+                "max": func.max(table.c.max, excluded.max),
+                "sum": table.c.sum + excluded.sum,
+                "last_value": case(
+                    (excluded.last_timestamp >= table.c.last_timestamp, excluded.last_value),
+                    else_=table.c.last_value
+                ),
+                "last_timestamp": func.max(table.c.last_timestamp, excluded.last_timestamp),
+            }
+        )
+        try:
+            async with SessionLocal() as db:
+                await db.execute(statement, [
+                    {
+                        "device_id": device_id,
+                        "resolution": resolution,
+                        "sensor_type": sensor_type,
+                        "bucket": millis_to_datetime(bucket),
+                        "count": aggregate[0],
+                        "min": aggregate[1],
+                        "max": aggregate[2],
+                        "sum": aggregate[3],
+                        "last_value": aggregate[4],
+                        "last_timestamp": millis_to_datetime(aggregate[5]),
+                    }
+                    for (resolution, device_id, sensor_type, bucket), aggregate in items
+                ])
+                await db.commit()
+                # Сразу после commit, чтобы чтение не учло агрегаты дважды
+                self._flushing = {}
+        except Exception as e:
+            self.flush_errors += 1
+            print(f"Error flushing reading rollups: {e}")
+            self._restore(items)
+        except BaseException:
+            # Отмена задачи: агрегаты записываются при следующем вызове flush()
+            self._restore(items)
+            raise
+        else:
+            self.flush_count += 1
+            self.flushed_total += len(items)
+            if self._forgotten & {key[1] for key, _ in items}:
+                await self._delete_forgotten()
+        finally:
+            self._flushing = {}
+
+    async def _delete_forgotten(self) -> None:
+        """Удалить агрегаты устройств, удаленных во время записи."""
+        table = ReadingRollup.__table__
+        try:
+            async with SessionLocal() as db:
+                await db.execute(delete(table).where(table.c.device_id.in_(self._forgotten)))
+                await db.commit()
+        except Exception as e:
+            self.flush_errors += 1
+            print(f"Error deleting rollups of deleted devices: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики накопителя.
+
+        Returns:
+            Dict[str, Any]: Количество ожидающих записи агрегатов и счетчики записи
+        """
+        return {
+            "pending_buckets": len(self._pending),
+            "readings_total": self.readings_total,
+            "flushed_total": self.flushed_total,
+            "flush_count": self.flush_count,
+            "flush_errors": self.flush_errors,
+        }
+
+
+# Глобальный экземпляр движка агрегатов
+rollup_engine = RollupEngine(settings.ROLLUP_FLUSH_INTERVAL)
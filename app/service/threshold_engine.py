@@ -0,0 +1,191 @@
+"""Проверка показаний по порогам устройства при приеме.
+
+Каждое записанное показание температуры, влажности и пламени сравнивается
+с порогом устройства (temperature_limit, humidity_limit, fire_limit из
+POST /devices/{id}/values). При превышении создается оповещение
+соответствующего типа (AlertType.TEMPERATURE, HUMIDITY, FIRE).
+
+Пороги кэшируются в памяти процесса: POST /values обновляет кэш сразу,
+остальные записи загружаются из Redis одним MGET на пакет показаний
+и перечитываются через THRESHOLD_LIMITS_TTL секунд (изменения,
+сделанные другими воркерами). Проверка показания не обращается к Redis.
+
+Гистерезис: после превышения повторное оповещение возможно только после
+того, как значение опустится ниже порога на THRESHOLD_HYSTERESIS от его
+величины, поэтому значение, колеблющееся около порога, не создает серию
+оповещений. Состояние хранится в памяти процесса: после перезапуска
+продолжающееся превышение создает одно новое оповещение.
+
+Classes:
+    ThresholdEngine: Проверка показаний по порогам
+
+Variables:
+    threshold_engine: Глобальный экземпляр (None, если проверка отключена)
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.redis_client import redis_client
+from app.enums.alert_status import AlertStatus
+from app.enums.alert_type import AlertType
+from app.enums.sensor_type import SensorType
+from app.models.alert import Alert
+from app.service.alert_service import save_alerts
+
+# Тип датчика -> (поле порога в значениях устройства, тип оповещения, уровень важности)
+THRESHOLD_RULES = {
+    SensorType.TEMPERATURE.value: ("temperature_limit", AlertType.TEMPERATURE, "high"),
+    SensorType.HUMIDITY.value: ("humidity_limit", AlertType.HUMIDITY, "high"),
+    SensorType.FIRE.value: ("fire_limit", AlertType.FIRE, "critical"),
+}
+
+
+class ThresholdEngine:
+    """Проверка показаний по порогам устройств с гистерезисом.
+
+    Attributes:
+        hysteresis (float): Доля порога, на которую значение должно опуститься
+                            ниже порога, чтобы следующее превышение создало оповещение
+        limits_ttl (float): Время жизни порогов в кэше, секунды
+    """
+
+    def __init__(self, hysteresis: float, limits_ttl: float):
+        self.hysteresis = hysteresis
+        self.limits_ttl = limits_ttl
+        # device_id -> (момент устаревания, значения устройства или None)
+        self._limits: Dict[str, Tuple[float, Optional[Dict[str, Any]]]] = {}
+        # (device_id, тип датчика) -> (порог превышен, время последнего проверенного показания)
+        self._states: Dict[Tuple[str, str], Tuple[bool, Any]] = {}
+        self.evaluated = 0
+        self.alerts_created = 0
+        self.limit_loads = 0
+        self.errors = 0
+
+    def set_limits(self, device_id: str, values: Dict[str, Any]) -> None:
+        """Обновить пороги устройства в кэше (после POST /values)."""
+        self._limits[device_id] = (time.monotonic() + self.limits_ttl, values)
+
+    def forget(self, device_id: str) -> None:
+        """Удалить пороги и состояние устройства (при удалении устройства)."""
+        self._limits.pop(device_id, None)
+        for key in [key for key in self._states if key[0] == device_id]:
+            del self._states[key]
+
+    async def _get_limits(self, device_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Пороги устройств из кэша; отсутствующие и устаревшие загружаются одним MGET."""
+        now = time.monotonic()
+        stale = [device_id for device_id in device_ids
+                 if device_id not in self._limits or self._limits[device_id][0] <= now]
+        if stale:
+            try:
+                loaded = await asyncio.to_thread(redis_client.get_many_device_values, stale)
+            except redis.RedisError as e:
+                # Redis недоступен: остаются прежние пороги, повтор через limits_ttl
+                self.errors += 1
+                print(f"Error loading device limits: {e}")
+                loaded = {device_id: self._limits.get(device_id, (0, None))[1] for device_id in stale}
+            self.limit_loads += len(stale)
+            for device_id, values in loaded.items():
+                self._limits[device_id] = (now + self.limits_ttl, values)
+        return {device_id: self._limits[device_id][1] for device_id in device_ids}
+
+    def _check(self, row: Dict[str, Any], limit: float) -> Optional[Alert]:
+        """Обновить состояние потока показанием; оповещение при новом превышении."""
+        key = (row["device_id"], row["sensor_type"])
+        breached, last_timestamp = self._states.get(key, (False, None))
+        if last_timestamp is not None and row["timestamp"] < last_timestamp:
+            # Показание старше уже проверенных (загрузка истории) не меняет состояние
+            return None
+        alert = None
+        value = row["value"]
+        if not breached and value > limit:
+            breached = True
+            field, alert_type, severity = THRESHOLD_RULES[row["sensor_type"]]
+            unit = f" {row['unit']}" if row["unit"] else ""
+            alert = Alert(
+                device_id=row["device_id"],
+                alert_type=alert_type.value,
+                code=field,
+                message=f"Показание {row['sensor_type']} {value}{unit} превысило порог {limit}",
+                severity=severity,
+                status=AlertStatus.NEW.value
+            )
+        elif breached and value <= limit - abs(limit) * self.hysteresis:
+            breached = False
+        self._states[key] = (breached, row["timestamp"])
+        return alert
+
+    async def evaluate(self, db: AsyncSession, rows: List[Dict[str, Any]]) -> List[Alert]:
+        """Проверить записанные показания и записать оповещения о превышениях.
+
+        Вызывается после commit показаний. Ошибка записи оповещений
+        не прерывает прием: она учитывается в счетчике errors, а состояние
+        потоков возвращается к состоянию до пакета, поэтому продолжающееся
+        превышение создаст оповещение при следующем показании.
+
+        Args:
+            db (AsyncSession): Сессия базы данных (соединение на запись)
+            rows (List[Dict[str, Any]]): Строки показаний после commit
+
+        Returns:
+            List[Alert]: Созданные оповещения
+
+        Example:
+            >>> await threshold_engine.evaluate(db, rows)
+            [<Alert alert_type="temperature" code="temperature_limit" severity="high">]
+        """
+        checked = [row for row in rows if row["sensor_type"] in THRESHOLD_RULES]
+        if not checked:
+            return []
+        limits = await self._get_limits({row["device_id"] for row in checked})
+        # Состояния до пакета: если оповещения не записаны, превышение должно создать их снова
+        previous = {key: self._states.get(key) for key in {(row["device_id"], row["sensor_type"]) for row in checked}}
+        alerts = []
+        for row in sorted(checked, key=lambda row: row["timestamp"]):
+            values = limits[row["device_id"]]
+            limit = values.get(THRESHOLD_RULES[row["sensor_type"]][0]) if values else None
+            if limit is None:
+                continue
+            alert = self._check(row, limit)
+            if alert is not None:
+                alerts.append(alert)
+        self.evaluated += len(checked)
+        try:
+            await save_alerts(db, alerts)
+        except Exception as e:
+            self.errors += 1
+            print(f"Error saving threshold alerts: {e}")
+            await db.rollback()
+            for key, state in previous.items():
+                if state is None:
+                    self._states.pop(key, None)
+                else:
+                    self._states[key] = state
+            return []
+        self.alerts_created += len(alerts)
+        return alerts
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики проверки и количество потоков с превышенным порогом."""
+        return {
+            "hysteresis": self.hysteresis,
+            "cached_devices": len(self._limits),
+            "streams": len(self._states),
+            "breached_streams": sum(1 for breached, _ in self._states.values() if breached),
+            "evaluated": self.evaluated,
+            "alerts_created": self.alerts_created,
+            "limit_loads": self.limit_loads,
+            "errors": self.errors,
+        }
+
+
+# Глобальный экземпляр проверки порогов (None, если отключена)
+threshold_engine = ThresholdEngine(
+    settings.THRESHOLD_HYSTERESIS, settings.THRESHOLD_LIMITS_TTL
+) if settings.THRESHOLD_ALERTS_ENABLED else None
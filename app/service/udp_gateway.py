@@ -0,0 +1,180 @@
+"""UDP шлюз приема показаний датчиков.
+
+Батарейные датчики отправляют показания датаграммами без установки
+соединения и без ожидания ответа. Каждая датаграмма содержит один или
+несколько бинарных кадров (формат app/service/frame_codec.py).
+
+Шлюз разбирает датаграмму в обработчике протокола, проверяет, что все
+устройства кадра известны, и кладет показания в ограниченную очередь.
+Фоновая задача забирает показания пакетами и передает их в тот же путь
+записи, что и HTTP эндпоинты (submit_readings): сразу в БД или в очередь
+отложенной записи, в зависимости от INGEST_MODE.
+
+Список известных устройств загружается при запуске и обновляется
+каждые UDP_DEVICE_REFRESH_INTERVAL секунд. Устройства, созданные между
+обновлениями, распознаются по кэшу устройств.
+
+Classes:
+    UdpIngestGateway: asyncio протокол датаграмм со счетчиками
+
+Variables:
+    udp_gateway: Глобальный экземпляр шлюза (None если UDP_ENABLED=False)
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import ReadSessionLocal, SessionLocal
+from app.models.device import Device
+from app.service.device_cache import device_cache
+from app.service.frame_codec import DecodedReading, FrameDecodeError, decode_frames
+from app.service.ingest_service import IngestQueueFull, submit_readings
+
+
+class UdpIngestGateway(asyncio.DatagramProtocol):
+    """Прием показаний датаграммами UDP.
+
+    Счетчики (в датаграммах):
+        accepted: датаграмма разобрана и поставлена на запись
+        dropped: устройство неизвестно или очередь шлюза/записи переполнена
+        malformed: датаграмма не является корректным кадром или время
+                   показания вне допустимого интервала (reading_time_bounds())
+    """
+
+    def __init__(self, queue_max_size: int, batch_size: int):
+        self.batch_size = batch_size
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_max_size)
+        self._known_device_ids: Set[str] = set()
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._tasks: List[asyncio.Task] = []
+        self.accepted = 0
+        self.dropped = 0
+        self.malformed = 0
+        self.readings_accepted = 0
+        self.readings_dropped = 0
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        try:
+            readings = decode_frames(data, max_readings=settings.READINGS_BATCH_MAX_SIZE)
+        except FrameDecodeError:
+            self.malformed += 1
+            return
+
+        if not readings:
+            self.malformed += 1
+            return
+        if any(not self._is_known(r.device_id) for r in readings):
+            self._drop(readings)
+            return
+
+        try:
+            self._queue.put_nowait(readings)
+        except asyncio.QueueFull:
+            self._drop(readings)
+            return
+        self.accepted += 1
+
+    def _is_known(self, device_id: str) -> bool:
+        if device_id in self._known_device_ids:
+            return True
+        if device_cache.peek(device_id) is not None:
+            self._known_device_ids.add(device_id)
+            return True
+        return False
+
+    def _drop(self, readings: List[DecodedReading]) -> None:
+        self.dropped += 1
+        self.readings_dropped += len(readings)
+
+    async def start(self) -> None:
+        """Загрузить список устройств, открыть сокет и запустить фоновые задачи."""
+        await self._refresh_known_devices()
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: self, local_addr=(settings.UDP_HOST, settings.UDP_PORT)
+        )
+        self._tasks = [
+            asyncio.create_task(self._persist_loop()),
+            asyncio.create_task(self._refresh_loop()),
+        ]
+
+    async def stop(self) -> None:
+        """Закрыть сокет и записать показания, уже принятые в очередь шлюза."""
+        if self._transport:
+            self._transport.close()
+            self._transport = None
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while not self._queue.empty():
+            await self._persist(self._take_pending([]))
+
+    async def _refresh_known_devices(self) -> None:
+        async with ReadSessionLocal() as db:
+            self._known_device_ids = set(await db.scalars(select(Device.id)))
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.UDP_DEVICE_REFRESH_INTERVAL)
+            try:
+                await self._refresh_known_devices()
+            except Exception as e:
+                print(f"Error refreshing UDP device list: {e}")
+
+    def _take_pending(self, readings: List[DecodedReading]) -> List[DecodedReading]:
+        while len(readings) < self.batch_size and not self._queue.empty():
+            readings.extend(self._queue.get_nowait())
+        return readings
+
+    async def _persist_loop(self) -> None:
+        while True:
+            readings = self._take_pending(list(await self._queue.get()))
+            await self._persist(readings)
+
+    async def _persist(self, readings: List[DecodedReading]) -> None:
+        try:
+            async with SessionLocal() as db:
+                results, _ = await submit_readings(db, readings)
+        except IngestQueueFull:
+            self.readings_dropped += len(readings)
+            return
+        except Exception as e:
+            self.readings_dropped += len(readings)
+            print(f"Error persisting UDP readings: {e}")
+            return
+        accepted = sum(1 for r in results if r["status"] != "rejected")
+        self.readings_accepted += accepted
+        self.readings_dropped += len(results) - accepted
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики шлюза.
+
+        Returns:
+            Dict[str, Any]: Счетчики датаграмм и показаний, глубина очереди
+        """
+        return {
+            "enabled": True,
+            "listen": f"{settings.UDP_HOST}:{settings.UDP_PORT}",
+            "known_devices": len(self._known_device_ids),
+            "queue_depth": self._queue.qsize(),
+            "packets": {
+                "accepted": self.accepted,
+                "dropped": self.dropped,
+                "malformed": self.malformed,
+            },
+            "readings": {
+                "accepted": self.readings_accepted,
+                "dropped": self.readings_dropped,
+            },
+        }
+
+
+# Глобальный экземпляр UDP шлюза
+udp_gateway = (
+    UdpIngestGateway(settings.UDP_QUEUE_MAX_SIZE, settings.INGEST_FLUSH_BATCH_SIZE)
+    if settings.UDP_ENABLED else None
+)
@@ -0,0 +1,70 @@
+"""Кэш справочника единиц измерения.
+
+Показания хранят единицу измерения ссылкой на таблицу units. Набор
+единиц мал и почти не меняется, поэтому соответствие обозначения
+и ID держится в памяти процесса, а в БД обращаются только за
+новыми обозначениями.
+
+Classes:
+    UnitRegistry: Соответствие обозначений единиц и их ID
+
+Variables:
+    unit_registry: Глобальный экземпляр справочника
+"""
+
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.unit import Unit
+
+
+class UnitRegistry:
+    """Соответствие обозначений единиц измерения и ID в таблице units."""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+
+    async def resolve(self, db: AsyncSession, symbols: Iterable[Optional[str]]) -> Dict[str, int]:
+        """Получить ID единиц измерения, добавив отсутствующие в справочник.
+
+        Новые обозначения записываются и фиксируются commit сразу, до того
+        как попасть в кэш, поэтому вызывать нужно до добавления в сессию
+        изменений, которые еще не должны быть записаны.
+
+        Args:
+            db (AsyncSession): Сессия базы данных
+            symbols (Iterable[Optional[str]]): Обозначения единиц (None пропускаются)
+
+        Returns:
+            Dict[str, int]: ID по обозначению
+
+        Example:
+            >>> unit_ids = await unit_registry.resolve(db, {"°C", "%"})
+            >>> unit_ids["°C"]
+            1
+        """
+        wanted = {symbol for symbol in symbols if symbol is not None}
+        missing = wanted - self._ids.keys()
+        if missing:
+            await self._load(db, missing)
+            missing -= self._ids.keys()
+        if missing:
+            try:
+                await db.execute(insert(Unit), [{"symbol": symbol} for symbol in missing])
+                await db.commit()
+            except IntegrityError:
+                # Другой процесс успел добавить ту же единицу
+                await db.rollback()
+            await self._load(db, missing)
+        return {symbol: self._ids[symbol] for symbol in wanted}
+
+    async def _load(self, db: AsyncSession, symbols: Iterable[str]) -> None:
+        rows = await db.execute(select(Unit.symbol, Unit.id).where(Unit.symbol.in_(list(symbols))))
+        self._ids.update({symbol: unit_id for symbol, unit_id in rows})
+
+
+# Глобальный справочник единиц измерения
+unit_registry = UnitRegistry()
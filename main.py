@@ -13,8 +13,8 @@ Hack Backend API Application
 
 Технологический стек:
     - FastAPI - веб-фреймворк
-    - SQLAlchemy - ORM для работы с базой данных
-    - SQLite - база данных (для разработки)
+    - SQLAlchemy (asyncio) - ORM для работы с базой данных
+    - SQLite + aiosqlite - база данных (для разработки)
 
 Запуск приложения:
     uvicorn main:app --reload --port 8000
@@ -34,7 +34,17 @@ from app.api.v1.auth import router as auth_router
 from app.api.v1.users import router as users_router
 from app.api.v1.commands import router as commands_router
 from app.api.v1.analize import router as analize_router
-from app.db.session import init_db
+from app.api.v1.metrics import router as metrics_router
+from app.db.session import ReadSessionLocal, init_db
+from app.service.ingest_service import ingest_queue
+from app.service.anomaly_detector import anomaly_detector
+from app.service.device_stats import device_stats_reconciler
+from app.service.hot_window import hot_window
+from app.service.last_seen_tracker import last_seen_tracker
+from app.service.latest_values import latest_values
+from app.service.retention_service import retention_job
+from app.service.rollup_engine import rollup_engine
+from app.service.udp_gateway import udp_gateway
 
 
 @asynccontextmanager
@@ -53,15 +63,51 @@ async def lifespan(app: FastAPI):
         None: Управление возвращается приложению для обработки запросов
         
     Lifecycle:
-        - Startup: Инициализация базы данных, создание таблиц
+        - Startup: Инициализация базы данных, создание таблиц,
+                   запуск фоновой записи показаний (INGEST_MODE=memory|redis),
+                   загрузка снимка последних значений датчиков
+                   и горячего окна показаний (HOT_WINDOW_ENABLED=True),
+                   восстановление состояния детектора аномалий,
+                   запуск UDP шлюза (UDP_ENABLED=True),
+                   запуск отложенной записи last_seen устройств
+                   и агрегатов показаний, задачи хранения данных
+                   (RETENTION_ENABLED=True) и сверки счетчиков устройств
         - Running: Приложение обрабатывает запросы
-        - Shutdown: Освобождение ресурсов, закрытие соединений
+        - Shutdown: Запись накопленных показаний, last_seen и агрегатов,
+                    освобождение ресурсов
     """
     # Startup: инициализация БД
-    init_db()
+    await init_db()
     print("✅ Database initialized (tables created if not exist)")
+    async with ReadSessionLocal() as db:
+        await latest_values.warm(db)
+        if hot_window is not None:
+            await hot_window.warm(db)
+        if anomaly_detector is not None:
+            await anomaly_detector.backfill(db)
+    await last_seen_tracker.start()
+    await rollup_engine.start()
+    await device_stats_reconciler.start()
+    if ingest_queue is not None:
+        await ingest_queue.start()
+        print("✅ Ingest flusher started")
+    if udp_gateway is not None:
+        await udp_gateway.start()
+        print("✅ UDP gateway listening")
+    if retention_job is not None:
+        await retention_job.start()
     yield
-    # Shutdown: здесь можно закрыть соединения, если нужно
+    # Shutdown: сначала UDP шлюз передает принятые показания в очередь,
+    # затем очередь записывается до закрытия соединений
+    if retention_job is not None:
+        await retention_job.stop()
+    if udp_gateway is not None:
+        await udp_gateway.stop()
+    if ingest_queue is not None:
+        await ingest_queue.stop()
+    await last_seen_tracker.stop()
+    await rollup_engine.stop()
+    await device_stats_reconciler.stop()
     print("👋 Application shutdown")
 
 
@@ -80,6 +126,7 @@ app.include_router(auth_router, prefix="/api/v1")
 app.include_router(users_router, prefix="/api/v1")
 app.include_router(commands_router, prefix="/api/v1")
 app.include_router(analize_router, prefix="/api/v1")
+app.include_router(metrics_router, prefix="/api/v1")
 
 @app.get("/", tags=["Health Check"])
 def html():
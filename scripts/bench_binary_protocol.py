@@ -0,0 +1,84 @@
+"""Бенчмарк бинарного формата кадров против JSON пакета показаний.
+
+Сравнивает для одного и того же набора показаний:
+    - размер тела запроса (JSON ReadingBatch и бинарные кадры)
+    - время разбора на сервере: Pydantic валидация JSON против decode_frames()
+
+Использование:
+    python scripts/bench_binary_protocol.py
+    python scripts/bench_binary_protocol.py --readings 5000 --repeat 50
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AI_API_KEY", "bench")
+
+from app.enums.sensor_type import SENSOR_TYPE_DEFAULT_UNITS, SensorType
+from app.models.sensor_reading import ReadingBatch
+from app.service.frame_codec import decode_frames, encode_frame
+
+
+def build_payloads(readings: int, devices: int):
+    sensor_types = [SensorType.TEMPERATURE, SensorType.HUMIDITY, SensorType.FIRE]
+    now = datetime.now().replace(microsecond=0)
+    per_device = readings // devices
+
+    json_items = []
+    frames = []
+    for d in range(devices):
+        device_id = f"dev{d:04d}"
+        records = []
+        for i in range(per_device):
+            sensor_type = sensor_types[i % len(sensor_types)]
+            value = 20.0 + (i % 100) / 10
+            records.append((sensor_type, i * 1000, value))
+            json_items.append({
+                "device_id": device_id,
+                "sensor_type": sensor_type.value,
+                "value": value,
+                "unit": SENSOR_TYPE_DEFAULT_UNITS[sensor_type],
+                "timestamp": now.isoformat(),
+            })
+        frames.append(encode_frame(device_id, records, base_time=int(now.timestamp())))
+
+    return json.dumps({"readings": json_items}).encode(), b"".join(frames), len(json_items)
+
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Binary frame vs JSON ingestion benchmark")
+    parser.add_argument("--readings", type=int, default=1000, help="Показаний в пакете")
+    parser.add_argument("--devices", type=int, default=10, help="Устройств в пакете")
+    parser.add_argument("--repeat", type=int, default=20, help="Повторов замера времени")
+    args = parser.parse_args()
+
+    json_body, frame_body, count = build_payloads(args.readings, args.devices)
+
+    json_time = best_of(args.repeat, lambda: ReadingBatch.model_validate_json(json_body))
+    frame_time = best_of(args.repeat, lambda: decode_frames(frame_body, max_readings=count))
+
+    print(f"readings per request: {count} ({args.devices} devices)")
+    print(f"JSON body:   {len(json_body):>9} bytes  {len(json_body) / count:6.1f} B/reading  "
+          f"parse {json_time * 1000:8.3f} ms  {json_time / count * 1e6:6.2f} us/reading")
+    print(f"frame body:  {len(frame_body):>9} bytes  {len(frame_body) / count:6.1f} B/reading  "
+          f"parse {frame_time * 1000:8.3f} ms  {frame_time / count * 1e6:6.2f} us/reading")
+    print(f"wire size reduction: x{len(json_body) / len(frame_body):.1f}")
+    print(f"parse speedup:       x{json_time / frame_time:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Бенчмарк конкурентности API: влияние медленных запросов на быстрые.
+
+Скрипт создает временную базу с большим количеством показаний одного
+устройства и измеряет задержку быстрых запросов (список оповещений
+небольшого устройства) в двух режимах:
+
+    1. baseline - только быстрые запросы
+    2. under load - те же быстрые запросы, пока параллельно выполняются
+       медленные: экспорт CSV и подсчет показаний по большой таблице
+
+С асинхронным слоем БД медленные запросы выполняются драйвером вне
+event loop, поэтому задержка быстрых запросов под нагрузкой должна
+оставаться близкой к baseline.
+
+Использование:
+    python scripts/bench_concurrency.py
+    python scripts/bench_concurrency.py --readings 1000000 --requests 500 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed_database(path: str, readings: int) -> tuple:
+    """Заполнить базу: большое устройство с readings показаниями и маленькое устройство."""
+    from sqlalchemy.dialects import sqlite
+    from sqlalchemy.schema import CreateIndex, CreateTable
+    from app.enums.sensor_type import SENSOR_TYPE_CODES, SensorType
+    from app.models.sensor_reading import partition_name, sensor_readings_table
+    from app.models.types import datetime_to_millis, millis_to_datetime
+
+    conn = sqlite3.connect(path)
+    big_id, small_id = "big1", "sml1"
+    now = datetime.now()
+    conn.executemany(
+        "INSERT INTO devices (id, name, status, created_at) VALUES (?, ?, 'online', ?)",
+        [(big_id, "Big device", now), (small_id, "Small device", now)]
+    )
+    # Компактный формат показаний: код типа датчика, ID единицы, время в мс,
+    # строки раскладываются по месячным партициям
+    temperature_code = SENSOR_TYPE_CODES[SensorType.TEMPERATURE]
+    unit_id = conn.execute("INSERT INTO units (symbol) VALUES ('°C')").lastrowid
+    now_millis = datetime_to_millis(now)
+    partitions = set()
+
+    def flush(batch):
+        by_partition = {}
+        for row in batch:
+            by_partition.setdefault(partition_name(millis_to_datetime(row[5])), []).append(row)
+        for name, rows in by_partition.items():
+            if name not in partitions:
+                table = sensor_readings_table(name)
+                conn.execute(str(CreateTable(table).compile(dialect=sqlite.dialect())))
+                for index in table.indexes:
+                    conn.execute(str(CreateIndex(index).compile(dialect=sqlite.dialect())))
+                partitions.add(name)
+            conn.executemany(f"INSERT INTO {name} VALUES (?, ?, ?, ?, ?, ?)", rows)
+        batch.clear()
+
+    batch = []
+    for i in range(readings):
+        batch.append((i + 1, big_id, temperature_code, 20.0 + i % 10, unit_id, now_millis - i * 1000))
+        if len(batch) == 50000:
+            flush(batch)
+    if batch:
+        flush(batch)
+    conn.execute(
+        "INSERT INTO id_sequences (name, next_value) VALUES ('sensor_readings', ?)", (readings + 1,)
+    )
+    conn.executemany(
+        "INSERT INTO alerts (id, device_id, alert_type, message, severity, status, acknowledged, timestamp) "
+        "VALUES (?, ?, 'temperature', 'bench', 'low', 'new', 0, ?)",
+        [(str(uuid.uuid4()), small_id, now) for _ in range(20)]
+    )
+    conn.commit()
+    conn.close()
+    return big_id, small_id
+
+
+async def measure_fast_requests(client, small_id: str, requests: int, concurrency: int) -> list:
+    """Выполнить быстрые запросы с заданной конкурентностью и вернуть задержки в мс."""
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(f"/api/v1/alerts/{small_id}/alerts")
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies
+
+
+async def run_slow_requests(client, big_id: str, stop: asyncio.Event) -> int:
+    """Выполнять медленные запросы по кругу, пока не будет выставлен stop."""
+    completed = 0
+    while not stop.is_set():
+        await asyncio.gather(
+            client.get(f"/api/v1/devices/{big_id}/sensor-readings/export/csv"),
+            client.get(f"/api/v1/devices/{big_id}"),
+        )
+        completed += 2
+    return completed
+
+
+def describe(name: str, latencies: list) -> str:
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    return (f"{name:<12} n={len(ordered):<5} p50={statistics.median(ordered):8.2f} ms  "
+            f"p95={p95:8.2f} ms  max={ordered[-1]:8.2f} ms")
+
+
+async def main(args):
+    import httpx
+    from app.db.session import engine, init_db
+    from main import app
+
+    await init_db()
+    big_id, small_id = seed_database(args.db_path, args.readings)
+    print(f"Seeded {args.readings} readings into {args.db_path}")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # Прогрев пула соединений
+        await measure_fast_requests(client, small_id, 20, args.concurrency)
+
+        baseline = await measure_fast_requests(client, small_id, args.requests, args.concurrency)
+
+        stop = asyncio.Event()
+        slow_task = asyncio.create_task(run_slow_requests(client, big_id, stop))
+        await asyncio.sleep(0.05)
+        loaded = await measure_fast_requests(client, small_id, args.requests, args.concurrency)
+        stop.set()
+        slow_completed = await slow_task
+
+    await engine.dispose()
+
+    print(describe("baseline", baseline))
+    print(describe("under load", loaded))
+    print(f"slow requests completed during measurement: {slow_completed}")
+    print(f"p50 slowdown under load: x{statistics.median(loaded) / statistics.median(baseline):.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrency benchmark for async DB layer")
+    parser.add_argument("--readings", type=int, default=300000, help="Показаний у большого устройства")
+    parser.add_argument("--requests", type=int, default=300, help="Количество быстрых запросов")
+    parser.add_argument("--concurrency", type=int, default=8, help="Параллельных быстрых запросов")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_concurrency_")
+    args.db_path = os.path.join(workdir, "bench.db")
+    # Настройки читаются при импорте приложения, поэтому задаются до него
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db_path}"
+    os.environ.setdefault("AI_API_KEY", "bench")
+
+    asyncio.run(main(args))
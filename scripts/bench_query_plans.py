@@ -0,0 +1,223 @@
+"""Бенчмарк планов запросов до и после создания составных индексов.
+
+Скрипт создает временную базу по моделям, но без составных индексов
+(как база до миграции 1), заполняет ее показаниями, оповещениями
+и командами и для основных запросов API измеряет время и выводит
+EXPLAIN QUERY PLAN. Затем создает индексы, объявленные в моделях,
+и повторяет замеры на той же базе.
+
+Показания записываются в месячные партиции sensor_readings_YYYYMM,
+запросы показаний выполняются по партиции последнего показания.
+
+Запросы повторяют выборки эндпоинтов:
+    - readings by type:  GET /devices/{id}/readings?sensor_type=...&timeframe=...
+    - readings count:    подсчет total в том же эндпоинте
+    - latest readings:   GET /devices/{id}/readings?limit=1
+    - alerts by status:  GET /alerts/{device_id}/alerts?status=new
+    - commands:          GET /device/commands/{device_id}/{status}
+
+Использование:
+    python scripts/bench_query_plans.py
+    python scripts/bench_query_plans.py --readings 10000000 --devices 1000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Формат хранения DateTime в SQLite, который использует SQLAlchemy
+TS_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+# Коды temperature, humidity, fire в SENSOR_TYPE_CODES
+SENSOR_TYPE_CODES = [1, 2, 4]
+
+
+def composite_indexes(partitions=()):
+    """Составные индексы оповещений, команд и переданных партиций показаний."""
+    from app.models.alert import Alert
+    from app.models.command import Command
+    from app.models.sensor_reading import sensor_readings_table
+
+    tables = [Alert.__table__, Command.__table__] + [sensor_readings_table(name) for name in partitions]
+    return [index for table in tables for index in table.indexes]
+
+
+def create_schema_without_indexes(path: str):
+    """Создать схему по моделям и удалить составные индексы (база до миграции)."""
+    from sqlalchemy import create_engine
+    from app import models  # noqa: F401 - регистрация моделей в Base
+    from app.db.session import Base
+
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        for index in composite_indexes():
+            index.drop(conn)
+    engine.dispose()
+
+
+def seed(path: str, readings: int, devices: int) -> tuple:
+    """Заполнить базу и вернуть ID устройства для замеров и имена партиций показаний."""
+    from sqlalchemy.dialects import sqlite
+    from sqlalchemy.schema import CreateTable
+    from app.models.sensor_reading import partition_name, sensor_readings_table
+    from app.models.types import datetime_to_millis, millis_to_datetime
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    now = datetime.now()
+    now_millis = datetime_to_millis(now)
+    unit_id = conn.execute("INSERT INTO units (symbol) VALUES ('°C')").lastrowid
+    device_ids = [f"d{i:05d}" for i in range(devices)]
+    conn.executemany(
+        "INSERT INTO devices (id, name, status, created_at) VALUES (?, ?, 'online', ?)",
+        [(d, d, now.strftime(TS_FORMAT)) for d in device_ids]
+    )
+
+    partitions = []
+
+    def flush(batch):
+        # Партиции создаются без индексов (см. create_indexes)
+        by_partition = {}
+        for row in batch:
+            by_partition.setdefault(partition_name(millis_to_datetime(row[5])), []).append(row)
+        for name, rows in by_partition.items():
+            if name not in partitions:
+                conn.execute(str(CreateTable(sensor_readings_table(name)).compile(dialect=sqlite.dialect())))
+                partitions.append(name)
+            conn.executemany(f"INSERT INTO {name} VALUES (?, ?, ?, ?, ?, ?)", rows)
+        batch.clear()
+
+    rng = random.Random(42)
+    batch = []
+    for i in range(readings):
+        # Каждое устройство отправляет показание раз в 10 секунд
+        batch.append((
+            i + 1,
+            device_ids[i % devices],
+            SENSOR_TYPE_CODES[(i // devices) % 3],
+            20.0 + rng.random() * 10,
+            unit_id,
+            now_millis - (i // devices) * 10000,
+        ))
+        if len(batch) == 100000:
+            flush(batch)
+    if batch:
+        flush(batch)
+
+    alerts = max(readings // 100, devices)
+    conn.executemany(
+        "INSERT INTO alerts (id, device_id, alert_type, message, severity, status, acknowledged, timestamp) "
+        "VALUES (?, ?, 'temperature', 'bench', 'high', ?, 0, ?)",
+        [
+            (str(uuid.uuid4()), device_ids[i % devices], ["new", "resolved", "closed"][i % 3],
+             (now - timedelta(minutes=i)).strftime(TS_FORMAT))
+            for i in range(alerts)
+        ]
+    )
+    conn.executemany(
+        "INSERT INTO commands (id, device_id, action, status, created_at) VALUES (?, ?, 'restart', ?, ?)",
+        [
+            (f"{i:08x}", device_ids[i % devices], ["pending", "completed"][i % 2],
+             (now - timedelta(minutes=i)).strftime(TS_FORMAT))
+            for i in range(alerts)
+        ]
+    )
+    conn.commit()
+    conn.close()
+    return device_ids[devices // 2], partitions
+
+
+def build_queries(device_id: str, partition: str):
+    from app.models.types import datetime_to_millis
+
+    since = datetime_to_millis(datetime.now() - timedelta(hours=24))
+    return [
+        ("readings by type",
+         f"SELECT * FROM {partition} WHERE device_id = ? AND sensor_type = ? AND timestamp >= ? "
+         "ORDER BY timestamp DESC LIMIT 100", (device_id, SENSOR_TYPE_CODES[0], since)),
+        ("readings count",
+         f"SELECT count(*) FROM {partition} WHERE device_id = ? AND sensor_type = ? AND timestamp >= ?",
+         (device_id, SENSOR_TYPE_CODES[0], since)),
+        ("latest readings",
+         f"SELECT * FROM {partition} WHERE device_id = ? ORDER BY timestamp DESC LIMIT 1", (device_id,)),
+        ("alerts by status",
+         "SELECT * FROM alerts WHERE device_id = ? AND status = ? ORDER BY timestamp DESC LIMIT 10",
+         (device_id, "new")),
+        ("commands",
+         "SELECT * FROM commands WHERE device_id = ? AND status = ?", (device_id, "pending")),
+    ]
+
+
+def measure(path: str, queries, repeat: int) -> dict:
+    conn = sqlite3.connect(path)
+    results = {}
+    for name, sql, params in queries:
+        plan = "; ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            best = min(best, time.perf_counter() - started)
+        results[name] = (best * 1000, plan)
+    conn.close()
+    return results
+
+
+def create_indexes(path: str, partitions) -> float:
+    from sqlalchemy import create_engine
+
+    engine = create_engine(f"sqlite:///{path}")
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for index in composite_indexes(partitions):
+            index.create(conn)
+        conn.exec_driver_sql("ANALYZE")
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+    return elapsed
+
+
+def main(args):
+    create_schema_without_indexes(args.db_path)
+    started = time.perf_counter()
+    device_id, partitions = seed(args.db_path, args.readings, args.devices)
+    print(f"Seeded {args.readings} readings for {args.devices} devices in {time.perf_counter() - started:.1f} s")
+
+    queries = build_queries(device_id, partitions[0])
+    before = measure(args.db_path, queries, args.repeat)
+    index_time = create_indexes(args.db_path, partitions)
+    print(f"Indexes created in {index_time:.1f} s")
+    after = measure(args.db_path, queries, args.repeat)
+
+    for name, _, _ in queries:
+        before_ms, before_plan = before[name]
+        after_ms, after_plan = after[name]
+        print(f"\n{name}")
+        print(f"  before: {before_ms:10.3f} ms  {before_plan}")
+        print(f"  after:  {after_ms:10.3f} ms  {after_plan}")
+        print(f"  speedup: x{before_ms / after_ms:.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query plan benchmark for time-series indexes")
+    parser.add_argument("--readings", type=int, default=1000000, help="Количество показаний")
+    parser.add_argument("--devices", type=int, default=200, help="Количество устройств")
+    parser.add_argument("--repeat", type=int, default=5, help="Повторов замера каждого запроса")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_query_plans_")
+    args.db_path = os.path.join(workdir, "bench.db")
+    # Настройки читаются при импорте приложения, поэтому задаются до него
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db_path}"
+    os.environ.setdefault("AI_API_KEY", "bench")
+
+    main(args)
@@ -0,0 +1,256 @@
+"""Перевод существующей базы на компактный формат показаний.
+
+Скрипт применяет недостающие миграции (миграция 2 перестраивает
+sensor_readings в компактный формат, миграция 3 разбивает показания
+на месячные партиции sensor_readings_YYYYMM), выполняет VACUUM,
+чтобы вернуть освободившиеся страницы (и включает auto_vacuum =
+INCREMENTAL для задачи хранения), и выводит замеры до и после:
+
+    - размер базы и количество байт на одно показание;
+    - range scan: показания одного устройства за сутки по индексу;
+    - full scan: агрегат по всем показаниям за сутки.
+
+Приложение применяет те же миграции при запуске, но без VACUUM - файл
+БД после этого не уменьшается, пока VACUUM не выполнен отдельно.
+Остановите приложение перед конвертацией: миграция и VACUUM требуют
+монопольного доступа к файлу.
+
+Для замеров без рабочей базы можно создать синтетическую базу
+в старом формате (--seed).
+
+Использование:
+    python scripts/convert_readings_storage.py ./test.db
+    python scripts/convert_readings_storage.py --seed 1000000 --devices 200
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Формат хранения DateTime в SQLite, который использует SQLAlchemy
+TS_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+SENSOR_TYPES = [("temperature", "°C"), ("humidity", "%"), ("fire", "F")]
+COMPACT_VERSION = 2
+PARTITIONED_VERSION = 3
+
+LEGACY_READINGS_DDL = [
+    "CREATE TABLE sensor_readings ("
+    "id VARCHAR NOT NULL, device_id VARCHAR NOT NULL, sensor_type VARCHAR NOT NULL, "
+    "value FLOAT NOT NULL, unit VARCHAR, timestamp DATETIME, "
+    "PRIMARY KEY (id), FOREIGN KEY(device_id) REFERENCES devices (id))",
+    "CREATE INDEX ix_sensor_readings_device_type_ts ON sensor_readings (device_id, sensor_type, timestamp)",
+    "CREATE INDEX ix_sensor_readings_device_ts ON sensor_readings (device_id, timestamp)",
+]
+
+
+def seed_legacy_database(path: str, readings: int, devices: int) -> None:
+    """Создать базу в формате до миграции 2 и заполнить показаниями."""
+    from sqlalchemy import create_engine
+    from app import models  # noqa: F401 - регистрация моделей в Base
+    from app.db.session import Base
+
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        tables = [
+            table for name, table in Base.metadata.tables.items()
+            if name not in ("sensor_readings", "units", "id_sequences")
+        ]
+        Base.metadata.create_all(conn, tables=tables)
+        for statement in LEGACY_READINGS_DDL:
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql("PRAGMA user_version = 1")
+    engine.dispose()
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    now = datetime.now()
+    device_ids = [f"d{i:05d}" for i in range(devices)]
+    conn.executemany(
+        "INSERT INTO devices (id, name, status, created_at) VALUES (?, ?, 'online', ?)",
+        [(d, d, now.strftime(TS_FORMAT)) for d in device_ids]
+    )
+    rng = random.Random(42)
+    batch = []
+    for i in range(readings):
+        # Каждое устройство отправляет показание раз в 10 секунд
+        sensor_type, unit = SENSOR_TYPES[(i // devices) % 3]
+        ts = now - timedelta(seconds=(i // devices) * 10, microseconds=rng.randrange(1000000))
+        batch.append((
+            str(uuid.uuid4()), device_ids[i % devices], sensor_type,
+            round(20.0 + rng.random() * 10, 2), unit, ts.strftime(TS_FORMAT),
+        ))
+        if len(batch) == 100000:
+            conn.executemany("INSERT INTO sensor_readings VALUES (?, ?, ?, ?, ?, ?)", batch)
+            batch.clear()
+    if batch:
+        conn.executemany("INSERT INTO sensor_readings VALUES (?, ?, ?, ?, ?, ?)", batch)
+    conn.commit()
+    conn.close()
+
+
+def used_bytes(conn: sqlite3.Connection) -> int:
+    """Размер занятых страниц базы (без свободных страниц)."""
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return (page_count - free_pages) * page_size
+
+
+def best_time(conn: sqlite3.Connection, queries: list, repeat: int) -> float:
+    """Лучшее время выполнения набора запросов [(sql, params)] из repeat попыток, мс."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for sql, params in queries:
+            conn.execute(sql, params).fetchall()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def reading_tables(conn: sqlite3.Connection) -> list:
+    """Таблицы показаний, от новых партиций к старым."""
+    if conn.execute("PRAGMA user_version").fetchone()[0] < PARTITIONED_VERSION:
+        return ["sensor_readings"]
+    names = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB 'sensor_readings_[0-9]*'"
+    ).fetchall()
+    return sorted((name for (name,) in names), reverse=True)
+
+
+def measure(path: str, repeat: int) -> dict:
+    """Размер базы и время range/full scan за последние сутки данных.
+
+    Для партиций запросы выполняются по каждой партиции, пересекающейся
+    с последними сутками, как это делает приложение.
+    """
+    conn = sqlite3.connect(path)
+    compact = conn.execute("PRAGMA user_version").fetchone()[0] >= COMPACT_VERSION
+    tables = reading_tables(conn)
+    count = sum(conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0] for table in tables)
+    result = {"readings": count, "bytes": used_bytes(conn)}
+    if not count:
+        conn.close()
+        return result
+
+    device_id = conn.execute(
+        f"SELECT device_id FROM {tables[0]} GROUP BY device_id ORDER BY count(*) DESC LIMIT 1"
+    ).fetchone()[0]
+    last = conn.execute(f"SELECT max(timestamp) FROM {tables[0]}").fetchone()[0]
+    if compact:
+        since = last - 24 * 3600 * 1000
+        range_sql = (
+            "SELECT r.id, r.sensor_type, r.value, u.symbol, r.timestamp FROM {table} r "
+            "LEFT JOIN units u ON u.id = r.unit_id "
+            "WHERE r.device_id = ? AND r.timestamp >= ? ORDER BY r.timestamp"
+        )
+        # Партиции, в которых есть показания за последние сутки
+        tables = [
+            table for table in tables
+            if conn.execute(f"SELECT max(timestamp) FROM {table}").fetchone()[0] >= since
+        ]
+    else:
+        since = (datetime.strptime(last[:26], TS_FORMAT) - timedelta(days=1)).strftime(TS_FORMAT)
+        range_sql = (
+            "SELECT id, sensor_type, value, unit, timestamp FROM {table} "
+            "WHERE device_id = ? AND timestamp >= ? ORDER BY timestamp"
+        )
+    # NOT INDEXED: после ANALYZE планировщик может выбрать skip-scan по индексу
+    # устройства, а замер должен сравнивать чтение самой таблицы
+    full_sql = "SELECT count(*), avg(value) FROM {table} NOT INDEXED WHERE timestamp >= ?"
+
+    range_queries = [(range_sql.format(table=table), (device_id, since)) for table in tables]
+    full_queries = [(full_sql.format(table=table), (since,)) for table in tables]
+    result["range_rows"] = sum(len(conn.execute(sql, params).fetchall()) for sql, params in range_queries)
+    result["range_ms"] = best_time(conn, range_queries, repeat)
+    result["full_ms"] = best_time(conn, full_queries, repeat)
+    conn.close()
+    return result
+
+
+def convert(path: str) -> float:
+    """Применить миграции и выполнить VACUUM, вернуть время в секундах."""
+    from sqlalchemy import create_engine
+    from app.db.migrations import upgrade_schema
+
+    engine = create_engine(f"sqlite:///{path}")
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        upgrade_schema(conn)
+    engine.dispose()
+    conn = sqlite3.connect(path)
+    # Режим auto_vacuum меняется только при VACUUM: после него задача
+    # хранения возвращает освободившиеся страницы без полного VACUUM
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    conn.close()
+    return time.perf_counter() - started
+
+
+def describe(name: str, stats: dict) -> str:
+    line = f"{name:<7} {stats['bytes'] / 1024 / 1024:9.1f} MiB"
+    if stats["readings"]:
+        line += (f"  {stats['bytes'] / stats['readings']:6.1f} B/reading"
+                 f"  range scan {stats['range_ms']:8.3f} ms ({stats['range_rows']} rows)"
+                 f"  full scan {stats['full_ms']:9.1f} ms")
+    return line
+
+
+def main(args):
+    if args.seed:
+        started = time.perf_counter()
+        seed_legacy_database(args.db_path, args.seed, args.devices)
+        print(f"Seeded legacy database with {args.seed} readings in {time.perf_counter() - started:.1f} s")
+
+    conn = sqlite3.connect(args.db_path)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    conn.close()
+    if version >= PARTITIONED_VERSION:
+        print(f"{args.db_path} already uses the partitioned compact format (user_version={version})")
+        return
+
+    if not args.seed and not args.no_backup:
+        backup_path = f"{args.db_path}.bak"
+        shutil.copyfile(args.db_path, backup_path)
+        print(f"Backup: {backup_path}")
+
+    before = measure(args.db_path, args.repeat)
+    elapsed = convert(args.db_path)
+    print(f"Converted in {elapsed:.1f} s")
+    after = measure(args.db_path, args.repeat)
+
+    print(describe("before", before))
+    print(describe("after", after))
+    if before["readings"]:
+        print(f"size: x{before['bytes'] / after['bytes']:.2f} smaller, "
+              f"range scan: x{before['range_ms'] / after['range_ms']:.2f}, "
+              f"full scan: x{before['full_ms'] / after['full_ms']:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert sensor readings to the compact partitioned format")
+    parser.add_argument("db_path", nargs="?", help="Путь к файлу SQLite (без --seed)")
+    parser.add_argument("--seed", type=int, default=0, help="Создать синтетическую базу с N показаниями")
+    parser.add_argument("--devices", type=int, default=200, help="Количество устройств для --seed")
+    parser.add_argument("--repeat", type=int, default=5, help="Повторов замера каждого запроса")
+    parser.add_argument("--no-backup", action="store_true", help="Не копировать базу перед конвертацией")
+    args = parser.parse_args()
+
+    if args.seed:
+        args.db_path = os.path.join(tempfile.mkdtemp(prefix="convert_readings_"), "legacy.db")
+    elif not args.db_path:
+        parser.error("db_path is required without --seed")
+    # Настройки читаются при импорте приложения, поэтому задаются до него
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(args.db_path)}"
+    os.environ.setdefault("AI_API_KEY", "convert")
+
+    main(args)
@@ -17,10 +17,11 @@
     2. Создает все таблицы, если они еще не существуют:
        - users (пользователи)
        - devices (устройства)
-       - sensor_readings (показания датчиков)
+       - units, id_sequences (справочник единиц, счетчики ID показаний)
        - alerts (оповещения)
        - commands (команды)
        - logs (логи)
+       Партиции показаний sensor_readings_YYYYMM создаются при первой записи
     3. Выводит сообщение об успешной инициализации
 
 Примечание:
@@ -28,12 +29,14 @@
     он не перезаписывает существующие таблицы и данные.
 """
 
+import asyncio
+
 from app.db.session import init_db
 
 
 if __name__ == "__main__":
     # Инициализация базы данных
-    init_db()
+    asyncio.run(init_db())
     print("✅ Database initialized (tables created)")
     print("ℹ️ Таблицы успешно созданы или уже существуют")
     print("☎️ Для запуска сервера используйте: uvicorn main:app --reload --port 8000")
@@ -0,0 +1,56 @@
+"""Общие настройки тестов.
+
+Настройки приложения читаются при импорте модулей app, поэтому
+обязательные переменные окружения задаются до сбора тестов. Тесты
+работают с отдельной временной БД; версии данных хранятся в памяти
+процесса, чтобы ETag и кэш результатов работали без Redis.
+"""
+
+import os
+import tempfile
+
+import pytest
+import redis
+from redis.backoff import NoBackoff
+from redis.retry import Retry
+
+os.environ.setdefault("AI_API_KEY", "test")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
+os.environ.setdefault("DATA_VERSIONS_REDIS", "false")
+
+from app.core.config import settings  # noqa: E402
+from app.db.redis_client import redis_client  # noqa: E402
+
+# Redis для тестов необязателен: без повторов подключения недоступный Redis
+# сразу отвечает ошибкой, и сервисы переходят на копии в памяти процесса
+redis_client.client = redis.Redis(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    db=settings.REDIS_DB,
+    password=settings.REDIS_PASSWORD,
+    decode_responses=settings.REDIS_DECODE_RESPONSES,
+    retry=Retry(NoBackoff(), 0),
+)
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Клиент приложения; запуск выполняет инициализацию БД и фоновых задач."""
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def run(client):
+    """Выполнить корутину в цикле событий приложения: run(func, *args)."""
+    return client.portal.call
+
+
+@pytest.fixture
+def device_id(client):
+    """ID нового устройства."""
+    return client.post("/api/v1/devices/", params={"name": "test"}).json()["id"]
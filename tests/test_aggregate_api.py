@@ -0,0 +1,42 @@
+"""Тесты агрегатов показаний для графиков: кэш результатов."""
+
+from app.api.v1 import devices
+from app.service import conditional
+
+
+def _post_reading(client, device_id, value):
+    reading = {"device_id": device_id, "sensor_type": "temperature", "value": value, "unit": "°C"}
+    assert client.post(f"/api/v1/devices/{device_id}/readings", json=reading).status_code == 200
+
+
+def _aggregate(client, device_id):
+    response = client.get(
+        f"/api/v1/devices/{device_id}/readings/aggregate",
+        params={"timeframe": "1h", "bucket": "1h", "aggregates": ["count", "max"]},
+    )
+    assert response.status_code == 200
+    return response.json()["series"].get("temperature", [])
+
+
+def test_new_reading_is_visible_immediately(client, device_id):
+    _post_reading(client, device_id, 20.0)
+    before = _aggregate(client, device_id)
+    assert sum(point["count"] for point in before) == 1
+
+    _post_reading(client, device_id, 25.0)
+    after = _aggregate(client, device_id)
+    assert sum(point["count"] for point in after) == 2
+    assert max(point["max"] for point in after) == 25.0
+
+
+def test_cache_key_includes_window_slot(client, device_id, monkeypatch):
+    _post_reading(client, device_id, 20.0)
+    _aggregate(client, device_id)
+    hits = devices.query_cache.hits
+    _aggregate(client, device_id)
+    assert devices.query_cache.hits == hits + 1
+
+    # Окно сдвинулось: сохраненный результат не используется
+    monkeypatch.setattr(devices, "window_slot", lambda: conditional.window_slot() + 1)
+    _aggregate(client, device_id)
+    assert devices.query_cache.hits == hits + 1
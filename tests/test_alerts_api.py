@@ -0,0 +1,50 @@
+"""Тесты списка оповещений устройства: кэш результатов и Last-Modified."""
+
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+from sqlalchemy import event
+
+from app.db.session import read_engine
+
+
+def _create_alert(client, device_id, message="Temperature exceeded 30°C"):
+    alert = {"device_id": device_id, "message": message, "severity": "high", "alert_type": "error"}
+    response = client.post("/api/v1/alerts/", json=alert)
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_cache_hit_does_not_query_database(client, device_id):
+    _create_alert(client, device_id)
+    first = client.get(f"/api/v1/alerts/{device_id}/alerts")
+    assert first.status_code == 200 and first.json()["total"] == 1
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(read_engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        second = client.get(f"/api/v1/alerts/{device_id}/alerts")
+    finally:
+        event.remove(read_engine.sync_engine, "before_cursor_execute", count_statement)
+
+    assert statements == []
+    assert second.json() == first.json()
+    assert second.headers["Last-Modified"] == first.headers["Last-Modified"]
+
+
+def test_last_modified_is_newest_alert(client, device_id):
+    assert "Last-Modified" not in client.get(f"/api/v1/alerts/{device_id}/alerts").headers
+
+    _create_alert(client, device_id, "first")
+    _create_alert(client, device_id, "second")
+    # Last-Modified относится ко всем оповещениям устройства, а не к странице
+    response = client.get(f"/api/v1/alerts/{device_id}/alerts", params={"status": "resolved"})
+    assert response.json()["alerts"] == []
+
+    alerts = client.get(f"/api/v1/alerts/{device_id}/alerts").json()["alerts"]
+    newest = datetime.fromisoformat(alerts[0]["timestamp"])
+    assert response.headers["Last-Modified"] == format_datetime(newest.astimezone(timezone.utc), usegmt=True)
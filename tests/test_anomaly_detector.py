@@ -0,0 +1,169 @@
+"""Тесты EWMA и детектора аномалий по последовательной эталонной реализации."""
+
+import asyncio
+import math
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.service import anomaly_detector as anomaly_module
+from app.service.anomaly_detector import AnomalyDetector, ewma_series
+
+START = datetime(2025, 10, 4, 12, 0)
+
+
+def reference_ewma(values, alpha, min_std, warmup):
+    """Последовательное обновление по формулам из описания модуля."""
+    means, variances, scores = [], [], []
+    mean = var = 0.0
+    for index, value in enumerate(values):
+        if index == 0:
+            mean, var, score = value, 0.0, 0.0
+        else:
+            delta = value - mean
+            score = delta / max(math.sqrt(var), min_std) if index >= warmup else 0.0
+            mean = mean + alpha * delta
+            var = (1 - alpha) * (var + alpha * delta * delta)
+        means.append(mean)
+        variances.append(var)
+        scores.append(score)
+    return np.array(means), np.array(variances), np.array(scores)
+
+
+def reading_rows(values, device_id="abc123", sensor_type="temperature"):
+    return [
+        {
+            "device_id": device_id,
+            "sensor_type": sensor_type,
+            "value": float(value),
+            "unit": "°C",
+            "timestamp": START + timedelta(seconds=index),
+        }
+        for index, value in enumerate(values)
+    ]
+
+
+def test_docstring_example():
+    means, variances, scores = ewma_series(np.array([20.0, 20.5, 21.0, 35.0]), 0.1, 0.1, 3)
+    assert round(float(scores[-1]), 1) == 46.6
+    assert scores[:3].tolist() == [0.0, 0.0, 0.0]
+
+
+@pytest.mark.parametrize("alpha, count, warmup", [
+    (0.1, 50, 3),
+    (0.01, 3000, 30),     # несколько блоков _linear_recurrence
+    (0.3, 1000, 0),
+    (1.0, 20, 1),
+])
+def test_ewma_series_matches_reference(alpha, count, warmup):
+    values = 20 + np.cumsum(np.random.default_rng(count).normal(0, 0.5, count))
+    expected = reference_ewma(values.tolist(), alpha, 0.1, warmup)
+    for actual, reference in zip(ewma_series(values, alpha, 0.1, warmup), expected):
+        np.testing.assert_allclose(actual, reference, rtol=1e-9, atol=1e-9)
+
+
+def test_ewma_series_edge_lengths():
+    assert [len(result) for result in ewma_series(np.array([]), 0.1, 0.1, 3)] == [0, 0, 0]
+    means, variances, scores = ewma_series(np.array([21.5]), 0.1, 0.1, 3)
+    assert means.tolist() == [21.5] and variances.tolist() == [0.0] and scores.tolist() == [0.0]
+
+
+def test_constant_series_uses_min_std():
+    values = np.array([20.0] * 10 + [20.5])
+    means, variances, scores = ewma_series(values, 0.1, 0.25, 3)
+    assert variances[-2] == pytest.approx(0.0, abs=1e-12)
+    assert scores[-1] == pytest.approx(2.0)
+
+
+def test_detector_updates_match_ewma_series():
+    values = 20 + np.cumsum(np.random.default_rng(7).normal(0, 0.5, 500))
+    detector = AnomalyDetector(alpha=0.05, z_threshold=1e9, min_std=0.1, warmup=10)
+    for row in reading_rows(values):
+        assert detector._check(row) is None
+
+    means, variances, scores = ewma_series(values, 0.05, 0.1, 10)
+    state = detector.scores("abc123")["temperature"]
+    assert state["count"] == 500
+    assert state["mean"] == pytest.approx(means[-1], rel=1e-9)
+    assert state["std"] == pytest.approx(math.sqrt(variances[-1]), rel=1e-9)
+    assert state["score"] == pytest.approx(scores[-1], rel=1e-6)
+    assert state["rate"] == pytest.approx(values[-1] - values[-2], rel=1e-6)
+
+
+def test_restore_matches_sequential_updates():
+    values = 20 + np.cumsum(np.random.default_rng(8).normal(0, 0.5, 300))
+    rows = reading_rows(values)
+    sequential = AnomalyDetector(alpha=0.05, z_threshold=1e9, min_std=0.1, warmup=10)
+    for row in rows:
+        sequential._check(row)
+    restored = AnomalyDetector(alpha=0.05, z_threshold=1e9, min_std=0.1, warmup=10)
+    timestamps = np.array([int(row["timestamp"].timestamp() * 1000) for row in rows])
+    restored._restore(("abc123", "temperature"), timestamps, values)
+
+    expected = sequential.scores("abc123")["temperature"]
+    actual = restored.scores("abc123")["temperature"]
+    assert actual["count"] == expected["count"]
+    for field in ("mean", "std", "score", "rate", "last_value"):
+        assert actual[field] == pytest.approx(expected[field], rel=1e-6)
+
+
+def test_alert_once_until_score_drops():
+    detector = AnomalyDetector(alpha=0.1, z_threshold=4.0, min_std=0.1, warmup=3)
+    alerts = [detector._check(row) for row in reading_rows([20.0, 20.5, 21.0, 35.0, 36.0, 20.0])]
+    assert [alert is not None for alert in alerts] == [False, False, False, True, False, False]
+    assert alerts[3].device_id == "abc123" and alerts[3].code == "temperature"
+
+
+def test_older_reading_does_not_change_state():
+    detector = AnomalyDetector(alpha=0.1, z_threshold=4.0, min_std=0.1, warmup=3)
+    rows = reading_rows([20.0, 21.0])
+    detector._check(rows[1])
+    before = detector.scores("abc123")
+    assert detector._check(rows[0]) is None
+    assert detector.scores("abc123") == before
+
+
+def test_slot_reuse_after_forget():
+    detector = AnomalyDetector(alpha=0.1, z_threshold=4.0, min_std=0.1, warmup=3)
+    for row in reading_rows([20.0, 21.0, 22.0], device_id="old"):
+        detector._check(row)
+    slot = detector._slots[("old", "temperature")]
+
+    detector.forget("old")
+    assert detector.scores("old") == {}
+    detector._check(reading_rows([50.0], device_id="new")[0])
+
+    assert detector._slots[("new", "temperature")] == slot
+    state = detector.scores("new")["temperature"]
+    assert state["count"] == 1 and state["mean"] == 50.0 and state["std"] == 0.0
+    assert not state["anomalous"]
+
+
+def test_state_array_grows():
+    detector = AnomalyDetector(alpha=0.1, z_threshold=4.0, min_std=0.1, warmup=3)
+    for index in range(200):
+        detector._check(reading_rows([float(index)], device_id=f"dev{index}")[0])
+    assert len(detector._states) >= 200
+    assert detector.scores("dev150")["temperature"]["mean"] == 150.0
+    assert detector.stats()["streams"] == 200
+
+
+class _FailingSession:
+    async def rollback(self):
+        pass
+
+
+def test_failed_save_clears_anomalous_flag(monkeypatch):
+    async def failing_save_alerts(db, alerts):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(anomaly_module, "save_alerts", failing_save_alerts)
+    detector = AnomalyDetector(alpha=0.1, z_threshold=4.0, min_std=0.1, warmup=3)
+    rows = reading_rows([20.0, 20.5, 21.0, 35.0])
+
+    assert asyncio.run(detector.evaluate(_FailingSession(), rows)) == []
+    assert detector.errors == 1
+    assert not detector.scores("abc123")["temperature"]["anomalous"]
+    # Следующее аномальное показание снова создает оповещение
+    assert detector._check(reading_rows([0] * 4 + [60.0])[4]) is not None
@@ -0,0 +1,108 @@
+"""Тесты условных запросов (ETag / If-None-Match / 304)."""
+
+from sqlalchemy import event
+
+from app.api.v1 import devices
+from app.db.session import read_engine
+from app.service.conditional import etag_matches, make_etag
+
+
+def _post_reading(client, device_id, value=20.0):
+    reading = {"device_id": device_id, "sensor_type": "temperature", "value": value, "unit": "°C"}
+    assert client.post(f"/api/v1/devices/{device_id}/readings", json=reading).status_code == 200
+
+
+def _revalidate(client, url, etag, **params):
+    return client.get(url, params=params, headers={"If-None-Match": etag})
+
+
+def test_make_etag():
+    etag = make_etag("readings", "boot.0.1", {"limit": 10, "sensor_type": None})
+    assert etag.startswith('"readings-boot.0.1-') and etag.endswith('"')
+    assert make_etag("readings", "boot.0.1", {"sensor_type": None, "limit": 10}) == etag
+    assert make_etag("readings", "boot.0.1", {"limit": 20, "sensor_type": None}) != etag
+    assert make_etag("readings", "boot.0.2", {"limit": 10, "sensor_type": None}) != etag
+    assert make_etag("alerts", "boot.0.1", {"limit": 10, "sensor_type": None}) != etag
+    # Версии недоступны: ответ без ETag
+    assert make_etag("readings", None, {}) is None
+
+
+def test_etag_matches():
+    etag = '"readings-v-1"'
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'W/{etag}', etag)
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(etag, None)
+
+
+def test_readings_not_modified_without_database(client, device_id):
+    url = f"/api/v1/devices/{device_id}/readings"
+    _post_reading(client, device_id)
+    first = client.get(url)
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+    assert "Last-Modified" in first.headers
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(read_engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        response = _revalidate(client, url, etag)
+    finally:
+        event.remove(read_engine.sync_engine, "before_cursor_execute", count_statement)
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    assert statements == []
+
+    # Другие параметры запроса - другой ETag
+    assert _revalidate(client, url, etag, limit=5).status_code == 200
+
+
+def test_new_reading_changes_etag(client, device_id):
+    url = f"/api/v1/devices/{device_id}/readings"
+    etag = client.get(url).headers["ETag"]
+    _post_reading(client, device_id, 21.0)
+
+    response = _revalidate(client, url, etag)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["readings"][0]["value"] == 21.0
+
+
+def test_timeframe_etag_changes_with_window(client, device_id, monkeypatch):
+    url = f"/api/v1/devices/{device_id}/readings"
+    monkeypatch.setattr(devices, "window_slot", lambda: 1)
+    etag = client.get(url, params={"timeframe": "1h"}).headers["ETag"]
+    assert _revalidate(client, url, etag, timeframe="1h").status_code == 304
+
+    # Окно от текущего момента сдвинулось без изменения данных
+    monkeypatch.setattr(devices, "window_slot", lambda: 2)
+    assert _revalidate(client, url, etag, timeframe="1h").status_code == 200
+
+
+def test_device_changes_update_etags(client, device_id):
+    device_url = f"/api/v1/devices/{device_id}"
+    alerts_url = f"/api/v1/alerts/{device_id}/alerts"
+    device_etag = client.get(device_url).headers["ETag"]
+    assert _revalidate(client, device_url, device_etag).status_code == 304
+
+    assert client.patch(device_url, params={"location": "Lab"}).status_code == 200
+    assert _revalidate(client, device_url, device_etag).status_code == 200
+
+    alert = {"device_id": device_id, "message": "test", "severity": "high", "alert_type": "error"}
+    alert_id = client.post("/api/v1/alerts/", json=alert).json()["id"]
+    alerts_etag = client.get(alerts_url).headers["ETag"]
+    assert _revalidate(client, alerts_url, alerts_etag).status_code == 304
+
+    assert client.put(f"/api/v1/alerts/{alert_id}/status", params={"status": "resolved"}).status_code == 200
+    response = _revalidate(client, alerts_url, alerts_etag)
+    assert response.status_code == 200
+    assert response.json()["alerts"][0]["status"] == "resolved"
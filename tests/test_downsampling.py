@@ -0,0 +1,121 @@
+"""Тесты прореживания показаний (min/max и LTTB) по эталонным реализациям."""
+
+import numpy as np
+import pytest
+
+from app.service.downsampling import lttb_indices, minmax_indices
+
+
+def reference_minmax(x, y, max_points):
+    """Огибающая min/max циклом по точкам: из интервала берутся первый
+    минимум и последний максимум."""
+    if len(x) <= max_points:
+        return list(range(len(x)))
+    bucket_count = max_points // 2
+    span = (x[-1] - x[0]) or 1
+    buckets = {}
+    for index in range(len(x)):
+        bucket = min(int((x[index] - x[0]) * bucket_count // span), bucket_count - 1)
+        buckets.setdefault(bucket, []).append(index)
+    selected = set()
+    for indices in buckets.values():
+        selected.add(min(indices, key=lambda index: (y[index], index)))
+        selected.add(max(indices, key=lambda index: (y[index], index)))
+    return sorted(selected)
+
+
+def reference_lttb(x, y, max_points):
+    """Классический LTTB (Steinarsson, 2013) циклом по точкам."""
+    count = len(x)
+    if count <= max_points or max_points < 3:
+        return list(range(count))
+    every = (count - 2) / (max_points - 2)
+    selected = [0]
+    previous = 0
+    for group in range(max_points - 2):
+        next_start = int((group + 1) * every) + 1
+        next_end = min(int((group + 2) * every) + 1, count)
+        cx = sum(x[next_start:next_end]) / (next_end - next_start)
+        cy = sum(y[next_start:next_end]) / (next_end - next_start)
+
+        ax, ay = x[previous], y[previous]
+        best, best_area = None, -1.0
+        for index in range(int(group * every) + 1, int((group + 1) * every) + 1):
+            area = abs((ax - cx) * (y[index] - ay) - (ax - x[index]) * (cy - ay))
+            if area > best_area:
+                best, best_area = index, area
+        selected.append(best)
+        previous = best
+    selected.append(count - 1)
+    return selected
+
+
+def random_series(seed, count):
+    rng = np.random.default_rng(seed)
+    # Целые миллисекунды с неравномерным шагом, как у реальных показаний
+    x = np.cumsum(rng.integers(1, 5000, count)).astype(np.float64) + 1759579200000
+    y = np.round(np.cumsum(rng.normal(0, 1, count)), 2)
+    return x, y
+
+
+def test_minmax_docstring_example():
+    assert minmax_indices(np.arange(6.0), np.array([0, 5, 1, 1, 9, 2.0]), 4).tolist() == [0, 1, 3, 4]
+
+
+@pytest.mark.parametrize("seed, count, max_points", [
+    (1, 1000, 100),
+    (2, 5000, 64),
+    (3, 101, 100),
+    (4, 10, 2),
+    (5, 20000, 1001),
+])
+def test_minmax_matches_reference(seed, count, max_points):
+    x, y = random_series(seed, count)
+    result = minmax_indices(x, y, max_points)
+    assert result.tolist() == reference_minmax(x.tolist(), y.tolist(), max_points)
+    assert len(result) <= max_points
+
+
+def test_minmax_keeps_spike():
+    x = np.arange(10000, dtype=np.float64)
+    y = np.zeros(10000)
+    y[7321] = 500.0
+    y[1234] = -500.0
+    result = minmax_indices(x, y, 50)
+    assert 7321 in result and 1234 in result
+
+
+def test_minmax_duplicate_timestamps():
+    x = np.full(10, 1759579200000.0)
+    y = np.arange(10.0)
+    assert minmax_indices(x, y, 4).tolist() == [0, 9]
+
+
+def test_short_series_unchanged():
+    x, y = random_series(6, 50)
+    assert minmax_indices(x, y, 50).tolist() == list(range(50))
+    assert lttb_indices(x, y, 50).tolist() == list(range(50))
+    assert lttb_indices(x, y, 2).tolist() == list(range(50))
+
+
+@pytest.mark.parametrize("seed, count, max_points", [
+    (1, 1000, 100),
+    (2, 5000, 64),
+    (3, 101, 100),
+    (4, 10, 3),
+    (5, 20000, 1000),
+    (6, 7919, 997),
+])
+def test_lttb_matches_reference(seed, count, max_points):
+    x, y = random_series(seed, count)
+    result = lttb_indices(x, y, max_points)
+    assert result.tolist() == reference_lttb(x.tolist(), y.tolist(), max_points)
+    assert len(result) == max_points
+    assert result[0] == 0 and result[-1] == count - 1
+    assert np.all(np.diff(result) > 0)
+
+
+def test_lttb_known_output():
+    x = np.arange(8.0)
+    y = np.array([0.0, 1.0, 0.0, 9.0, 0.0, 1.0, -7.0, 0.0])
+    assert lttb_indices(x, y, 4).tolist() == [0, 3, 6, 7]
@@ -0,0 +1,138 @@
+"""Тесты бинарного формата кадров показаний (frame_codec)."""
+
+import struct
+import time
+from datetime import datetime
+
+import pytest
+
+from app.enums.sensor_type import SENSOR_TYPE_DEFAULT_UNITS, SensorType
+from app.service.frame_codec import FRAME_MAGIC, FrameDecodeError, FrameTimeError, decode_frames, encode_frame
+
+BASE_TIME = int(time.time()) - 60
+RECEIVED_AT = datetime.now().replace(microsecond=0)
+
+
+def test_round_trip():
+    records = [
+        (SensorType.TEMPERATURE, 0, 23.5),
+        (SensorType.HUMIDITY, 1500, 41.25),
+        (SensorType.ALERT, 60000, 1.0),
+        (SensorType.FIRE, 7 * 24 * 3600 * 1000, -12.0),
+    ]
+    readings = decode_frames(encode_frame("abc1", records, BASE_TIME), max_readings=100)
+
+    assert [reading.device_id for reading in readings] == ["abc1"] * 4
+    assert [reading.sensor_type for reading in readings] == [record[0] for record in records]
+    assert [reading.value for reading in readings] == [record[2] for record in records]
+    assert [reading.unit for reading in readings] == [SENSOR_TYPE_DEFAULT_UNITS[record[0]] for record in records]
+    assert [reading.timestamp for reading in readings] == [
+        datetime.fromtimestamp(BASE_TIME - age_ms / 1000) for _, age_ms, _ in records
+    ]
+
+
+def test_float32_precision():
+    value = decode_frames(encode_frame("abc1", [(SensorType.TEMPERATURE, 0, 23.1)], BASE_TIME), 1)[0].value
+    assert value == struct.unpack("<f", struct.pack("<f", 23.1))[0]
+    assert value == pytest.approx(23.1, abs=1e-6)
+
+
+def test_zero_base_time_uses_received_at():
+    body = encode_frame("abc1", [(SensorType.TEMPERATURE, 2000, 20.0)])
+    reading = decode_frames(body, max_readings=1, received_at=RECEIVED_AT)[0]
+    assert reading.timestamp == datetime.fromtimestamp(RECEIVED_AT.timestamp() - 2)
+
+
+def test_several_frames_keep_order():
+    body = (
+        encode_frame("dev-a", [(SensorType.TEMPERATURE, 0, 1.0), (SensorType.HUMIDITY, 0, 2.0)], BASE_TIME)
+        + encode_frame("dev-b", [], BASE_TIME)
+        + encode_frame("dev-c", [(SensorType.FIRE, 0, 3.0)], BASE_TIME)
+    )
+    readings = decode_frames(body, max_readings=3)
+    assert [(reading.device_id, reading.value) for reading in readings] == [
+        ("dev-a", 1.0), ("dev-a", 2.0), ("dev-c", 3.0)
+    ]
+
+
+def test_empty_body():
+    assert decode_frames(b"", max_readings=10) == []
+
+
+def test_longest_device_id():
+    device_id = "d" * 255
+    readings = decode_frames(encode_frame(device_id, [(SensorType.TEMPERATURE, 0, 1.0)], BASE_TIME), 1)
+    assert readings[0].device_id == device_id
+
+
+def test_max_readings_boundary():
+    records = [(SensorType.TEMPERATURE, index, float(index)) for index in range(10)]
+    body = encode_frame("abc1", records[:6], BASE_TIME) + encode_frame("abc2", records[6:], BASE_TIME)
+
+    assert len(decode_frames(body, max_readings=10)) == 10
+    with pytest.raises(FrameDecodeError, match="Too many readings"):
+        decode_frames(body, max_readings=9)
+
+
+def test_every_truncation_is_rejected():
+    body = encode_frame("abc1", [(SensorType.TEMPERATURE, 0, 1.0), (SensorType.HUMIDITY, 10, 2.0)], BASE_TIME)
+    for length in range(1, len(body)):
+        with pytest.raises(FrameDecodeError):
+            decode_frames(body[:length], max_readings=10)
+
+
+def test_trailing_garbage_is_rejected():
+    body = encode_frame("abc1", [(SensorType.TEMPERATURE, 0, 1.0)], BASE_TIME)
+    with pytest.raises(FrameDecodeError, match="Truncated frame header"):
+        decode_frames(body + b"S", max_readings=10)
+
+
+def test_bad_magic():
+    body = encode_frame("abc1", [(SensorType.TEMPERATURE, 0, 1.0)], BASE_TIME)
+    with pytest.raises(FrameDecodeError, match="Bad frame magic"):
+        decode_frames(b"XX" + body[len(FRAME_MAGIC):], max_readings=10)
+
+
+def test_unsupported_version():
+    body = bytearray(encode_frame("abc1", [(SensorType.TEMPERATURE, 0, 1.0)], BASE_TIME))
+    body[2] = 2
+    with pytest.raises(FrameDecodeError, match="Unsupported frame version 2"):
+        decode_frames(bytes(body), max_readings=10)
+
+
+def test_non_ascii_device_id():
+    body = bytearray(encode_frame("abc1", [(SensorType.TEMPERATURE, 0, 1.0)], BASE_TIME))
+    body[4] = 0xFF
+    with pytest.raises(FrameDecodeError, match="ASCII"):
+        decode_frames(bytes(body), max_readings=10)
+
+
+def test_unknown_sensor_code():
+    body = bytearray(encode_frame("abc1", [(SensorType.TEMPERATURE, 0, 1.0)], BASE_TIME))
+    body[-9] = 0
+    with pytest.raises(FrameDecodeError, match="Unknown sensor type code 0"):
+        decode_frames(bytes(body), max_readings=10)
+
+
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), float("-inf")])
+def test_non_finite_value(value):
+    body = encode_frame("abc1", [(SensorType.TEMPERATURE, 0, value)], BASE_TIME)
+    with pytest.raises(FrameDecodeError, match="Non-finite value"):
+        decode_frames(body, max_readings=10)
+
+
+def test_reading_time_window():
+    day_ms = 24 * 3600 * 1000
+    received_at = datetime.fromtimestamp(BASE_TIME)
+    body = encode_frame("abc1", [(SensorType.TEMPERATURE, 30 * day_ms, 1.0)], BASE_TIME)
+    assert decode_frames(body, 1, received_at)[0].timestamp == datetime.fromtimestamp(BASE_TIME - 30 * 24 * 3600)
+
+    for base_time, age_ms in [
+        (BASE_TIME, 32 * day_ms),           # старше READING_MAX_AGE_DAYS
+        (BASE_TIME + 3600, 0),              # опережает часы сервера больше допустимого
+        (1, 0),                             # часы устройства не синхронизированы (1970)
+        (4102444800, 0),                    # 2100 год
+    ]:
+        body = encode_frame("abc1", [(SensorType.TEMPERATURE, age_ms, 1.0)], base_time)
+        with pytest.raises(FrameTimeError, match="out of allowed range"):
+            decode_frames(body, 1, received_at)
@@ -0,0 +1,63 @@
+"""Тесты выдачи ID показаний блоками (IdAllocator)."""
+
+import uuid
+
+from app.db.session import SessionLocal
+from app.service.id_allocator import IdAllocator
+
+
+def _counter():
+    return f"test-{uuid.uuid4().hex}"
+
+
+async def _allocate(allocator, *counts):
+    async with SessionLocal() as db:
+        return [await allocator.allocate(db, count) for count in counts]
+
+
+def test_ids_come_from_one_block(run):
+    allocator = IdAllocator(_counter(), 10)
+    first, second = run(_allocate, allocator, 3, 4)
+
+    assert first == [1, 2, 3]
+    assert second == [4, 5, 6, 7]
+    assert allocator.stats() == {"block_size": 10, "remaining_in_block": 3, "reserved_blocks": 1}
+
+
+def test_exhausted_block_reserves_next(run):
+    allocator = IdAllocator(_counter(), 4)
+    first, second = run(_allocate, allocator, 3, 3)
+
+    assert first + second == list(range(1, 7))
+    assert allocator.reserved_blocks == 2
+
+
+def test_request_larger_than_block(run):
+    allocator = IdAllocator(_counter(), 4)
+    ids, = run(_allocate, allocator, 10)
+
+    assert ids == list(range(1, 11))
+    assert allocator.reserved_blocks == 1
+    assert allocator.stats()["remaining_in_block"] == 0
+
+
+def test_processes_sharing_counter_do_not_overlap(run):
+    name = _counter()
+    first, second = IdAllocator(name, 5), IdAllocator(name, 5)
+
+    ids = []
+    for allocator in [first, second, first, second, first]:
+        ids.extend(run(_allocate, allocator, 3)[0])
+
+    assert len(ids) == len(set(ids)) == 15
+    assert first.reserved_blocks == 2 and second.reserved_blocks == 2
+
+
+def test_restart_skips_rest_of_block(run):
+    name = _counter()
+    before, = run(_allocate, IdAllocator(name, 10), 2)
+    after, = run(_allocate, IdAllocator(name, 10), 2)
+
+    # Остаток блока перезапущенного процесса теряется, ID только возрастают
+    assert before == [1, 2]
+    assert after == [11, 12]
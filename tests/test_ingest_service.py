@@ -0,0 +1,158 @@
+"""Тесты очереди отложенной записи показаний (memory)."""
+
+import asyncio
+
+import pytest
+
+from app.db.session import ReadSessionLocal, SessionLocal
+from app.models.sensor_reading import ReadingBase
+from app.service import ingest_service
+from app.service.ingest_service import IngestQueueFull, MemoryIngestQueue
+from app.service.reading_query import count_readings
+from app.service.reading_service import build_reading_rows, write_reading_rows
+
+
+async def _rows(device_id, count):
+    readings = [
+        ReadingBase(device_id=device_id, sensor_type="temperature", value=float(index), unit="°C")
+        for index in range(count)
+    ]
+    async with SessionLocal() as db:
+        rows, _ = await build_reading_rows(db, readings, {device_id}, accepted_status="accepted")
+    return rows
+
+
+async def _count(device_id):
+    async with ReadSessionLocal() as db:
+        return await count_readings(db, [device_id])
+
+
+async def _drain(queue, rows, delay=0.3):
+    await queue.start()
+    if rows:
+        await queue.put(rows)
+    await asyncio.sleep(delay)
+    await queue.stop()
+
+
+def test_flush_in_batches(run, device_id):
+    async def scenario():
+        queue = MemoryIngestQueue(100, 4, 0.05, 3)
+        await _drain(queue, await _rows(device_id, 10))
+        return queue, await _count(device_id)
+
+    queue, count = run(scenario)
+    assert count == 10
+    assert queue.flushed_total == 10 and queue.flush_count == 3
+    assert queue.flush_errors == 0
+
+
+def test_full_queue_rejects_whole_request(run, device_id):
+    async def scenario():
+        queue = MemoryIngestQueue(5, 4, 0.05, 3)
+        await queue.put(await _rows(device_id, 4))
+        with pytest.raises(IngestQueueFull):
+            await queue.put(await _rows(device_id, 2))
+        return queue
+
+    queue = run(scenario)
+    assert run(queue.depth) == 4
+    assert queue.rejected_total == 2
+
+
+def test_failed_write_is_retried(run, device_id, monkeypatch):
+    failures = []
+
+    async def flaky_write(db, rows):
+        if not failures:
+            failures.append(len(rows))
+            raise RuntimeError("database is locked")
+        await write_reading_rows(db, rows)
+
+    monkeypatch.setattr(ingest_service, "write_reading_rows", flaky_write)
+
+    async def scenario():
+        queue = MemoryIngestQueue(100, 10, 0.05, 3)
+        await _drain(queue, await _rows(device_id, 6))
+        return queue, await _count(device_id)
+
+    queue, count = run(scenario)
+    assert failures == [6]
+    assert count == 6
+    assert queue.flush_errors == 1 and queue.flushed_total == 6
+
+
+def test_redelivered_rows_are_not_written_twice(run, device_id):
+    async def scenario():
+        rows = await _rows(device_id, 8)
+        # Первая половина записана до сбоя, подтверждение не дошло
+        async with SessionLocal() as db:
+            await write_reading_rows(db, rows[:4])
+        queue = MemoryIngestQueue(100, 10, 0.05, 3)
+        await _drain(queue, rows)
+        return queue, await _count(device_id)
+
+    queue, count = run(scenario)
+    assert count == 8
+    assert queue.redelivered_total == 4
+    assert queue.flush_errors == 0
+
+
+def test_rows_of_deleted_device_are_dropped(run, client, device_id):
+    other_id = client.post("/api/v1/devices/", params={"name": "other"}).json()["id"]
+
+    async def fill():
+        queue = MemoryIngestQueue(100, 10, 0.05, 3)
+        await queue.put(await _rows(device_id, 3) + await _rows(other_id, 2))
+        return queue
+
+    async def drain(queue):
+        await _drain(queue, [])
+        return queue, await _count(device_id), await _count(other_id)
+
+    queue = run(fill)
+    # Устройство удалено, пока его показания ждали в очереди
+    assert client.delete(f"/api/v1/devices/{device_id}").status_code == 200
+    queue, deleted_count, other_count = run(drain, queue)
+    assert (deleted_count, other_count) == (0, 2)
+    assert queue.dropped_total == 3 and queue.flushed_total == 2
+    assert client.get(f"/api/v1/devices/{other_id}").json()["readings_count"] == 2
+
+
+def test_flusher_survives_queue_errors(run, device_id, monkeypatch):
+    queue = MemoryIngestQueue(100, 10, 0.05, 3)
+    take_batch = queue._take_batch
+    calls = []
+
+    async def failing_once():
+        calls.append(None)
+        if len(calls) == 1:
+            raise ConnectionError("Redis unavailable")
+        return await take_batch()
+
+    monkeypatch.setattr(queue, "_take_batch", failing_once)
+
+    async def scenario():
+        await _drain(queue, await _rows(device_id, 5))
+        return await _count(device_id)
+
+    assert run(scenario) == 5
+    assert queue.flush_errors == 1
+
+
+def test_stop_gives_up_when_database_stays_down(run, device_id, monkeypatch):
+    async def broken_write(db, rows):
+        raise RuntimeError("disk I/O error")
+
+    monkeypatch.setattr(ingest_service, "write_reading_rows", broken_write)
+
+    async def scenario():
+        queue = MemoryIngestQueue(100, 10, 0.01, 3)
+        await queue.put(await _rows(device_id, 5))
+        await queue.start()
+        await asyncio.wait_for(queue.stop(), timeout=5)
+        return queue
+
+    queue = run(scenario)
+    assert queue.flush_errors == 3
+    assert run(queue.depth) == 5
@@ -0,0 +1,74 @@
+"""Тесты курсоров keyset пагинации."""
+
+import base64
+from datetime import datetime
+
+import pytest
+
+from app.service.pagination import CursorError, decode_cursor, encode_cursor
+
+
+def _raw_cursor(payload: bytes) -> str:
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def test_docstring_example():
+    assert encode_cursor(datetime(2025, 10, 4, 12, 0), 1042) == "WyIyMDI1LTEwLTA0VDEyOjAwOjAwIiwgMTA0Ml0"
+
+
+@pytest.mark.parametrize("timestamp, row_id, id_type", [
+    (datetime(2025, 10, 4, 12, 0), 1042, int),
+    (datetime(2025, 10, 4, 12, 0, 0, 123456), 0, int),
+    (datetime(1970, 1, 1), 2 ** 62, int),
+    (datetime(2025, 10, 4, 12, 0), "0f8e2c1a-4b6d-4c3e-9a7b-1d2e3f4a5b6c", str),
+    (datetime(2025, 10, 4, 12, 0), "", str),
+    (datetime(2025, 10, 4, 12, 0), "кириллица/+=?", str),
+])
+def test_round_trip(timestamp, row_id, id_type):
+    cursor = encode_cursor(timestamp, row_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, id_type) == (timestamp, row_id)
+
+
+def test_padding_lengths():
+    # Длина payload меняется на 1 байт: курсоры без дополнения всех остатков длины
+    for row_id in (1, 10, 100, 1000):
+        cursor = encode_cursor(datetime(2025, 10, 4), row_id)
+        assert decode_cursor(cursor, int) == (datetime(2025, 10, 4), row_id)
+
+
+def test_id_type_mismatch():
+    with pytest.raises(CursorError):
+        decode_cursor(encode_cursor(datetime(2025, 10, 4), 1042), str)
+    with pytest.raises(CursorError):
+        decode_cursor(encode_cursor(datetime(2025, 10, 4), "1042"), int)
+
+
+def test_bool_is_not_int():
+    with pytest.raises(CursorError):
+        decode_cursor(_raw_cursor(b'["2025-10-04T00:00:00", true]'), int)
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not a cursor!",
+    "W",
+    _raw_cursor(b"not json"),
+    _raw_cursor(b'"2025-10-04T00:00:00"'),
+    _raw_cursor(b"[]"),
+    _raw_cursor(b'["2025-10-04T00:00:00"]'),
+    _raw_cursor(b'["2025-10-04T00:00:00", 1, 2]'),
+    _raw_cursor(b'["yesterday", 1]'),
+    _raw_cursor(b"[20251004, 1]"),
+    _raw_cursor(b"{}"),
+])
+def test_malformed(cursor):
+    with pytest.raises(CursorError):
+        decode_cursor(cursor, int)
+
+
+def test_truncated_cursor():
+    cursor = encode_cursor(datetime(2025, 10, 4), 1042)
+    for length in range(len(cursor)):
+        with pytest.raises(CursorError):
+            decode_cursor(cursor[:length], int)
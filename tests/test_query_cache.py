@@ -0,0 +1,125 @@
+"""Тесты версий данных устройств и кэша результатов запросов."""
+
+import redis
+
+from app.db.redis_client import redis_client
+from app.service import query_cache as query_cache_module
+from app.service.data_versions import EPOCH, DataVersions
+from app.service.query_cache import QueryCache
+
+
+class FakeVersionStore:
+    """Счетчики версий вместо Redis; available=False - Redis недоступен."""
+
+    def __init__(self):
+        self.counters = {}
+        self.available = True
+
+    def incr_data_versions(self, names):
+        self._check()
+        for name in names:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def get_data_versions(self, names, token):
+        self._check()
+        return "token", {name: self.counters.get(name, 0) for name in names}
+
+    def _check(self):
+        if not self.available:
+            raise redis.ConnectionError("Redis unavailable")
+
+
+def test_local_versions_change_on_bump(run):
+    versions = DataVersions(False, 30)
+    before = run(versions.get, ["a", "b"])
+
+    run(versions.bump, ["a", "a"])
+    after = run(versions.get, ["a", "b"])
+    assert after["a"] != before["a"]
+    assert after["b"] == before["b"]
+
+    # Эпоха меняет версии всех устройств
+    run(versions.bump_all)
+    assert run(versions.version, "b") != after["b"]
+    # Версии разных запусков не совпадают
+    assert DataVersions(False, 30)._boot != versions._boot
+
+
+def test_redis_outage_disables_versions_and_bumps_epoch(run, monkeypatch):
+    store = FakeVersionStore()
+    monkeypatch.setattr(redis_client, "incr_data_versions", store.incr_data_versions)
+    monkeypatch.setattr(redis_client, "get_data_versions", store.get_data_versions)
+    versions = DataVersions(True, 0)
+    before = run(versions.version, "a")
+    assert before == "token.0.0"
+
+    store.available = False
+    assert run(versions.version, "a") is None
+    # Изменение, принятое без Redis, не теряется: после восстановления растет эпоха
+    run(versions.bump, ["a"])
+    store.available = True
+
+    assert run(versions.version, "a") == "token.1.0"
+    assert store.counters == {EPOCH: 1}
+    assert versions.unavailable_reads == 1
+
+
+def test_cached_result_until_version_changes(run, monkeypatch):
+    versions = DataVersions(False, 30)
+    monkeypatch.setattr(query_cache_module, "data_versions", versions)
+    cache = QueryCache(True, 10, 60, False, 30)
+    calls = []
+
+    async def compute():
+        calls.append(None)
+        return {"total": len(calls)}
+
+    async def get(params=None):
+        return await cache.get_or_compute("alerts", "dev", params or {"limit": 10}, compute)
+
+    assert run(get) == {"total": 1}
+    assert run(get) == {"total": 1}
+    assert run(get, {"limit": 20}) == {"total": 2}
+
+    run(versions.bump, ["dev"])
+    assert run(get) == {"total": 3}
+    assert cache.stats()["hits"] == 1 and cache.misses == 3
+
+
+def test_unavailable_versions_bypass_cache(run, monkeypatch):
+    store = FakeVersionStore()
+    store.available = False
+    monkeypatch.setattr(redis_client, "get_data_versions", store.get_data_versions)
+    monkeypatch.setattr(query_cache_module, "data_versions", DataVersions(True, 30))
+    cache = QueryCache(True, 10, 60, False, 30)
+    calls = []
+
+    async def compute():
+        calls.append(None)
+        return len(calls)
+
+    async def get(version=None):
+        return await cache.get_or_compute("readings", "dev", {}, compute, version=version)
+
+    assert run(get, "v1") == 1
+    assert run(get, "v1") == 1
+    assert run(get, "v2") == 2
+
+    # Версии недоступны: сохраненный результат нельзя проверить, он вычисляется заново
+    assert [run(get), run(get)] == [3, 4]
+    assert cache.bypassed == 2
+
+
+def test_cache_evicts_oldest_results(run):
+    cache = QueryCache(True, 2, 60, False, 30)
+
+    async def get(limit):
+        async def compute():
+            return limit
+        return await cache.get_or_compute("alerts", "dev", {"limit": limit}, compute, version="v1")
+
+    for limit in [1, 2, 1, 3]:
+        run(get, limit)
+    assert cache.stats()["entries"] == 2
+    assert cache.evictions == 1
+    assert cache.hits == 1
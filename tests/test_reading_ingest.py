@@ -0,0 +1,56 @@
+"""Тесты приема показаний через HTTP: проверка времени показаний."""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.enums.sensor_type import SensorType
+from app.service.frame_codec import FRAME_CONTENT_TYPE, encode_frame
+
+
+def _reading(device_id, timestamp=None):
+    reading = {"device_id": device_id, "sensor_type": "temperature", "value": 21.5, "unit": "°C"}
+    if timestamp is not None:
+        reading["timestamp"] = timestamp.isoformat()
+    return reading
+
+
+def test_reading_in_window_is_accepted(client, device_id):
+    timestamp = datetime.now().replace(microsecond=0) - timedelta(days=3)
+    response = client.post(f"/api/v1/devices/{device_id}/readings", json=_reading(device_id, timestamp))
+    assert response.status_code == 200
+    assert response.json()["timestamp"] == timestamp.isoformat()
+
+
+@pytest.mark.parametrize("timestamp", [
+    datetime(1970, 1, 1),
+    datetime(9999, 12, 31),
+    datetime.now() + timedelta(hours=1),
+    datetime.now() - timedelta(days=60),
+])
+def test_reading_out_of_window_is_rejected(client, device_id, timestamp):
+    response = client.post(f"/api/v1/devices/{device_id}/readings", json=_reading(device_id, timestamp))
+    assert response.status_code == 422
+    assert "Timestamp must be between" in response.text
+
+
+def test_batch_with_out_of_window_reading_is_rejected(client, device_id):
+    readings = [_reading(device_id), _reading(device_id, datetime(1970, 1, 1))]
+    response = client.post("/api/v1/devices/readings/batch", json={"readings": readings})
+    assert response.status_code == 422
+    assert client.get(f"/api/v1/devices/{device_id}").json()["readings_count"] == 0
+
+
+def test_binary_out_of_window_reading_is_rejected(client, device_id):
+    body = encode_frame(device_id, [(SensorType.TEMPERATURE, 0, 1.0)], base_time=1)
+    response = client.post(
+        "/api/v1/devices/readings/binary", content=body, headers={"Content-Type": FRAME_CONTENT_TYPE}
+    )
+    assert response.status_code == 422
+
+    body = encode_frame(device_id, [(SensorType.TEMPERATURE, 0, 1.0)], base_time=int(time.time()))
+    response = client.post(
+        "/api/v1/devices/readings/binary", content=body, headers={"Content-Type": FRAME_CONTENT_TYPE}
+    )
+    assert response.json()["accepted"] == 1
@@ -0,0 +1,66 @@
+"""Тесты партиций показаний по месяцам."""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.db.session import ReadSessionLocal, SessionLocal
+from app.models.sensor_reading import is_partition_name, partition_bounds, partition_name, sensor_readings_table
+from app.service.reading_partitions import reading_partitions
+
+
+def test_partition_name_and_bounds():
+    assert partition_name(datetime(2025, 10, 4, 12, 0)) == "sensor_readings_202510"
+    assert partition_bounds("sensor_readings_202510") == (datetime(2025, 10, 1), datetime(2025, 11, 1))
+    assert partition_bounds("sensor_readings_202512") == (datetime(2025, 12, 1), datetime(2026, 1, 1))
+    assert partition_name(datetime(2025, 11, 1) - timedelta(milliseconds=1)) == "sensor_readings_202510"
+
+
+def test_is_partition_name():
+    assert is_partition_name("sensor_readings_202510")
+    assert not is_partition_name("sensor_readings")
+    assert not is_partition_name("sensor_readings_2025")
+    assert not is_partition_name("sensor_readings_20251x")
+    assert not is_partition_name("reading_rollups_1m")
+
+
+def test_rows_are_written_into_month_of_reading(client, run, device_id):
+    month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    before = month_start - timedelta(milliseconds=1)
+    for timestamp in [before, month_start]:
+        reading = {
+            "device_id": device_id, "sensor_type": "temperature", "value": 1.0, "unit": "°C",
+            "timestamp": timestamp.isoformat(),
+        }
+        assert client.post(f"/api/v1/devices/{device_id}/readings", json=reading).status_code == 200
+
+    async def timestamps(moment):
+        table = sensor_readings_table(partition_name(moment))
+        async with ReadSessionLocal() as db:
+            return list(await db.scalars(select(table.c.timestamp).where(table.c.device_id == device_id)))
+
+    assert run(timestamps, before) == [before]
+    assert run(timestamps, month_start) == [month_start]
+
+    # Чтение объединяет партиции
+    readings = client.get(f"/api/v1/devices/{device_id}/readings", params={"limit": 10}).json()["readings"]
+    assert [reading["timestamp"] for reading in readings] == [month_start.isoformat(), before.isoformat()]
+
+
+def test_overlapping_selects_partitions_of_interval(run):
+    names = ["sensor_readings_202001", "sensor_readings_202002", "sensor_readings_202003"]
+
+    async def scenario():
+        async with SessionLocal() as db:
+            await reading_partitions.ensure(db, names)
+        async with ReadSessionLocal() as db:
+            tables = await reading_partitions.overlapping(db, since=datetime(2020, 2, 10), until=datetime(2020, 3, 1))
+            older = await reading_partitions.overlapping(db, until=datetime(2020, 3, 1))
+        async with SessionLocal() as db:
+            dropped = await reading_partitions.drop_before(db, datetime(2020, 4, 1))
+        return [table.name for table in tables], [table.name for table in older], dropped
+
+    tables, older, dropped = run(scenario)
+    assert tables == ["sensor_readings_202002"]
+    assert older == ["sensor_readings_202002", "sensor_readings_202001"]
+    assert dropped == names
@@ -0,0 +1,23 @@
+"""Тесты границы хранения показаний."""
+
+from datetime import datetime
+
+import pytest
+
+from app.service.retention_service import retention_cutoff
+
+
+def test_docstring_example():
+    assert retention_cutoff(datetime(2025, 10, 8, 15, 30), 7) == datetime(2025, 10, 1, 0, 0)
+
+
+@pytest.mark.parametrize("now, days, expected", [
+    (datetime(2025, 10, 8, 0, 0), 7, datetime(2025, 10, 1)),
+    (datetime(2025, 10, 8, 23, 59, 59, 999999), 7, datetime(2025, 10, 1)),
+    (datetime(2025, 3, 5, 12, 0), 7, datetime(2025, 2, 26)),
+    (datetime(2024, 3, 5, 12, 0), 7, datetime(2024, 2, 27)),
+    (datetime(2026, 1, 3, 6, 0), 30, datetime(2025, 12, 4)),
+    (datetime(2025, 10, 8, 15, 30), 0, datetime(2025, 10, 8)),
+])
+def test_cutoff_is_day_start(now, days, expected):
+    assert retention_cutoff(now, days) == expected
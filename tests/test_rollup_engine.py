@@ -0,0 +1,116 @@
+"""Тесты движка агрегатов показаний (RollupEngine)."""
+
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.db.session import ReadSessionLocal
+from app.enums.rollup_resolution import RollupResolution
+from app.models.reading_rollup import ReadingRollup
+from app.models.types import datetime_to_millis
+from app.service import rollup_engine as rollup_module
+from app.service.rollup_engine import RollupEngine, merge_aggregate
+
+MINUTE = datetime(2026, 1, 1, 12, 30)
+
+
+def _row(device_id, second, value, sensor_type="temperature"):
+    return {
+        "device_id": device_id,
+        "sensor_type": sensor_type,
+        "value": value,
+        "timestamp": MINUTE.replace(second=second),
+    }
+
+
+async def _stored(device_id, resolution):
+    async with ReadSessionLocal() as db:
+        rollups = await db.scalars(
+            select(ReadingRollup)
+            .where(ReadingRollup.device_id == device_id, ReadingRollup.resolution == resolution.value)
+            .order_by(ReadingRollup.sensor_type, ReadingRollup.bucket)
+        )
+        return [
+            (rollup.sensor_type, rollup.bucket, rollup.count, rollup.min, rollup.max, rollup.sum, rollup.last_value)
+            for rollup in rollups
+        ]
+
+
+def test_merge_aggregate_keeps_latest_value():
+    target = [2, 1.0, 5.0, 6.0, 5.0, 2000]
+    merge_aggregate(target, [1, 0.5, 3.0, 3.0, 3.0, 1000])
+    assert target == [3, 0.5, 5.0, 9.0, 5.0, 2000]
+
+    merge_aggregate(target, [1, 4.0, 4.0, 4.0, 4.0, 3000])
+    assert target == [4, 0.5, 5.0, 13.0, 4.0, 3000]
+
+
+def test_add_builds_every_resolution():
+    engine = RollupEngine(60)
+    # Показания приходят не по порядку времени
+    engine.add([_row("dev", 40, 3.0), _row("dev", 10, 1.0), _row("dev", 20, 5.0), _row("dev", 5, 7.0, "humidity")])
+
+    bucket = datetime_to_millis(MINUTE)
+    for resolution in RollupResolution:
+        pending = engine.pending("dev", resolution)
+        assert pending[("temperature", resolution.bucket_start(bucket))][:5] == [3, 1.0, 5.0, 9.0, 3.0]
+        assert pending[("humidity", resolution.bucket_start(bucket))][:5] == [1, 7.0, 7.0, 7.0, 7.0]
+
+    assert list(engine.pending("dev", RollupResolution.MINUTE, sensor_type="humidity")) == [("humidity", bucket)]
+    assert engine.pending("dev", RollupResolution.MINUTE, since_millis=bucket + 1) == {}
+    assert engine.pending("other", RollupResolution.MINUTE) == {}
+    assert engine.stats()["pending_buckets"] == 6
+
+
+def test_flush_merges_into_stored_rows(run, device_id):
+    engine = RollupEngine(60)
+
+    async def scenario():
+        engine.add([_row(device_id, 10, 2.0), _row(device_id, 50, 4.0)])
+        await engine.flush()
+        first = await _stored(device_id, RollupResolution.MINUTE)
+        # Показание из середины бакета не меняет last_value
+        engine.add([_row(device_id, 30, 1.0), _row(device_id, 59, 6.0, "humidity")])
+        await engine.flush()
+        return first, await _stored(device_id, RollupResolution.MINUTE)
+
+    first, second = run(scenario)
+    assert first == [("temperature", MINUTE, 2, 2.0, 4.0, 6.0, 4.0)]
+    assert second == [
+        ("temperature", MINUTE, 3, 1.0, 4.0, 7.0, 4.0),
+        ("humidity", MINUTE, 1, 6.0, 6.0, 6.0, 6.0),
+    ]
+    assert engine.pending(device_id, RollupResolution.MINUTE) == {}
+    assert engine.flush_count == 2 and engine.flushed_total == 9
+
+
+def test_failed_flush_keeps_aggregates(run, device_id, monkeypatch):
+    engine = RollupEngine(60)
+    engine.add([_row(device_id, 10, 2.0)])
+
+    def broken_session():
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(rollup_module, "SessionLocal", broken_session)
+    run(engine.flush)
+    assert engine.flush_errors == 1
+    # Агрегаты, пришедшие после сбоя, объединяются с возвращенными
+    engine.add([_row(device_id, 20, 3.0)])
+    assert engine.pending(device_id, RollupResolution.MINUTE)[("temperature", datetime_to_millis(MINUTE))][:5] == [
+        2, 2.0, 3.0, 5.0, 3.0
+    ]
+
+    monkeypatch.undo()
+    run(engine.flush)
+    assert run(_stored, device_id, RollupResolution.HOUR) == [
+        ("temperature", MINUTE.replace(minute=0), 2, 2.0, 3.0, 5.0, 3.0)
+    ]
+
+
+def test_forget_drops_pending_aggregates(run, device_id):
+    engine = RollupEngine(60)
+    engine.add([_row(device_id, 10, 2.0), _row("other", 10, 1.0)])
+    engine.forget(device_id)
+
+    assert engine.pending(device_id, RollupResolution.DAY) == {}
+    assert len(engine.pending("other", RollupResolution.DAY)) == 1
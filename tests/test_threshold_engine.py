@@ -0,0 +1,89 @@
+"""Тесты проверки показаний по порогам устройства (ThresholdEngine)."""
+
+from datetime import datetime, timedelta
+
+from app.db.session import SessionLocal
+from app.service import threshold_engine as threshold_module
+from app.service.threshold_engine import ThresholdEngine
+
+START = datetime(2026, 1, 1, 12, 0)
+
+
+def _rows(device_id, values, sensor_type="temperature", offset=0):
+    return [
+        {
+            "device_id": device_id,
+            "sensor_type": sensor_type,
+            "value": value,
+            "unit": "°C",
+            "timestamp": START + timedelta(seconds=offset + index),
+        }
+        for index, value in enumerate(values)
+    ]
+
+
+async def _evaluate(engine, rows):
+    async with SessionLocal() as db:
+        return await engine.evaluate(db, rows)
+
+
+def _engine(device_id, **limits):
+    engine = ThresholdEngine(0.05, 60)
+    engine.set_limits(device_id, {"temperature_limit": 30.0, "humidity_limit": 80.0, **limits})
+    return engine
+
+
+def test_alert_on_breach(run, client, device_id):
+    engine = _engine(device_id)
+    alerts = run(_evaluate, engine, _rows(device_id, [25.0, 31.0]))
+
+    assert [(alert.alert_type, alert.code, alert.severity) for alert in alerts] == [
+        ("temperature", "temperature_limit", "high")
+    ]
+    assert "31.0 °C" in alerts[0].message
+    assert client.get(f"/api/v1/devices/{device_id}").json()["alerts_count"] == 1
+
+
+def test_hysteresis_suppresses_repeated_alerts(run, device_id):
+    engine = _engine(device_id)
+    # Порог 30, гистерезис 5%: сброс превышения только при значении не выше 28.5
+    alerts = run(_evaluate, engine, _rows(device_id, [31.0, 29.0, 30.5, 28.6, 31.0]))
+    assert len(alerts) == 1
+    assert engine.stats()["breached_streams"] == 1
+
+    alerts = run(_evaluate, engine, _rows(device_id, [28.5, 30.1], offset=10))
+    assert len(alerts) == 1
+    assert engine.alerts_created == 2
+
+
+def test_streams_are_independent(run, device_id):
+    engine = _engine(device_id)
+    rows = _rows(device_id, [31.0]) + _rows(device_id, [81.0], "humidity") + _rows(device_id, [1.0], "fire")
+
+    alerts = run(_evaluate, engine, rows)
+    # Порог пламени не задан
+    assert sorted(alert.alert_type for alert in alerts) == ["humidity", "temperature"]
+
+
+def test_older_reading_does_not_reset_state(run, device_id):
+    engine = _engine(device_id)
+    run(_evaluate, engine, _rows(device_id, [31.0], offset=10))
+
+    # Показание из истории ниже порога не сбрасывает превышение
+    assert run(_evaluate, engine, _rows(device_id, [20.0])) == []
+    assert run(_evaluate, engine, _rows(device_id, [32.0], offset=20)) == []
+
+
+def test_failed_save_restores_state(run, device_id, monkeypatch):
+    engine = _engine(device_id)
+
+    async def broken_save(db, alerts):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(threshold_module, "save_alerts", broken_save)
+    assert run(_evaluate, engine, _rows(device_id, [31.0])) == []
+    assert engine.errors == 1
+
+    monkeypatch.undo()
+    # Превышение продолжается: оповещение создается следующим показанием
+    assert len(run(_evaluate, engine, _rows(device_id, [31.5], offset=1))) == 1